@@ -0,0 +1,155 @@
+"""
+Benchmark - learning.db sıcak sorguları (indekssiz vs. göç sonrası)
+Sentetik bir işlem geçmişi (varsayılan 1.000.000 satır, ~%1 PENDING) oluşturur,
+sıcak sorguları indeksler olmadan ölçer, ardından şema göçlerini uygulayıp
+aynı sorguları tekrar ölçer.
+
+Kullanım:
+    python benchmark_learning_db.py [satır_sayısı]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from utils.learning_system import TradePerformanceTracker, MIGRATIONS
+
+SYMBOLS = ["EURUSD=X", "GBPUSD=X", "USDJPY=X", "AUDUSD=X", "USDCAD=X", "XAUUSD=X", "BTC-USD", "ETH-USD"]
+TRENDS = ["BULLISH", "BEARISH", "NEUTRAL"]
+INDEX_MIGRATION = MIGRATIONS[-1][0]
+
+
+PLAN_QUERIES = {
+    "get_pending_trades": ("SELECT * FROM trade_history WHERE outcome = 'PENDING'", ()),
+    "duplicate_check": ("""
+        SELECT id FROM trade_history
+        WHERE outcome = 'PENDING' AND symbol = ? AND direction = ?
+          AND entry_price IS NOT NULL AND ABS(entry_price - ?) <= ?
+        ORDER BY timestamp DESC LIMIT 1
+    """, ("EURUSD=X", "BUY", 1.1, 0.0005)),
+    "stats_counts": ("SELECT outcome, COUNT(*) FROM trade_history GROUP BY outcome", ()),
+    "is_entry_allowed": ("""
+        SELECT blocked_price, tolerance FROM entry_cooldowns
+        WHERE symbol = ? AND blocked_until > ?
+    """, ("EURUSD=X", datetime.now()))
+}
+
+
+def build_history(db_path, rows, pending_ratio=0.01, seed=42):
+    """
+    İndeks göçü uygulanmamış (user_version = son-1) sentetik geçmiş oluşturur
+
+    Döner:
+        İndekssiz veritabanına bağlı izleyici (yeniden oluşturulana kadar göç çalışmaz)
+    """
+    tracker = TradePerformanceTracker(db_path)
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365)
+
+    with sqlite3.connect(db_path) as conn:
+        for name in ("idx_trades_pending", "idx_trades_outcome_symbol", "idx_cooldowns_symbol_until"):
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute(f"PRAGMA user_version = {INDEX_MIGRATION - 1}")
+
+        def _row(i):
+            outcome = "PENDING" if rng.random() < pending_ratio else rng.choice(["WIN", "LOSS", "BREAKEVEN"])
+            price = round(rng.uniform(0.5, 2.0), 5)
+            return (
+                (start + timedelta(seconds=i * 30)).strftime("%Y-%m-%d %H:%M:%S"),
+                rng.choice(SYMBOLS), rng.choice(["BUY", "SELL"]), price,
+                round(price * 0.99, 5), round(price * 1.02, 5), 0.01,
+                rng.randint(40, 100), rng.uniform(-100, 100), rng.randint(50, 100),
+                outcome, rng.choice(TRENDS), rng.choice(TRENDS), rng.choice(TRENDS)
+            )
+
+        batch = 50000
+        for offset in range(0, rows, batch):
+            conn.executemany("""
+                INSERT INTO trade_history (
+                    timestamp, symbol, direction, entry_price, stop_loss, take_profit, position_size,
+                    technical_score, news_sentiment, llm_confidence, outcome, trend_h1, trend_h4, trend_d1
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [_row(i) for i in range(offset, min(rows, offset + batch))])
+        conn.execute("""
+            INSERT INTO entry_cooldowns (symbol, blocked_until, blocked_price, tolerance)
+            VALUES ('EURUSD=X', ?, 1.1, 0.001)
+        """, (datetime.now() + timedelta(hours=1),))
+        conn.commit()
+    return tracker
+
+
+def print_plans(db_path):
+    with sqlite3.connect(db_path) as conn:
+        for name, (sql, params) in PLAN_QUERIES.items():
+            details = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            print(f"  {name:<32} {' | '.join(details)}")
+
+
+def measure(label, fn, repeat=20):
+    fn()  # ısınma (sayfa önbelleği)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"  {label:<32} {elapsed:9.2f} ms")
+    return elapsed
+
+
+def run_queries(tracker):
+    with sqlite3.connect(tracker.db_path) as conn:
+        pending = conn.execute("""
+            SELECT symbol, direction, entry_price FROM trade_history WHERE outcome = 'PENDING' LIMIT 1
+        """).fetchone()
+
+    def _stats():
+        with sqlite3.connect(tracker.db_path) as conn:
+            return dict(conn.execute("SELECT outcome, COUNT(*) FROM trade_history GROUP BY outcome").fetchall())
+
+    def _duplicate():
+        # Mevcut bir PENDING işlemin fiyatında: mükerrer bulunur, yeni satır eklenmez
+        return tracker.log_trade_decision(pending[0], pending[1], {}, {"entry_price": pending[2]})
+
+    return {
+        "get_pending_trades": measure("get_pending_trades", tracker.get_pending_trades),
+        "duplicate_check": measure("log_trade_decision (mükerrer)", _duplicate),
+        "stats_counts": measure("/api/stats sayımları", _stats),
+        "is_entry_allowed": measure("is_entry_allowed", lambda: tracker.is_entry_allowed("EURUSD=X", 1.2)),
+        "analyze_patterns": measure("analyze_patterns (sayaçlar)", lambda: tracker.analyze_patterns(min_samples=10), repeat=5)
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workdir = tempfile.mkdtemp(prefix="learning_bench_")
+    db_path = os.path.join(workdir, "learning.db")
+
+    print(f"📦 {rows:,} satırlık sentetik geçmiş oluşturuluyor ({db_path})...")
+    started = time.perf_counter()
+    tracker = build_history(db_path, rows)
+    print(f"   {time.perf_counter() - started:.1f}s")
+
+    print("\n🔎 Sorgu planları (indekssiz):")
+    print_plans(db_path)
+    print("\n⏱️ İndekssiz:")
+    before = run_queries(tracker)
+
+    print(f"\n🧱 Göç v{INDEX_MIGRATION} uygulanıyor...")
+    started = time.perf_counter()
+    tracker = TradePerformanceTracker(db_path)
+    print(f"   {time.perf_counter() - started:.1f}s")
+
+    print("\n🔎 Sorgu planları (indeksli):")
+    print_plans(db_path)
+    print("\n⏱️ İndeksli:")
+    after = run_queries(tracker)
+
+    print("\n📊 Hızlanma:")
+    for key in before:
+        print(f"  {key:<32} x{before[key] / max(after[key], 1e-6):.1f}")
+
+
+if __name__ == "__main__":
+    main()
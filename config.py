@@ -82,6 +82,27 @@ NEWS_LOOKBACK_HOURS = 24
 MIN_NEWS_SENTIMENT = 50  # 100 üzerinden (işlem yönüyle uyumlu olmalı)
 NEWS_IMPACT_LEVELS = ["HIGH", "MEDIUM"]  # DÜŞÜK etkili haberleri yoksay
 
+# Duygu endeksi: sembol bazlı, üstel olarak sönümlenen ağırlıklı ortalama
+SENTIMENT_HALF_LIFE_HOURS = 6  # Bir haberin ağırlığı 6 saatte yarıya iner
+SENTIMENT_IMPACT_WEIGHTS = {"HIGH": 1.0, "MEDIUM": 0.5, "LOW": 0.0}  # LOW = yoksay
+SENTIMENT_MIN_WEIGHT = 0.05  # Bunun altındaki etkin ağırlık "haber yok" sayılır
+SENTIMENT_SNAPSHOT_PATH = "./data/sentiment_index.json"
+SENTIMENT_SNAPSHOT_SECONDS = 300  # Endeks en fazla bu sıklıkta diske yazılır
+
+# Haber alım servisi: ana döngüden ayrı süreçte çalışır, döngü HTTP beklemez
+NEWS_INGEST_DAEMON = True  # False ise eski davranış (döngü içinde 24 saatte bir güncelleme)
+NEWS_INGEST_TICK_SECONDS = 60  # Servisin kaynakları kontrol etme aralığı
+# Kaynak başına minimum yoklama aralığı (saniye) - ücretsiz kotalara göre
+NEWS_SOURCE_INTERVALS = {
+    "newsapi": 900,         # Günde 100 istek -> 15 dakikada bir
+    "alphavantage": 21600   # Günde 25 istek, her yoklama 4 istek -> 6 saatte bir
+}
+# NewsAPI yoklaması başına en fazla sayfa (100 haber/sayfa, her sayfa bir istek).
+# İşarete ulaşamayan tarama sonraki yoklamalarda kaldığı yerden sürer.
+NEWSAPI_MAX_PAGES = 1
+# Yüksek etkili yeni haber geldiğinde servisin ana döngüyü uyandırdığı sinyal dosyası
+NEWS_SIGNAL_PATH = "./data/news_signal.json"
+
 # 3. Aşama: LLM Kararı
 MIN_CONFIDENCE = 70  # Uygulama için minimum güven (önceden 90 idi)
 
@@ -93,10 +114,15 @@ MIN_DISPLAY_CONFIDENCE = 10  # yüzde olarak (ör. %10)
 VIRTUAL_BALANCE = 100.0  # USD cinsinden
 # Sanal hesapta işlem açılırken risk yüzdesi (ör. 1 => %1)
 VIRTUAL_RISK_PERCENT = 1.0
-# Eğer bir LLM kararı düşük güven seviyesindeyse, kaç kez yeniden deneneceği
-# ve denemeler arasında kaç saniye bekleneceği.
-MAX_CONFIDENCE_RETRIES = 5
-CONFIDENCE_RETRY_DELAY = 5  # saniye
+# Eğer bir LLM kararı düşük güven seviyesindeyse aynı bağlamla N örnek eşzamanlı
+# alınır (her biri farklı sıcaklıkla) ve karar/güven oylanır (öz-tutarlılık).
+LLM_CONSISTENCY_SAMPLES = 3
+LLM_CONSISTENCY_TEMPERATURES = [0.0, 0.4, 0.8]
+# Oylanan kararın güveni çoğunluğun ortalama güvenidir (MIN_CONFIDENCE buna uygulanır);
+# çoğunluğun oy oranı bunun altındaysa karar BEKLEMEDE KAL olur (3 örnekte 2/3 yeterli)
+LLM_CONSISTENCY_MIN_AGREEMENT = 0.6
+MAX_CONFIDENCE_RETRIES = 5  # (deprecated) eski sıralı yeniden deneme sayısı
+CONFIDENCE_RETRY_DELAY = 5  # (deprecated) eski denemeler arası bekleme (saniye)
 
 # ==========================================
 # LLM ARKA UÇ SEÇİMİ
@@ -108,6 +134,36 @@ USE_GEMINI_API = True  # ✅ ÖNERİLEN: Hızlı, güvenilir, ücretsiz kota (g
 GEMINI_MODEL = "gemini-2.0-flash"  
 # GEMINI_MODEL = "gemini-2.5-flash"    
 
+# Gemini kota zamanlayıcısı: 429'da uyumak yerine istemci tarafında kotayı izle
+GEMINI_RPM_LIMIT = 15                # Dakikalık istek sınırı (ücretsiz kota)
+GEMINI_RPD_LIMIT = 1500              # Günlük istek sınırı
+GEMINI_BURST = 3                     # Art arda en fazla istek; fazlası dakikaya yayılır
+GEMINI_MAX_QUEUE_WAIT_SECONDS = 20   # Kota bundan geç açılacaksa karar ertelenir
+GEMINI_429_COOLDOWN_SECONDS = 60     # Sunucu 429 döndürürse yeni istek gönderilmeyecek süre
+GEMINI_QUOTA_PATH = "./data/gemini_quota.json"  # Günlük sayaç (yeniden başlatmada korunur)
+GEMINI_CACHE_TTL_SECONDS = 3600     # Önek bağlam önbelleğinin ömrü
+
+# Yük/gecikme testi: gerçek arka uç yerine sahte (stub) LLM
+# Ollama için: python -m llm.stub_server --port 11435 ve OLLAMA_HOST'u ona yönlendir
+LLM_OFFLINE_GEMINI = False           # True = Gemini yerine çevrimdışı stub istemci (API anahtarı gerekmez)
+LLM_STUB_OPTIONS = {                 # Çevrimdışı Gemini stub'ının davranışı
+    "latency_ms": 800,               # Gecikme medyanı (log-normal)
+    "latency_sigma": 0.5,
+    "error_rate": 0.02,              # 500/None dönen istek oranı
+    "burst_429_rate": 0.01,          # 429 patlaması başlama olasılığı
+    "burst_429_length": 5            # Patlamadaki ardışık 429 sayısı
+}
+GEMINI_STUB_QUOTA_PATH = "./data/gemini_stub_quota.json"  # Stub'ın günlük sayacı (gerçek sayaçtan ayrı)
+
+# Yedekli (hedged) istek: birincil arka uç (USE_GEMINI_API'ye göre) p-yüzdelik gecikmesi
+# içinde geçerli yanıt vermezse aynı istek diğer arka uca da gönderilir; ilk geçerli yanıt kazanır.
+# Her iki arka ucun da (Gemini anahtarı + çalışan Ollama) hazır olmasını gerektirir.
+LLM_HEDGING = False
+LLM_HEDGE_PERCENTILE = 90             # Birincilin son gecikmelerinin bu yüzdeliğinde yedek istek
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = 8   # Yeterli gecikme örneği yokken eşik
+LLM_HEDGE_WINDOW = 100                # Yüzdelik için tutulan son gecikme sayısı
+LLM_HEDGE_METRICS_PATH = "./data/llm_hedge_metrics.json"  # Kazanan arka uç/gecikme (dashboard)
+
 # Ollama Ayarları (USE_GEMINI_API = False ise)
 #LLM_MODEL = "deepseek-r1:1.5b"  # ✅ EN YENİ - DeepSeek R1 (Hızlı ve Mantıklı)
 LLM_MODEL = "mistral:latest"  # Alternatif: 4.4GB
@@ -117,6 +173,13 @@ LLM_TEMPERATURE = 0.0  # "Rüya görmeyi" (halüsinasyonu) engellemek için SIFI
 LLM_TOP_P = 0.1        # Sadece en yüksek olasılıklı teknik sonuçlara odaklan
 LLM_MAX_TOKENS = 1024  # Detaylı raporlar için
 LLM_CONTEXT_WINDOW = 2048 # Forex verileri için yeterli, VRAM tasarrufu sağlar
+OLLAMA_HOST = "http://127.0.0.1:11434"  # Stub sunucu ile test için ör. http://127.0.0.1:11435
+OLLAMA_STREAM = True   # Akışlı üretim: gerekli alanları içeren JSON tamamlanınca istek erken kapatılır
+# Model yaşam döngüsü: pass'ler arası beklemede model VRAM'de kalsın
+OLLAMA_KEEP_ALIVE = None          # None = LLM_PASS_WAIT_SECONDS + pay; veya "10m", -1 (hep yüklü)
+OLLAMA_KEEP_ALIVE_MARGIN = 120    # saniye
+OLLAMA_PRELOAD = True             # Başlangıçta ve pass başında modeli önceden yükle
+OLLAMA_METRICS_PATH = "./data/ollama_metrics.json"  # Yükleme/boşaltma metrikleri (dashboard)
 
 # LLM çoklu analiz (ensemble-like) ayarları
 LLM_ANALYSIS_RUNS = 3        # (deprecated) eski çoklu analiz ayarı
@@ -128,6 +191,55 @@ LLM_PASS_RUNS = 3
 # Bekleme süresi (saniye) tüm pass'lerden sonra (ör. 5 dakika = 300)
 LLM_PASS_WAIT_SECONDS = 300
 
+# LLM karar önbelleği: bağlam (nicemlenmiş) değişmediyse önceki kararı yeniden kullan
+ENABLE_LLM_CACHE = True
+LLM_CACHE_TTL_SECONDS = 900        # Bir kararın geçerlilik süresi (15 dk)
+LLM_CACHE_MAX_ENTRIES = 256        # LRU ile tutulacak en fazla karar sayısı
+LLM_CACHE_PRICE_BUCKET_PCT = 0.05  # Fiyat kovası genişliği (% - 0.05 ≈ EURUSD'de ~5 pip)
+LLM_CACHE_RSI_BUCKET = 5           # RSI kovası genişliği (puan)
+LLM_CACHE_PATH = "./data/llm_decision_cache.json"
+
+# Komut önek önbelleği: sistem komutu + sistem hafızası + talimatlar komutun başında sabit
+# önek olarak gider. Gemini'de önek bağlam önbelleğine alınır ve her kararda sadece sembole
+# özgü kısım gönderilir; Ollama tam komutu alır, ortak baş kısmı kendi KV önbelleğinden
+# yeniden kullanır. Önek, öğrenilmiş desenler değişince otomatik yenilenir.
+LLM_PREFIX_CACHE = True
+
+# Öğrenilmiş desenler bellekte tutulur; analyze_patterns çalışınca veya bu süre dolunca yenilenir
+LEARNED_PATTERNS_TTL_SECONDS = 600
+LEARNING_INSIGHT_SNAPSHOTS_KEEP = 50  # Saklanan içgörü anlık görüntü sürümü sayısı
+# Bekleyen işlem defteri (SL/TP seviye indeksi) dashboard gibi başka süreçlerin
+# değişikliklerini yakalamak için bu aralıkla learning.db'den yeniden yüklenir
+PENDING_BOOK_RESYNC_SECONDS = 300
+# Çevrimdışı analiz için artımlı Parquet dışa aktarımı (python -m utils.analytics_export, pyarrow gerekir)
+ANALYTICS_EXPORT_DIR = "./data/analytics"
+# Web sonuçları ve analiz arşivi sadece eklenen JSONL segmentlerinde tutulur (utils/result_log.py);
+# dashboard /api/results ve /api/archive ile son N kaydı okur
+RESULT_LOG_DIR = "./data/results"
+WEB_RESULTS_KEEP = 200
+ANALYSIS_ARCHIVE_KEEP = 5000
+
+# Değişiklik kapısı: 1-2. aşama imzası (yön, skor/RSI/duygu kovaları, trendler, olaylar)
+# son LLM analizinden beri değişmediyse 3. aşama atlanır
+ENABLE_CHANGE_GATE = True
+CHANGE_GATE_MAX_STALENESS_SECONDS = 1800  # İmza aynı kalsa da en geç bu sürede yeniden analiz
+CHANGE_GATE_SCORE_BUCKET = 10             # Teknik skor kovası (puan)
+CHANGE_GATE_RSI_BUCKET = 5                # RSI kovası (puan)
+CHANGE_GATE_SENTIMENT_BUCKET = 10         # Haber duygu skoru kovası (puan)
+
+# Toplu (batch) LLM kararları: 2. aşamayı geçen adaylar tek istekte sorulur
+LLM_BATCH_MODE = True
+LLM_BATCH_SIZE = 5            # Bir istekteki en fazla sembol sayısı
+LLM_BATCH_MIN_CANDIDATES = 2  # Bundan az aday varsa tekli istek kullanılır
+
+# Eşzamanlı LLM dağıtıcısı: kararlar arka planda alınır, 1. ve 2. aşamalar beklemez.
+# Bekleyen işler teknik skora göre sıralanır. Toplu mod önceliklidir: ikisi de açıksa
+# toplu istek pass sonunda gider, toplu yanıtta kararı çıkmayan (veya aday sayısı
+# LLM_BATCH_MIN_CANDIDATES'in altında kalan) semboller dağıtıcıda eşzamanlı sorulur.
+LLM_CONCURRENT_MODE = True
+LLM_DISPATCH_WORKERS = 3
+LLM_BACKEND_CONCURRENCY = {"ollama": 1, "gemini": 4}  # GPU tek istek / API paralel
+
 # ==========================================
 # RAG YAPILANDIRMASI
 # ==========================================
@@ -142,6 +254,10 @@ VECTOR_DB_PATH = "./data/embeddings/chroma_db"
 # VERİTABANI YAPILANDIRMASI
 # ==========================================
 NEWS_DB_PATH = "./database/news.db"
+# Haberler aylık bölümlerde tutulur; saklama süresi dolan aylar bütün olarak silinir
+NEWS_RETENTION_DAYS = 30
+SIM_TRADES_DB_PATH = "./database/simulated_trades.db"  # DRY_RUN simüle işlemleri (eski data/simulated_trades.json)
+COMMAND_QUEUE_DB_PATH = "./database/commands.db"  # Dashboard manuel işlem komut kuyruğu
 
 # ==========================================
 # SİSTEM YAPILANDIRMASI
@@ -15,6 +15,7 @@ class YFinanceBroker:
         self.name = "YFinance (Sadece Veri)"
         self.initialized = True
         self.logger = logging.getLogger("SniperBot")
+        self._sim_store = None  # DRY_RUN açık pozisyonları (ilk ihtiyaçta açılır)
         self.logger.info("✅ YFinance Broker Başlatıldı")
 
     def get_market_data(self, symbol, timeframe, limit=100):
@@ -169,6 +170,32 @@ class YFinanceBroker:
             self.logger.error(f"{symbol} için fiyat alma hatası: {e}")
             return None
             
+    def get_current_prices(self, symbols):
+        """
+        Birden fazla sembolün en son fiyatını tek yf.download isteğiyle al.
+        Toplu yanıtta fiyatı çıkmayan semboller tek tek (yedek sembollerle) denenir.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        prices = {}
+        if len(symbols) > 1:
+            try:
+                df = yf.download(tickers=symbols, period="1d", interval="1m",
+                                 group_by="column", progress=False, threads=True)
+                closes = df['Close'] if df is not None and not df.empty else None
+                if closes is not None:
+                    for symbol in symbols:
+                        if symbol in closes:
+                            series = closes[symbol].dropna()
+                            if not series.empty:
+                                prices[symbol] = float(series.iloc[-1])
+            except Exception as e:
+                self.logger.warning(f"Toplu fiyat alınamadı, tek tek deneniyor: {e}")
+
+        for symbol in symbols:
+            if symbol not in prices:
+                prices[symbol] = self.get_current_price(symbol)
+        return prices
+
     def place_order(self, symbol, action, volume, entry=None, sl=None, tp=None, comment=""):
         """
         Simüle edilmiş emir iletimi
@@ -189,16 +216,14 @@ class YFinanceBroker:
     def get_open_positions(self):
         """Açık pozisyonları getir (Sanal veya Gerçek)"""
         if config.DRY_RUN:
-            import json
-            import os
-            sim_file = os.path.join('data', 'simulated_trades.json')
-            if os.path.exists(sim_file):
-                try:
-                    with open(sim_file, 'r', encoding='utf-8') as f:
-                        trades = json.load(f)
-                    return [t for t in trades if t.get('status') == 'OPEN']
-                except Exception:
-                    pass
+            # Simüle işlem deposu: açık işlemler kısmi OPEN indeksinden okunur
+            try:
+                if self._sim_store is None:
+                    from database.simulated_trades_db import SimulatedTradeStore
+                    self._sim_store = SimulatedTradeStore()
+                return self._sim_store.open_trades()
+            except Exception as e:
+                self.logger.error(f"Simüle açık pozisyonlar okunamadı: {e}")
             return []
         
         # Gerçek broker (MT5 vb.) açık pozisyonları buraya gelecek
@@ -66,6 +66,27 @@ class DataFetcher:
             logger.error("MetaTrader5 kütüphanesi yüklü değil")
             return None
     
+    def get_current_prices(self, symbols):
+        """
+        Birden fazla sembolün orta fiyatını tek seferde alır (broker destekliyorsa
+        tek toplu istek, değilse her benzersiz sembol için bir kez)
+        
+        Argümanlar:
+            symbols: Ticari varlık listesi
+            
+        Döner:
+            {sembol: fiyat veya None}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if hasattr(self.broker, 'get_current_prices'):
+            return self.broker.get_current_prices(symbols)
+        
+        prices = {}
+        for symbol in symbols:
+            price = self.get_current_price(symbol)
+            prices[symbol] = price.get("mid") if isinstance(price, dict) else None
+        return prices
+    
     def get_bars(self, symbol, timeframe, count=500):
         """
         Geçmiş OHLCV mum verilerini alır
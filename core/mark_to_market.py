@@ -0,0 +1,116 @@
+"""
+Simüle İşlemler için Toplu Piyasa Değerlemesi (Mark-to-Market)
+Açık işlemlerin benzersiz sembolleri için fiyatlar tek seferde alınır, tüm
+işlemlerin gerçekleşmemiş K/Z'si dizi işlemleriyle hesaplanır ve yalnızca
+değeri değişen satırlar depoya yazılır. Özet (simulated_trades_summary ile
+aynı alanlar) aynı diziler üzerinden üretilir.
+"""
+
+import numpy as np
+from utils.logger import setup_logger
+
+logger = setup_logger("MarkToMarket")
+
+# Bu toleransın altındaki farklar "değişmedi" sayılır (yuvarlanmış alanlar)
+CHANGE_TOLERANCE = 1e-9
+
+
+def _column(trades, key):
+    """Sözlük listesinden float dizisi (None -> NaN)"""
+    return np.array([np.nan if t.get(key) is None else float(t[key]) for t in trades], dtype=float)
+
+
+def _changed(old, new):
+    """NaN'ları eşit sayarak eleman bazında değişim maskesi"""
+    both_nan = np.isnan(old) & np.isnan(new)
+    return ~both_nan & ~(np.abs(old - new) <= CHANGE_TOLERANCE)
+
+
+class MarkToMarket:
+    """Simüle işlem deposunu toplu olarak piyasaya göre değerler"""
+
+    def __init__(self, store, data_fetcher):
+        """
+        Argümanlar:
+            store: SimulatedTradeStore
+            data_fetcher: get_current_prices (yoksa get_current_price) sunan veri çekici
+        """
+        self.store = store
+        self.data_fetcher = data_fetcher
+
+    def _fetch_prices(self, symbols):
+        if hasattr(self.data_fetcher, "get_current_prices"):
+            return self.data_fetcher.get_current_prices(symbols)
+
+        prices = {}
+        for symbol in symbols:
+            p = self.data_fetcher.get_current_price(symbol)
+            try:
+                prices[symbol] = (p.get('mid') or p.get('price')) if isinstance(p, dict) else float(p)
+            except Exception:
+                prices[symbol] = None
+        return prices
+
+    def run(self):
+        """
+        Açık işlemleri değerler ve değişen satırları yazar
+
+        Döner:
+            simulated_trades_summary ile aynı alanlara sahip özet sözlüğü
+        """
+        trades = self.store.open_trades()
+        if trades:
+            symbols = sorted({t["symbol"] for t in trades})
+            prices = self._fetch_prices(symbols)
+            price = np.array([np.nan if prices.get(t["symbol"]) is None else float(prices[t["symbol"]])
+                              for t in trades], dtype=float)
+
+            entry = _column(trades, "entry_price")
+            lot = np.nan_to_num(_column(trades, "lot"))
+            old_price = _column(trades, "current_price")
+            old_notional = _column(trades, "notional_usd")
+            old_usd = _column(trades, "unrealized_usd")
+            old_pct = _column(trades, "unrealized_pct")
+            sign = np.array([-1.0 if str(t.get("direction", "")).upper() == "SELL" else 1.0 for t in trades])
+
+            priced = ~np.isnan(price)
+            # Eksik notional: lot x 100000 x (giriş veya güncel fiyat)
+            fallback_notional = np.round(lot * 100000 * np.where(np.nan_to_num(entry) != 0, entry, price), 2)
+            notional = np.where(np.isnan(old_notional) & priced, fallback_notional, old_notional)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                change = (price - entry) / entry * sign
+            valued = priced & ~np.isnan(entry) & (entry != 0)
+            new_usd = np.where(valued, np.round(change * np.nan_to_num(notional), 2), old_usd)
+            new_pct = np.where(valued, np.round(change * 100, 4), old_pct)
+            new_price = np.where(priced, price, old_price)
+
+            mask = (_changed(old_price, new_price) | _changed(old_notional, notional) |
+                    _changed(old_usd, new_usd) | _changed(old_pct, new_pct))
+            marks = []
+            for i in np.flatnonzero(mask):
+                marks.append({
+                    "id": trades[i]["id"],
+                    "current_price": None if np.isnan(new_price[i]) else float(new_price[i]),
+                    "notional_usd": None if np.isnan(notional[i]) else float(notional[i]),
+                    "unrealized_usd": None if np.isnan(new_usd[i]) else float(new_usd[i]),
+                    "unrealized_pct": None if np.isnan(new_pct[i]) else float(new_pct[i])
+                })
+            written = self.store.update_marks(marks)
+            logger.debug(f"📈 {len(trades)} açık işlem, {len(symbols)} sembol değerlendi; {written} satır güncellendi")
+
+            total_unreal = float(np.nansum(new_usd))
+            total_notional = float(np.nansum(notional))
+        else:
+            total_unreal = total_notional = 0.0
+
+        closed = self.store.closed_totals()
+        pct = (total_unreal / total_notional * 100) if total_notional else 0.0
+        return {
+            'count_open': len(trades),
+            'count_closed': closed["count_closed"],
+            'total_unrealized_usd': round(total_unreal, 2),
+            'total_notional_usd': round(total_notional, 2),
+            'total_realized_usd': round(closed["total_realized_usd"], 2),
+            'total_unrealized_pct': round(pct, 4)
+        }
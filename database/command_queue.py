@@ -0,0 +1,247 @@
+"""
+Komut Kuyruğu (Manuel İşlemler)
+Dashboard'dan gelen manuel işlem açma/kapama komutlarını SQLite'ta kalıcı
+olarak sıraya koyar; işlem döngüsündeki çalışan (worker) kuyruğu boşaltır.
+Eski open_trade.json / close_trade.json dosya yoklamasının yerini alır:
+
+- Her komut ayrı bir satırdır; işlenirken gelen ikinci komut kaybolmaz
+- idempotency_key aynı isteğin tekrarını (istemci yeniden denemesi) tek komuta indirir
+- Durum: PENDING -> RUNNING -> DONE | FAILED (sonuç/hata ile birlikte)
+- Çökme sonrası RUNNING kalan komutlar yeniden sıraya alınır; işleyiciler
+  idempotenttir (komut id'sinden türetilen işlem id'si, koşullu kapatma),
+  böylece her komutun etkisi tam bir kez uygulanır
+- Bekleyen taraf PRAGMA data_version ile başka süreçlerin yazdığını milisaniyeler
+  içinde fark eder (dosya olayı gerektirmez, Windows'ta da çalışır)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("CommandQueue")
+
+COMMAND_TYPES = ("open_trade", "close_trade")
+FINAL_STATUSES = ("DONE", "FAILED")
+
+
+class CommandQueue:
+    """SQLite tabanlı kalıcı komut kuyruğu"""
+
+    def __init__(self, db_path=None):
+        """
+        Argümanlar:
+            db_path: SQLite veritabanı dosyasının yolu (varsayılanı config'den alır)
+        """
+        self.db_path = db_path or getattr(config, 'COMMAND_QUEUE_DB_PATH', './database/commands.db')
+        self._watch_conn = None
+        self.ensure_db_exists()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def ensure_db_exists(self):
+        """Komut tablosunu ve bekleyen komut indeksini oluşturur"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS commands (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    command TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    idempotency_key TEXT UNIQUE,
+                    status TEXT NOT NULL DEFAULT 'PENDING',  -- 'PENDING', 'RUNNING', 'DONE', 'FAILED'
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_commands_pending
+                ON commands (id)
+                WHERE status = 'PENDING'
+            """)
+            conn.commit()
+
+    @staticmethod
+    def _decode(row):
+        if row is None:
+            return None
+        item = dict(row)
+        for key in ("payload", "result"):
+            if item.get(key) is not None:
+                try:
+                    item[key] = json.loads(item[key])
+                except (TypeError, ValueError):
+                    pass
+        return item
+
+    # ========================================
+    # ÜRETİCİ (DASHBOARD)
+    # ========================================
+
+    def submit(self, command, payload, idempotency_key=None):
+        """
+        Komutu sıraya koyar
+
+        Argümanlar:
+            command: "open_trade" veya "close_trade"
+            payload: Komut parametreleri (sözlük)
+            idempotency_key: Aynı anahtarla gelen tekrar istekler yeni komut oluşturmaz
+
+        Döner:
+            Komut kaydı (yeni veya anahtarı eşleşen mevcut komut)
+
+        Raises:
+            ValueError: Bilinmeyen komut veya sözlük olmayan payload
+        """
+        if command not in COMMAND_TYPES:
+            raise ValueError(f"Bilinmeyen komut: {command}")
+        if not isinstance(payload, dict):
+            raise ValueError("payload bir JSON nesnesi olmalı")
+
+        with self._connect() as conn:
+            try:
+                cursor = conn.execute("""
+                    INSERT INTO commands (command, payload, idempotency_key, created_at)
+                    VALUES (?, ?, ?, ?)
+                """, (command, json.dumps(payload, ensure_ascii=False), idempotency_key, datetime.now().isoformat()))
+                conn.commit()
+                command_id = cursor.lastrowid
+            except sqlite3.IntegrityError:
+                # Aynı idempotency_key: mevcut komut döner
+                conn.rollback()
+                row = conn.execute("SELECT * FROM commands WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                return self._decode(row)
+        return self.get(command_id)
+
+    def get(self, command_id):
+        """Komutun güncel kaydı (durum, sonuç, hata) veya None"""
+        with self._connect() as conn:
+            return self._decode(conn.execute("SELECT * FROM commands WHERE id = ?", (command_id,)).fetchone())
+
+    def recent(self, limit=50):
+        """Son komutlar (en yeni başta)"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM commands ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._decode(r) for r in rows]
+
+    def wait_for_result(self, command_id, timeout, poll_seconds=0.02):
+        """Komut sonuçlanana veya süre dolana kadar bekler; son kaydı döndürür"""
+        deadline = time.monotonic() + timeout
+        while True:
+            item = self.get(command_id)
+            if item is None or item["status"] in FINAL_STATUSES or time.monotonic() >= deadline:
+                return item
+            time.sleep(poll_seconds)
+
+    # ========================================
+    # TÜKETİCİ (İŞLEM DÖNGÜSÜ)
+    # ========================================
+
+    def requeue_stale(self):
+        """Önceki çalışmadan RUNNING kalan komutları yeniden sıraya alır (başlangıçta)"""
+        with self._connect() as conn:
+            count = conn.execute("UPDATE commands SET status = 'PENDING' WHERE status = 'RUNNING'").rowcount
+            conn.commit()
+        if count:
+            logger.warning(f"🔁 Yarım kalan {count} komut yeniden sıraya alındı")
+        return count
+
+    def claim(self):
+        """
+        En eski bekleyen komutu RUNNING yaparak alır (aynı komutu iki tüketici alamaz)
+
+        Döner:
+            Komut kaydı veya kuyruk boşsa None
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM commands WHERE status = 'PENDING' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            conn.execute("""
+                UPDATE commands SET status = 'RUNNING', started_at = ?, attempts = attempts + 1
+                WHERE id = ?
+            """, (datetime.now().isoformat(), row["id"]))
+            conn.commit()
+            item = self._decode(row)
+            item["status"] = "RUNNING"
+            return item
+        finally:
+            conn.close()
+
+    def finish(self, command_id, result=None, error=None):
+        """Komutu DONE (hata yoksa) veya FAILED olarak sonuçlandırır"""
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE commands SET status = ?, result = ?, error = ?, finished_at = ?
+                WHERE id = ? AND status = 'RUNNING'
+            """, ("FAILED" if error else "DONE",
+                  None if result is None else json.dumps(result, ensure_ascii=False, default=str),
+                  error, datetime.now().isoformat(), command_id))
+            conn.commit()
+
+    def has_pending(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM commands WHERE status = 'PENDING' LIMIT 1").fetchone() is not None
+
+    def wait(self, timeout, poll_seconds=0.05):
+        """
+        Bekleyen komut olana veya süre dolana kadar bekler. Veritabanı değişmediği
+        sürece yalnızca PRAGMA data_version okunur (disk taraması yok).
+
+        Döner:
+            Bekleyen komut varsa True
+        """
+        if self._watch_conn is None:
+            self._watch_conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        deadline = time.monotonic() + timeout
+        last_version = None
+        while True:
+            version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != last_version:
+                last_version = version
+                if self.has_pending():
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll_seconds, remaining))
+
+    def drain(self, handlers):
+        """
+        Bekleyen tüm komutları sırayla işler
+
+        Argümanlar:
+            handlers: {komut: fonksiyon(payload, command_id) -> sonuç sözlüğü}; hata fırlatırsa FAILED
+
+        Döner:
+            İşlenen komut sayısı
+        """
+        processed = 0
+        while True:
+            item = self.claim()
+            if item is None:
+                return processed
+            handler = handlers.get(item["command"])
+            try:
+                if handler is None:
+                    raise ValueError(f"İşleyici yok: {item['command']}")
+                self.finish(item["id"], result=handler(item["payload"], item["id"]))
+                logger.info(f"✅ Komut #{item['id']} ({item['command']}) uygulandı")
+            except Exception as e:
+                self.finish(item["id"], error=str(e))
+                logger.error(f"❌ Komut #{item['id']} ({item['command']}) başarısız: {str(e)}")
+            processed += 1
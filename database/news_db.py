@@ -1,8 +1,13 @@
 """
 Haber Veritabanı Yöneticisi
 Finansal haberlerin saklanması ve geri çağrılması için SQL işlemlerini yönetir
+
+Haberler aylık bölümlerde (news_YYYYMM tabloları) tutulur. Eski haberlerin
+silinmesi satır satır DELETE yerine bütün bölümün DROP edilmesiyle yapılır ve
+dosya artımlı (incremental) auto-vacuum ile küçük tutulur.
 """
 
+import re
 import sqlite3
 from datetime import datetime, timedelta
 import os
@@ -11,10 +16,64 @@ from utils.logger import setup_logger
 
 logger = setup_logger("NewsDB")
 
+# Bölüm tabloları: news_202512, news_202601 ...
+PARTITION_PREFIX = "news_"
+PARTITION_GLOB = "news_[0-9][0-9][0-9][0-9][0-9][0-9]"
+NEWS_VIEW = "news"
+
+# Her bölümün id'leri YYYYMM * ID_BLOCK'tan başlar; böylece id'ler bölümler
+# arasında çakışmaz ve zamana göre sıralı kalır
+ID_BLOCK = 10_000_000
+
+NEWS_COLUMNS = (
+    "id", "title", "content", "source", "published_at", "created_at",
+    "sentiment_score", "impact_level", "symbols", "category", "url"
+)
+
+_MONTH_RE = re.compile(r"^(\d{4})-(\d{2})")
+
+
+def month_key(value=None):
+    """
+    Bir tarih değerinden bölüm anahtarını (YYYYMM) üretir
+
+    Argümanlar:
+        value: datetime, ISO tarih dizesi veya None (şimdiki ay)
+
+    Döner:
+        "202512" biçiminde dize
+    """
+    if value is None:
+        return datetime.now().strftime("%Y%m")
+    if isinstance(value, datetime):
+        return value.strftime("%Y%m")
+
+    match = _MONTH_RE.match(str(value).strip())
+    if match and 1 <= int(match.group(2)) <= 12:
+        return match.group(1) + match.group(2)
+
+    # Ayrıştırılamayan tarihler içinde bulunulan aya yazılır
+    return datetime.now().strftime("%Y%m")
+
+
+def split_statements(script):
+    """
+    SQL betiğini tek tek conn.execute ile çalıştırılabilecek ifadelere böler.
+    executescript açık işlemi commit ettiği için bölüm oluşturma bununla yapılır.
+    """
+    statements, buffer = [], ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        # Yorumlardaki ';' ifade sonu sayılmaz
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    return statements
+
 
 class NewsDatabase:
     """Haber veritabanı işlemlerini yönetir"""
-    
+
     def __init__(self, db_path=None):
         """
         Argümanlar:
@@ -22,59 +81,194 @@ class NewsDatabase:
         """
         if db_path is None:
             db_path = config.NEWS_DB_PATH
-        
+
         self.db_path = db_path
         self.ensure_db_exists()
-    
+
     def ensure_db_exists(self):
-        """Veritabanı ve tablolar mevcut değilse oluşturur"""
+        """Veritabanını, güncel ay bölümünü ve `news` görünümünü hazırlar"""
         # Gerekiyorsa dizini oluştur
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        # Şemayı oku
+
+        # Şemayı (bölüm şablonunu) oku
         schema_path = os.path.join(os.path.dirname(__file__), "schema.sql")
-        
+
         try:
             with open(schema_path, 'r', encoding='utf-8') as f:
-                schema = f.read()
-            
-            # Şemayı uygula
-            with sqlite3.connect(self.db_path) as conn:
-                conn.executescript(schema)
-            
-            logger.info(f"✅ Haber veritabanı {self.db_path} adresinde hazırlandı")
-        
+                self.partition_template = f.read()
         except FileNotFoundError:
-            logger.warning(f"⚠️ {schema_path} adresinde şema dosyası bulunamadı, temel tablo oluşturuluyor")
-            self.create_basic_schema()
-    
-    def create_basic_schema(self):
-        """Yedek: schema.sql bulunamazsa temel şemayı oluşturur"""
+            logger.warning(f"⚠️ {schema_path} adresinde şema dosyası bulunamadı, temel şablon kullanılıyor")
+            self.partition_template = None
+
+        self._enable_incremental_vacuum()
+
         with sqlite3.connect(self.db_path) as conn:
+            self._migrate_legacy_table(conn)
+            self._ensure_partition(conn, month_key())
+            # Kaynak bazlı yüksek su işaretleri (artımlı haber alımı için)
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS news (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    content TEXT,
-                    source TEXT NOT NULL,
-                    published_at DATETIME NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    sentiment_score INTEGER NOT NULL CHECK(sentiment_score BETWEEN -100 AND 100),
-                    impact_level TEXT NOT NULL CHECK(impact_level IN ('HIGH', 'MEDIUM', 'LOW')),
-                    symbols TEXT NOT NULL,
-                    category TEXT,
-                    url TEXT
+                CREATE TABLE IF NOT EXISTS ingest_state (
+                    source TEXT PRIMARY KEY,
+                    high_water TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_published ON news(published_at DESC)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_symbols ON news(symbols)")
             conn.commit()
-    
-    def add_news(self, title, source, published_at, sentiment_score, impact_level, symbols, 
+
+        logger.info(f"✅ Haber veritabanı {self.db_path} adresinde hazırlandı")
+
+    def create_basic_schema(self, conn, table):
+        """Yedek: schema.sql bulunamazsa bölüm tablosunu temel şemayla oluşturur"""
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                content TEXT,
+                source TEXT NOT NULL,
+                published_at DATETIME NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                sentiment_score INTEGER NOT NULL CHECK(sentiment_score BETWEEN -100 AND 100),
+                impact_level TEXT NOT NULL CHECK(impact_level IN ('HIGH', 'MEDIUM', 'LOW')),
+                symbols TEXT NOT NULL,
+                category TEXT,
+                url TEXT
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_published ON {table}(published_at DESC)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_symbols ON {table}(symbols)")
+
+    # ========================================
+    # BÖLÜM (PARTITION) YÖNETİMİ
+    # ========================================
+
+    def _enable_incremental_vacuum(self):
+        """
+        auto_vacuum kipini INCREMENTAL yapar. Var olan bir dosyada kip ancak
+        VACUUM ile değişir, bu yüzden bu tek seferlik bir işlemdir.
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                logger.info("🧹 Haber veritabanı artımlı auto-vacuum kipine alındı")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ auto_vacuum ayarlanamadı: {str(e)}")
+        finally:
+            conn.close()
+
+    def _partition_name(self, key):
+        return f"{PARTITION_PREFIX}{key}"
+
+    def _list_partitions(self, conn):
+        """Mevcut bölüm tablolarının adlarını eskiden yeniye sıralı döndürür"""
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name",
+            (PARTITION_GLOB,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def _ensure_partition(self, conn, key):
+        """
+        Verilen ay için bölüm tablosunu oluşturur (yoksa)
+
+        Döner:
+            Bölüm tablosunun adı
+        """
+        table = self._partition_name(key)
+        if self._table_exists(conn, table):
+            return table
+
+        if self.partition_template:
+            # executescript açık işlemi commit eder; taşıma gibi işlemlerin içinde de güvenli olsun
+            for statement in split_statements(self.partition_template.format(partition=table)):
+                conn.execute(statement)
+        else:
+            self.create_basic_schema(conn, table)
+
+        # id aralığını bölüme göre başlat (AUTOINCREMENT sayaç tablosu)
+        conn.execute(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT ?, ? "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)",
+            (table, int(key) * ID_BLOCK, table)
+        )
+        self._rebuild_view(conn)
+        logger.info(f"🗂️ Yeni haber bölümü oluşturuldu: {table}")
+        return table
+
+    def _rebuild_view(self, conn):
+        """Tüm bölümleri birleştiren `news` görünümünü yeniden oluşturur"""
+        conn.execute(f"DROP VIEW IF EXISTS {NEWS_VIEW}")
+        partitions = self._list_partitions(conn)
+        if not partitions:
+            return
+        cols = ", ".join(NEWS_COLUMNS)
+        union = " UNION ALL ".join(f"SELECT {cols} FROM {p}" for p in partitions)
+        conn.execute(f"CREATE VIEW {NEWS_VIEW} AS {union}")
+
+    def _table_exists(self, conn, name):
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+
+    def _migrate_legacy_table(self, conn):
+        """
+        Eski tek parça `news` tablosu varsa satırlarını aylık bölümlere taşır.
+        Yeniden adlandırma, bölüm oluşturma ve taşıma tek işlemdir: yarıda
+        kesilirse geri alınır ve sonraki açılışta baştan yapılır. Önceki sürümün
+        yarıda bıraktığı `news_legacy` tablosu varsa taşımaya oradan devam edilir;
+        bölümlere zaten geçmiş satırlar tekrar eklenmez.
+        """
+        legacy = self._table_exists(conn, NEWS_VIEW)
+        resume = self._table_exists(conn, "news_legacy")
+        if not legacy and not resume:
+            return
+
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Görünüm `news` adını kullanacağı için önce tabloyu kenara al
+            if not resume:
+                conn.execute("ALTER TABLE news RENAME TO news_legacy")
+
+            cols = ", ".join(c for c in NEWS_COLUMNS if c != "id")
+            # Devam ederken önceki denemede taşınmış satırları atla
+            skip_moved = (" AND NOT EXISTS (SELECT 1 FROM {table} p WHERE p.title = l.title "
+                          "AND p.published_at = l.published_at AND p.source = l.source)") if resume else ""
+            moved = 0
+            months = conn.execute("SELECT DISTINCT substr(published_at, 1, 7) FROM news_legacy").fetchall()
+            for (prefix,) in months:
+                table = self._ensure_partition(conn, month_key(prefix))
+                cursor = conn.execute(
+                    f"INSERT INTO {table} ({cols}) SELECT {cols} FROM news_legacy l "
+                    f"WHERE substr(published_at, 1, 7) IS ?{skip_moved.format(table=table)} ORDER BY id",
+                    (prefix,)
+                )
+                moved += cursor.rowcount
+
+            conn.execute("DROP TABLE news_legacy")
+            self._rebuild_view(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"📦 Eski haber tablosu bölümlere taşındı ({moved} kayıt{', yarım kalan taşıma sürdürüldü' if resume else ''})")
+
+    def _partitions_since(self, conn, since):
+        """`since` tarihini içeren aydan itibaren (o ay dahil) mevcut bölümler"""
+        start = month_key(since)
+        return [p for p in self._list_partitions(conn) if p[len(PARTITION_PREFIX):] >= start]
+
+    # ========================================
+    # OKUMA / YAZMA
+    # ========================================
+
+    def add_news(self, title, source, published_at, sentiment_score, impact_level, symbols,
                  content=None, category=None, url=None):
         """
-        Veritabanına haber makalesi ekler
-        
+        Veritabanına haber makalesi ekler (yayın tarihinin ayına ait bölüme)
+
         Argümanlar:
             title: Haber başlığı
             source: Haber kaynağı (örn. "Reuters")
@@ -85,60 +279,112 @@ class NewsDatabase:
             content: İsteğe bağlı tam içerik
             category: İsteğe bağlı kategori
             url: İsteğe bağlı URL
-            
+
         Döner:
             Eklenen haberin ID'si
         """
         with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                INSERT INTO news (title, content, source, published_at, sentiment_score, 
+            table = self._ensure_partition(conn, month_key(published_at))
+            cursor = conn.execute(f"""
+                INSERT INTO {table} (title, content, source, published_at, sentiment_score,
                                  impact_level, symbols, category, url)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (title, content, source, published_at, sentiment_score, impact_level, 
+            """, (title, content, source, published_at, sentiment_score, impact_level,
                  symbols, category, url))
-            
+
             conn.commit()
             return cursor.lastrowid
-    
+
+    def add_news_batch(self, items):
+        """
+        Birden fazla haberi tek bir işlemde (transaction) ekler
+
+        Argümanlar:
+            items: add_news argümanlarıyla aynı anahtarlara sahip sözlükler listesi
+
+        Döner:
+            Eklenen haber sayısı
+        """
+        if not items:
+            return 0
+
+        # Haberleri bölümlerine göre grupla, her bölüm için tek executemany
+        groups = {}
+        for item in items:
+            groups.setdefault(month_key(item.get("published_at")), []).append((
+                item["title"], item.get("content"), item["source"], item["published_at"],
+                item["sentiment_score"], item["impact_level"], item["symbols"],
+                item.get("category"), item.get("url")
+            ))
+
+        with sqlite3.connect(self.db_path) as conn:
+            tables = {key: self._ensure_partition(conn, key) for key in groups}
+            for key, rows in groups.items():
+                conn.executemany(f"""
+                    INSERT INTO {tables[key]} (title, content, source, published_at, sentiment_score,
+                                     impact_level, symbols, category, url)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+            conn.commit()
+
+        return sum(len(rows) for rows in groups.values())
+
+    def get_high_water(self, source):
+        """Kaynak için en son alınan haberin zaman damgasını döndürür (yoksa None)"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT high_water FROM ingest_state WHERE source = ?", (source,)).fetchone()
+            return row[0] if row else None
+
+    def set_high_water(self, source, high_water):
+        """Kaynağın yüksek su işaretini günceller"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO ingest_state (source, high_water, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET high_water = excluded.high_water,
+                                                  updated_at = excluded.updated_at
+            """, (source, high_water, datetime.now().isoformat()))
+            conn.commit()
+
     def get_recent_news(self, symbol=None, hours_lookback=24, min_impact=None):
         """
-        Yakın zamandaki haber makalelerini getirir
-        
+        Yakın zamandaki haber makalelerini getirir.
+        Sadece geriye bakış aralığına düşen bölümler sorgulanır (genelde yalnızca bu ay).
+
         Argümanlar:
             symbol: Sembole göre filtreleme (örn. "EURUSD"), hepsi için None
             hours_lookback: Kaç saat geriye bakılacak
             min_impact: Minimum etki seviyeleri, örn. ["HIGH", "MEDIUM"]
-            
+
         Döner:
             Sözlükler listesi olarak haber makaleleri
         """
         cutoff_time = datetime.now() - timedelta(hours=hours_lookback)
-        
-        query = """
-            SELECT id, title, content, source, published_at, sentiment_score, 
-                   impact_level, symbols, category, url
-            FROM news
-            WHERE published_at >= ?
-        """
+
+        where = "WHERE published_at >= ?"
         params = [cutoff_time.isoformat()]
-        
+
         # Sembole göre filtrele
         if symbol:
-            query += " AND symbols LIKE ?"
+            where += " AND symbols LIKE ?"
             params.append(f"%{symbol}%")
-        
+
         # Etki seviyesine göre filtrele
         if min_impact:
             placeholders = ','.join(['?' for _ in min_impact])
-            query += f" AND impact_level IN ({placeholders})"
+            where += f" AND impact_level IN ({placeholders})"
             params.extend(min_impact)
-        
-        query += " ORDER BY published_at DESC"
-        
+
         with sqlite3.connect(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.execute(query, params)
-            
+            partitions = self._partitions_since(conn, cutoff_time)
+            if not partitions:
+                return []
+
+            cols = ", ".join(c for c in NEWS_COLUMNS if c != "created_at")
+            query = " UNION ALL ".join(f"SELECT {cols} FROM {p} {where}" for p in partitions)
+            query += " ORDER BY published_at DESC"
+            cursor = conn.execute(query, params * len(partitions))
+
             news_list = []
             for row in cursor.fetchall():
                 news_list.append({
@@ -153,45 +399,90 @@ class NewsDatabase:
                     "category": row["category"],
                     "url": row["url"]
                 })
-            
+
             return news_list
-    
+
+    def get_news_after_ids(self, last_ids, hours_lookback=24):
+        """
+        Her bölümde verilen id'den sonra eklenen haberleri getirir (artımlı okuma)
+
+        Argümanlar:
+            last_ids: Bölüm tablosu adı -> en son okunan id sözlüğü
+            hours_lookback: Sadece bu aralığa düşen bölümler okunur
+
+        Döner:
+            (bölüm adı, id sırasına göre haber sözlükleri listesi) çiftleri
+        """
+        cutoff_time = datetime.now() - timedelta(hours=hours_lookback)
+        results = []
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            for table in self._partitions_since(conn, cutoff_time):
+                rows = conn.execute(f"""
+                    SELECT id, title, source, published_at, sentiment_score, impact_level, symbols
+                    FROM {table}
+                    WHERE id > ?
+                    ORDER BY id
+                """, (last_ids.get(table, 0),)).fetchall()
+                if rows:
+                    results.append((table, [dict(r) for r in rows]))
+
+        return results
+
     def get_aggregated_sentiment(self, symbol, hours_lookback=24):
         """
         Bir sembol için toplu duygu analizini hesaplar
-        
+
         Argümanlar:
             symbol: Ticari varlık
             hours_lookback: Geriye dönük bakılacak saat
-            
+
         Döner:
             Ortalama duygu ve haber sayısını içeren sözlük
         """
         news_list = self.get_recent_news(symbol, hours_lookback, min_impact=["HIGH", "MEDIUM"])
-        
+
         if not news_list:
             return {
                 "average_sentiment": 0,
                 "news_count": 0,
                 "high_impact_count": 0
             }
-        
+
         total_sentiment = sum(n["sentiment_score"] for n in news_list)
         avg_sentiment = total_sentiment / len(news_list)
         high_impact = sum(1 for n in news_list if n["impact_level"] == "HIGH")
-        
+
         return {
             "average_sentiment": round(avg_sentiment, 1),
             "news_count": len(news_list),
             "high_impact_count": high_impact
         }
-    
+
     def clear_old_news(self, days_old=30):
-        """Belirtilen günden eski haberleri siler"""
-        cutoff = datetime.now() - timedelta(days=days_old)
-        
+        """
+        Belirtilen günden eski haberleri siler.
+        Tamamı kesim tarihinden önce kalan aylık bölümler DROP edilir (ay
+        hassasiyetinde saklama), ardından boşalan sayfalar artımlı vacuum ile
+        dosyaya geri kazandırılır.
+        """
+        cutoff_key = month_key(datetime.now() - timedelta(days=days_old))
+
         with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("DELETE FROM news WHERE published_at < ?", (cutoff.isoformat(),))
+            dropped = 0
+            for table in self._list_partitions(conn):
+                # Kesim ayından önceki bir ayın tüm kayıtları kesimden eskidir
+                if table[len(PARTITION_PREFIX):] < cutoff_key:
+                    conn.execute(f"DROP TABLE {table}")
+                    conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+                    dropped += 1
+
+            if dropped:
+                self._rebuild_view(conn)
             conn.commit()
-            
-            logger.info(f"🗑️ {cursor.rowcount} adet eski haber makalesi silindi")
+
+            # incremental_vacuum her adımda bir sayfa boşaltır; executescript sonuna kadar yürütür
+            conn.executescript("PRAGMA incremental_vacuum;")
+
+            logger.info(f"🗑️ {dropped} adet eski haber bölümü silindi")
@@ -1,35 +1,43 @@
 -- News Database Schema for Sniper Trading Bot
 -- Stores pre-scored financial news for Stage 2 filtering
+--
+-- Storage is partitioned by month: every partition is a table named
+-- news_YYYYMM created from the template below ({partition} is substituted
+-- by NewsDatabase). A read-only view called `news` (UNION ALL of all
+-- partitions) is rebuilt whenever a partition is created or dropped, so
+-- ad-hoc queries against `news` keep working. Retention drops whole
+-- partitions and the file is kept compact with incremental auto-vacuum.
 
-CREATE TABLE IF NOT EXISTS news (
+CREATE TABLE IF NOT EXISTS {partition} (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     title TEXT NOT NULL,
     content TEXT,
     source TEXT NOT NULL,
     published_at DATETIME NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    
+
     -- Financial impact scoring
     sentiment_score INTEGER NOT NULL CHECK(sentiment_score BETWEEN -100 AND 100),
     -- -100 = very bearish, 0 = neutral, +100 = very bullish
-    
+
     impact_level TEXT NOT NULL CHECK(impact_level IN ('HIGH', 'MEDIUM', 'LOW')),
-    
+
     -- Symbol relevance
     symbols TEXT NOT NULL, -- Comma-separated list, e.g., "EURUSD,GBPUSD"
-    
+
     -- Optional fields
     category TEXT, -- e.g., "Central Bank", "Economic Data", "Geopolitical"
     url TEXT
 );
 
--- Indexing for fast queries
-CREATE INDEX IF NOT EXISTS idx_published ON news(published_at DESC);
-CREATE INDEX IF NOT EXISTS idx_symbols ON news(symbols);
-CREATE INDEX IF NOT EXISTS idx_impact ON news(impact_level);
+-- Indexing for fast queries (per partition)
+CREATE INDEX IF NOT EXISTS idx_{partition}_published ON {partition}(published_at DESC);
+CREATE INDEX IF NOT EXISTS idx_{partition}_symbols ON {partition}(symbols);
+CREATE INDEX IF NOT EXISTS idx_{partition}_impact ON {partition}(impact_level);
 
--- Example data insertion queries (for reference):
--- INSERT INTO news (title, content, source, published_at, sentiment_score, impact_level, symbols, category)
+-- Example data insertion queries (for reference, NewsDatabase.add_news picks
+-- the partition from published_at):
+-- INSERT INTO news_202512 (title, content, source, published_at, sentiment_score, impact_level, symbols, category)
 -- VALUES (
 --     'ECB Raises Interest Rates by 50 Basis Points',
 --     'European Central Bank announces aggressive rate hike...',
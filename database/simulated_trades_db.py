@@ -0,0 +1,224 @@
+"""
+Simüle İşlem Deposu
+DRY_RUN / öneri modunda açılan sanal işlemleri SQLite'ta tutar. Eskiden her
+açma/kapama/fiyat güncellemesi data/simulated_trades.json'ı baştan okuyup
+yeniden yazıyordu; burada açma tek INSERT, kapama tek koşullu UPDATE'tir ve
+açık pozisyonlar yalnızca OPEN satırları içeren kısmi indeksten okunur.
+
+Eski JSON dosyası varsa ilk açılışta bir kez içe aktarılır ve .migrated
+uzantısıyla yeniden adlandırılır.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("SimTradesDB")
+
+LEGACY_JSON_PATH = os.path.join('data', 'simulated_trades.json')
+
+TRADE_COLUMNS = (
+    "id", "symbol", "direction", "lot", "entry_price", "stop_loss", "take_profit",
+    "leverage", "margin_required", "notional_usd", "opened_at", "status",
+    "current_price", "unrealized_usd", "unrealized_pct", "realized_usd",
+    "closed_at", "close_price"
+)
+
+
+class SimulatedTradeStore:
+    """Simüle işlemlerin işlemsel (transactional) deposu"""
+
+    def __init__(self, db_path=None, legacy_json_path=LEGACY_JSON_PATH):
+        """
+        Argümanlar:
+            db_path: SQLite veritabanı dosyasının yolu (varsayılanı config'den alır)
+            legacy_json_path: İlk açılışta içe aktarılacak eski simulated_trades.json
+        """
+        self.db_path = db_path or getattr(config, 'SIM_TRADES_DB_PATH', './database/simulated_trades.db')
+        self.legacy_json_path = legacy_json_path
+        self.ensure_db_exists()
+
+    def _connect(self):
+        # Ana döngü, dashboard ve broker aynı dosyayı açabilir: kilitte bekle
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def ensure_db_exists(self):
+        """Tabloyu, açık işlem indeksini oluşturur ve eski JSON'ı içe aktarır"""
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            # Okuyucular (dashboard, broker) yazarı beklemesin
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS simulated_trades (
+                    id TEXT PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    direction TEXT NOT NULL,
+                    lot REAL,
+                    entry_price REAL,
+                    stop_loss REAL,
+                    take_profit REAL,
+                    leverage REAL,
+                    margin_required REAL,
+                    notional_usd REAL,
+                    opened_at TEXT,
+                    status TEXT NOT NULL DEFAULT 'OPEN',  -- 'OPEN', 'CLOSED'
+                    current_price REAL,
+                    unrealized_usd REAL DEFAULT 0,
+                    unrealized_pct REAL DEFAULT 0,
+                    realized_usd REAL DEFAULT 0,
+                    closed_at TEXT,
+                    close_price REAL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_sim_trades_open
+                ON simulated_trades (symbol)
+                WHERE status = 'OPEN'
+            """)
+            conn.commit()
+            self._import_legacy_json(conn)
+
+    def _import_legacy_json(self, conn):
+        """Eski simulated_trades.json'ı (varsa ve tablo boşsa) bir kez içe aktarır"""
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+        if conn.execute("SELECT 1 FROM simulated_trades LIMIT 1").fetchone() is not None:
+            return
+        try:
+            with open(self.legacy_json_path, 'r', encoding='utf-8') as f:
+                trades = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ {self.legacy_json_path} okunamadı, içe aktarılmadı: {str(e)}")
+            return
+
+        rows = [self._row(t) for t in trades if isinstance(t, dict) and t.get('symbol')]
+        conn.executemany(self._insert_sql("INSERT OR IGNORE"), rows)
+        conn.commit()
+        os.replace(self.legacy_json_path, self.legacy_json_path + ".migrated")
+        logger.info(f"📦 {len(rows)} simüle işlem {self.legacy_json_path} dosyasından içe aktarıldı")
+
+    @staticmethod
+    def _insert_sql(verb="INSERT"):
+        return (f"{verb} INTO simulated_trades ({', '.join(TRADE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in TRADE_COLUMNS)})")
+
+    @staticmethod
+    def _row(trade):
+        values = dict(trade)
+        values.setdefault('id', f"sim-{int(datetime.now().timestamp() * 1000)}")
+        values.setdefault('status', 'OPEN')
+        return tuple(values.get(column) for column in TRADE_COLUMNS)
+
+    # ========================================
+    # YAZMA
+    # ========================================
+
+    def add(self, trade):
+        """Yeni simüle işlemi ekler (tek INSERT)"""
+        with self._connect() as conn:
+            conn.execute(self._insert_sql(), self._row(trade))
+            conn.commit()
+
+    def close(self, trade_id, close_price, realized_usd, closed_at=None):
+        """
+        Açık işlemi kapatır. Koşullu UPDATE olduğu için aynı işlemi iki yazarın
+        aynı anda kapatması tek kapanış üretir.
+
+        Döner:
+            İşlem bu çağrıyla kapandıysa True
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE simulated_trades
+                SET status = 'CLOSED', closed_at = ?, close_price = ?, realized_usd = ?,
+                    unrealized_usd = 0.0, unrealized_pct = 0.0
+                WHERE id = ? AND status = 'OPEN'
+            """, (closed_at or datetime.now().isoformat(), close_price, realized_usd, trade_id))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def update_marks(self, marks):
+        """
+        Açık işlemlerin güncel fiyat ve gerçekleşmemiş K/Z alanlarını tek
+        transaction'da yazar
+
+        Argümanlar:
+            marks: [{"id", "current_price", "notional_usd", "unrealized_usd", "unrealized_pct"}, ...]
+        """
+        if not marks:
+            return 0
+        with self._connect() as conn:
+            conn.executemany("""
+                UPDATE simulated_trades
+                SET current_price = :current_price, notional_usd = :notional_usd,
+                    unrealized_usd = :unrealized_usd, unrealized_pct = :unrealized_pct
+                WHERE id = :id AND status = 'OPEN'
+            """, marks)
+            conn.commit()
+        return len(marks)
+
+    # ========================================
+    # OKUMA
+    # ========================================
+
+    def open_trades(self, symbol=None, trade_id=None):
+        """Açık işlemler (kısmi OPEN indeksinden), isteğe bağlı sembol/id filtresiyle"""
+        sql = "SELECT * FROM simulated_trades WHERE status = 'OPEN'"
+        params = []
+        if symbol is not None:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        if trade_id is not None:
+            sql += " AND id = ?"
+            params.append(trade_id)
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(sql + " ORDER BY opened_at", params)]
+
+    def get(self, trade_id):
+        """Tek işlem (durumundan bağımsız) veya None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM simulated_trades WHERE id = ?", (trade_id,)).fetchone()
+        return dict(row) if row else None
+
+    def all_trades(self):
+        """Tüm simüle işlemler (açılış sırasıyla)"""
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute("SELECT * FROM simulated_trades ORDER BY opened_at")]
+
+    def closed_totals(self):
+        """Kapanmış işlem sayısı ve gerçekleşmiş K/Z toplamı"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) AS count_closed, COALESCE(SUM(realized_usd), 0) AS total_realized_usd
+                FROM simulated_trades
+                WHERE status = 'CLOSED'
+            """).fetchone()
+        return dict(row)
+
+    def summary(self):
+        """Açık/kapalı işlem sayıları ve K/Z toplamları (tek sorgu)"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT
+                    COALESCE(SUM(status = 'OPEN'), 0) AS count_open,
+                    COALESCE(SUM(status = 'CLOSED'), 0) AS count_closed,
+                    COALESCE(SUM(CASE WHEN status = 'OPEN' THEN unrealized_usd END), 0) AS total_unrealized_usd,
+                    COALESCE(SUM(CASE WHEN status = 'OPEN' THEN notional_usd END), 0) AS total_notional_usd,
+                    COALESCE(SUM(CASE WHEN status = 'CLOSED' THEN realized_usd END), 0) AS total_realized_usd
+                FROM simulated_trades
+            """).fetchone()
+        total_unreal, total_notional = row["total_unrealized_usd"], row["total_notional_usd"]
+        pct = (total_unreal / total_notional * 100) if total_notional else 0.0
+        return {
+            'count_open': row["count_open"],
+            'count_closed': row["count_closed"],
+            'total_unrealized_usd': round(total_unreal, 2),
+            'total_notional_usd': round(total_notional, 2),
+            'total_realized_usd': round(row["total_realized_usd"], 2),
+            'total_unrealized_pct': round(pct, 4)
+        }
@@ -0,0 +1,109 @@
+"""
+Değişiklik Algılama Kapısı (1-2. Aşama -> 3. Aşama)
+Sakin piyasada yeni mum veya haber gelmeden her pass aynı sembolleri tekrar
+LLM'e sorar. Kapı, her sembolün son 3. aşama analizindeki 1. ve 2. aşama
+imzasını (yön, skor kovası, RSI kovası, trend üçlüsü, duygu kovası, olay kümesi)
+saklar; imza değişmediyse ve en fazla bayatlık süresi dolmadıysa 3. aşama atlanır.
+"""
+
+import time
+import config
+from llm.decision_cache import _bucket
+from utils.logger import setup_logger
+
+logger = setup_logger("ChangeGate")
+
+
+class ChangeGate:
+    """Sembol başına son 3. aşama imzasını tutan kapı"""
+
+    def __init__(self, max_staleness=None, score_bucket=None, rsi_bucket=None, sentiment_bucket=None):
+        """
+        Argümanlar:
+            max_staleness: İmza değişmese de 3. aşamanın yeniden çalışacağı süre (saniye)
+            score_bucket: Teknik skor kovası genişliği (puan)
+            rsi_bucket: RSI kovası genişliği (puan)
+            sentiment_bucket: Haber duygu skoru kovası genişliği (puan)
+        """
+        self.max_staleness = max_staleness or getattr(config, 'CHANGE_GATE_MAX_STALENESS_SECONDS', 1800)
+        self.score_bucket = score_bucket or getattr(config, 'CHANGE_GATE_SCORE_BUCKET', 10)
+        self.rsi_bucket = rsi_bucket or getattr(config, 'CHANGE_GATE_RSI_BUCKET', 5)
+        self.sentiment_bucket = sentiment_bucket or getattr(config, 'CHANGE_GATE_SENTIMENT_BUCKET', 10)
+
+        # sembol -> {"signature", "ran_at", "decision", "confidence", "skip_reported"}
+        self.state = {}
+        self.skipped = 0
+        self.passed = 0
+
+    def signature(self, context):
+        """3. aşama bağlamından nicemlenmiş 1-2. aşama imzasını üretir"""
+        technical = context.get("technical_signals") or {}
+        events = context.get("upcoming_events") or []
+        return (
+            context.get("direction"),
+            _bucket(context.get("technical_score"), self.score_bucket),
+            _bucket(technical.get("rsi"), self.rsi_bucket),
+            (technical.get("trend_h1"), technical.get("trend_h4"), technical.get("trend_d1")),
+            _bucket(context.get("news_sentiment"), self.sentiment_bucket),
+            frozenset((e.get("title"), e.get("date")) for e in events)
+        )
+
+    def check(self, symbol, signature):
+        """
+        3. aşamanın çalışıp çalışmayacağına karar verir
+
+        Döner:
+            (çalışsın mı, neden)
+        """
+        last = self.state.get(symbol)
+        if last is None:
+            reason = "ilk analiz"
+        elif last["signature"] != signature:
+            reason = "imza değişti"
+        elif time.time() - last["ran_at"] >= self.max_staleness:
+            reason = "en fazla bayatlık süresi doldu"
+        else:
+            self.skipped += 1
+            return False, "değişiklik yok"
+
+        self.passed += 1
+        return True, reason
+
+    def record(self, symbol, signature, stage3_result):
+        """3. aşama gerçekten çalıştıktan sonra imzayı ve kararı saklar"""
+        if signature is None:
+            return
+        self.state[symbol] = {
+            "signature": signature,
+            "ran_at": time.time(),
+            "decision": stage3_result.get("decision"),
+            "confidence": stage3_result.get("confidence", 0),
+            "skip_reported": False
+        }
+
+    def skip_record(self, symbol, current_price):
+        """
+        Dashboard için "atlandı: değişiklik yok" kaydı. Aynı durağan dönem için
+        yalnızca bir kez döner (sonuç listesi her pass'te aynı kayıtla dolmasın).
+
+        Döner:
+            Web kaydı sözlüğü veya bu dönem zaten bildirildiyse None
+        """
+        last = self.state.get(symbol)
+        if last is None or last["skip_reported"]:
+            return None
+        last["skip_reported"] = True
+
+        age_minutes = (time.time() - last["ran_at"]) / 60
+        return {
+            "decision": "ATLANDI (DEĞİŞİKLİK YOK)",
+            "skipped": "unchanged",
+            "confidence": last["confidence"],
+            "reasoning": (f"1. ve 2. aşama verileri son LLM analizinden ({age_minutes:.0f} dk önce) beri "
+                          f"değişmedi; son karar: {last['decision']}. En geç "
+                          f"{self.max_staleness / 60:.0f} dk içinde yeniden analiz edilecek."),
+            "entry_price": float(current_price or 0),
+            "stop_loss": None,
+            "take_profit": None,
+            "rr_ratio": None
+        }
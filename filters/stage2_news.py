@@ -1,11 +1,12 @@
 """
 2. Aşama: Haber Duygu Filtresi
-GPU kullanımı gerektirmeyen hızlı SQL tabanlı haber çekme
+GPU kullanımı gerektirmeyen hızlı, bellek içi sönümlenen duygu endeksi
 Hedef: İşlem yönünü temel verilerle doğrulamak
 """
 
 import config
 from database.news_db import NewsDatabase
+from utils.sentiment_index import DecayingSentimentIndex
 from utils.logger import setup_logger, log_trade_decision
 
 logger = setup_logger("NewsFilter")
@@ -14,12 +15,20 @@ logger = setup_logger("NewsFilter")
 class NewsFilter:
     """
     Haber duygu analizi ve filtreleme
-    GPU gerektirmez, sadece SQL sorguları kullanır
+    GPU gerektirmez; duygu skoru sembol bazlı sönümlenen endeksten sabit zamanda okunur
     """
     
     def __init__(self):
         self.db = NewsDatabase()
         self.logger = logger
+        
+        # Anlık görüntüden sıcak başla, ardından eksik haberleri veritabanından tamamla
+        self.sentiment_index = DecayingSentimentIndex()
+        self.sentiment_index.load_snapshot()
+        try:
+            self.sentiment_index.refresh(self.db)
+        except Exception as e:
+            logger.warning(f"⚠️ Duygu endeksi ilk yüklemesi başarısız: {str(e)}")
     
     def check_sentiment(self, symbol, direction, hours_lookback=None):
         """
@@ -37,15 +46,12 @@ class NewsFilter:
             hours_lookback = config.NEWS_LOOKBACK_HOURS
         
         try:
-            # Toplam duygu verisini al
-            sentiment_data = self.db.get_aggregated_sentiment(symbol, hours_lookback)
+            # Son çağrıdan beri eklenen haberleri endekse işle (sadece yeni satırlar okunur)
+            self.sentiment_index.refresh(self.db, hours_lookback)
             
-            # İlgili haber makalelerini al
-            relevant_news = self.db.get_recent_news(
-                symbol=symbol,
-                hours_lookback=hours_lookback,
-                min_impact=config.NEWS_IMPACT_LEVELS
-            )
+            # Sönümlenmiş duygu özetini al (sabit zaman)
+            sentiment_data = self.sentiment_index.get(symbol)
+            relevant_news = sentiment_data["recent_news"]
             
             avg_sentiment = sentiment_data["average_sentiment"]
             news_count = sentiment_data["news_count"]
@@ -55,8 +61,8 @@ class NewsFilter:
             # KARAR MANTIĞI
             # ========================================
             
-            # Haber yoksa, tarafsız geçiş (işlemi engellemez)
-            if news_count == 0:
+            # Etkin haber ağırlığı ihmal edilebilir düzeydeyse, tarafsız geçiş (işlemi engellemez)
+            if sentiment_data["weight"] < getattr(config, 'SENTIMENT_MIN_WEIGHT', 0.05):
                 result = {
                     "pass": True,
                     "sentiment_score": 0,
@@ -104,16 +110,7 @@ class NewsFilter:
             result = {
                 "pass": passed,
                 "sentiment_score": avg_sentiment,
-                "relevant_news": [
-                    {
-                        "title": n["title"],
-                        "source": n["source"],
-                        "sentiment": n["sentiment_score"],
-                        "impact": n["impact_level"],
-                        "published_at": n["published_at"]
-                    }
-                    for n in relevant_news[:5]  # En yeni 5 haber
-                ],
+                "relevant_news": relevant_news[:5],  # En yeni 5 haber
                 "news_count": news_count,
                 "high_impact_count": high_impact_count,
                 "reason": reason
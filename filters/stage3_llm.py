@@ -4,14 +4,75 @@ Yapay zeka ile teknik ve temel verilerin harmanlanması
 Hatalarından ders çıkaran öğrenme sistemi entegreli
 """
 
+import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import config
+from llm.dispatcher import backend_limit, backend_name
 from llm.ollama_client import OllamaClient
-from llm.prompts import get_system_prompt, build_decision_prompt, validate_llm_response
+from llm.prompts import (
+    get_system_prompt, build_decision_prompt, validate_llm_response,
+    build_decision_prefix, build_decision_suffix,
+    get_batch_system_prompt, build_batch_decision_prompt, validate_batch_response,
+    BATCH_DECISION_SCHEMA
+)
+from llm.decision_cache import DecisionCache, context_fingerprint
+from llm.rate_limiter import QuotaDeferred
 from utils.logger import setup_logger, log_trade_decision
 
 logger = setup_logger("LLMDecision")
 
 
+def aggregate_samples(samples, min_agreement=None):
+    """
+    Öz-tutarlılık örneklerini oylar: karar çoğunluk oyuyla seçilir (eşitlikte
+    ortalama güveni yüksek olan), güven = çoğunluğun ortalama güveni; MIN_CONFIDENCE
+    kapısı bu değere uygulanır. Oy oranı ayrı bir kapıdır: min_agreement'ın
+    altındaysa (ör. 3 örnekte 1/3, 2 örnekte 1/2 eşitlik) karar BEKLEMEDE KAL olur.
+    Giriş/SL/TP çoğunluk örneklerinin medyanıdır.
+    
+    Argümanlar:
+        samples: validate_llm_response çıktılarının listesi (boş olmamalı)
+        min_agreement: Gereken en düşük oy oranı (varsayılanı config.LLM_CONSISTENCY_MIN_AGREEMENT)
+        
+    Döner:
+        Birleştirilmiş karar sözlüğü
+    """
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample.get("decision", "PASS"), []).append(sample)
+    
+    def _mean_confidence(group):
+        return statistics.mean(s.get("confidence", 0) or 0 for s in group)
+    
+    decision, group = max(groups.items(), key=lambda kv: (len(kv[1]), _mean_confidence(kv[1])))
+    agreement = len(group) / len(samples)
+    
+    result = dict(max(group, key=lambda s: s.get("confidence", 0) or 0))
+    result["decision"] = decision
+    result["confidence"] = int(round(_mean_confidence(group)))
+    for field in ("entry_price", "stop_loss", "take_profit"):
+        values = [s.get(field) for s in group if isinstance(s.get(field), (int, float)) and s.get(field)]
+        if values:
+            result[field] = statistics.median(values)
+    result["reasoning"] = f"[Öz-tutarlılık {len(group)}/{len(samples)}] " + str(result.get("reasoning") or "")
+    result["consistency"] = {"votes": dict(Counter(s.get("decision", "PASS") for s in samples)),
+                             "samples": len(samples),
+                             "majority": decision,
+                             "agreement": round(agreement, 2)}
+    
+    if min_agreement is None:
+        min_agreement = getattr(config, 'LLM_CONSISTENCY_MIN_AGREEMENT', 0.6)
+    if agreement < min_agreement:
+        # Örnekler uyuşmuyor: güven yüksek olsa da işlem önerilmez
+        result["decision"] = "BEKLEMEDE KAL"
+        result["reasoning"] = f"Örnekler uyuşmadı ({len(group)}/{len(samples)} {decision}). " + result["reasoning"]
+        result["entry_price"] = "BEKLEMEDE"
+        result["stop_loss"] = "BEKLEMEDE"
+        result["take_profit"] = "BEKLEMEDE"
+    return result
+
+
 class LLMDecisionEngine:
     """
     LLM karar verme sistemi - RAG devre dışı, Öğrenme Sistemi aktif.
@@ -27,14 +88,16 @@ class LLMDecisionEngine:
         logger.info("🔧 LLM Karar Motoru Başlatılıyor...")
         
         # Yapılandırmaya göre LLM istemcisini başlat
-        if config.USE_GEMINI_API:
-            from llm.gemini_client import GeminiClient
-            self.llm = GeminiClient(model_name=config.GEMINI_MODEL)
-            logger.info("✅ Gemini API kullanılıyor (bulut tabanlı)")
-        else:
-            from llm.ollama_client import OllamaClient
-            self.llm = OllamaClient(model_name=model_name)
-            logger.info("✅ Ollama kullanılıyor (yerel)")
+        self.llm = self._create_client(config.USE_GEMINI_API, model_name)
+        
+        # Yedekli istek: birincil yavaşsa/kota doluysa diğer arka uç da denenir
+        if getattr(config, 'LLM_HEDGING', False):
+            try:
+                secondary = self._create_client(not config.USE_GEMINI_API, model_name)
+                from llm.hedging import HedgedLLM
+                self.llm = HedgedLLM(self.llm, secondary)
+            except Exception as e:
+                logger.warning(f"⚠️ İkincil LLM başlatılamadı, yedekli istek kapalı: {str(e)}")
         
         # RAG artık bu projenin konusu değil - Tamamen devre dışı
         self.vector_store = None
@@ -46,14 +109,18 @@ class LLMDecisionEngine:
         from utils.learning_system import TradePerformanceTracker
         self.learning_system = TradePerformanceTracker()
         
+        # Değişmeyen bağlamlar için önceki kararı yeniden kullan (kota ve gecikme tasarrufu)
+        self.decision_cache = DecisionCache() if getattr(config, 'ENABLE_LLM_CACHE', True) else None
+        
         logger.info("✅ LLM Karar Motoru 'Hatalardan Öğrenme' yeteneğiyle başlatıldı")
     
-    def make_decision(self, context):
+    def make_decision(self, context, use_cache=True):
         """
         Öğrenilmiş desenler ve LLM kullanarak nihai ticaret kararını verir
         
         Argümanlar:
             context: Teknik sinyaller, haberler ve güncel fiyatı içeren sözlük
+            use_cache: False ise önbellek atlanır (ör. düşük güven yeniden denemeleri)
                 
         Döner:
             Karar, güven seviyesi ve giriş/SL/TP fiyatlarını içeren sözlük
@@ -65,14 +132,22 @@ class LLMDecisionEngine:
             # ÖĞRENME: Geçmiş başarı/hata desenlerini al
             # ========================================
             
-            learned_patterns = None
-            try:
-                # Son 30 gündeki başarılı ve başarısız işlemleri analiz et
-                learned_patterns = self.learning_system.get_learned_patterns(days_back=30)
-                if learned_patterns:
-                    logger.debug(f"🧠 {len(learned_patterns)} öğrenilmiş desen karar sürecine ekleniyor")
-            except Exception as e:
-                logger.warning(f"Öğrenilmiş desenler yüklenemedi: {str(e)}")
+            learned_patterns = self._load_learned_patterns()
+            
+            # ========================================
+            # ÖNBELLEK: Nicemlenmiş bağlam değişmediyse önceki kararı kullan
+            # ========================================
+            
+            cache_key = None
+            if self.decision_cache is not None:
+                cache_key = context_fingerprint(context, learned_patterns)
+                if use_cache:
+                    cached = self.decision_cache.get(cache_key)
+                    if cached is not None:
+                        logger.info(f"♻️ {symbol} - Bağlam değişmedi, önbellekteki karar kullanılıyor "
+                                    f"(isabet {self.decision_cache.hits}/{self.decision_cache.hits + self.decision_cache.misses})")
+                        cached["cache_hit"] = True
+                        return cached
             
             # ========================================
             # LLM: Tek seferlik analiz (ana döngü pass'lerinde kullanılacak)
@@ -81,14 +156,16 @@ class LLMDecisionEngine:
             # ========================================
 
             system_prompt = get_system_prompt()
-            user_prompt = build_decision_prompt(context, [], learned_patterns)
+            user_prompt, prefix = self._decision_prompt(context, learned_patterns)
 
             logger.debug(f"🤖 Karar için LLM ({self.llm.model_name}) çağrılıyor...")
 
             response_text = self.llm.generate(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
-                temperature=config.LLM_TEMPERATURE
+                temperature=config.LLM_TEMPERATURE,
+                priority=context.get("technical_score") or 0,
+                prefix=prefix
             )
 
             logger.info("=" * 30 + " HAM LLM YANITI " + "=" * 30)
@@ -120,28 +197,9 @@ class LLMDecisionEngine:
                     "risk_reward_ratio": 0
                 }
 
-            # Eğer güven düşükse, BEKLEMEDE KAL olarak işaretle (gösterim için)
-            if decision_data.get("confidence", 0) < config.MIN_CONFIDENCE:
-                logger.info(f"⚠️ Güven %{decision_data.get('confidence')}, eşiğin (%{config.MIN_CONFIDENCE}) altında")
-                decision_data["decision"] = "BEKLEMEDE KAL"
-                current_reason = decision_data.get("reasoning") or ""
-                decision_data["reasoning"] = f"Güven seviyesi (%{decision_data.get('confidence',0)}) çok düşük. " + current_reason
-                decision_data["entry_price"] = "BEKLEMEDE"
-                decision_data["stop_loss"] = "BEKLEMEDE"
-                decision_data["take_profit"] = "BEKLEMEDE"
-
-            # Not: log_trade_decision artık main.py'de merkezi olarak yapılıyor.
-            # Böylece mükerrer (duplicate) kayıtların önüne geçiliyor.
-
-            # Kısa bekleme yok; ana döngü pass'leri arasında bekleme uygulanacak
-            result_for_log = {
-                "pass": decision_data.get("decision") != "PASS",
-                "confidence": decision_data.get("confidence", 0),
-                "reason": decision_data.get("reasoning", "")
-            }
-            log_trade_decision(logger, symbol, 3, result_for_log)
-
-            return decision_data
+            return self._finalize_decision(symbol, decision_data, cache_key)
+        except QuotaDeferred as e:
+            return self._deferred_decision(symbol, e)
         except Exception as e:
             logger.error(f"❌ LLM karar motorunda hata: {str(e)}")
             return {
@@ -154,6 +212,246 @@ class LLMDecisionEngine:
                 "risk_reward_ratio": 0
             }
 
+    def make_decision_consistent(self, context, samples=None):
+        """
+        Öz-tutarlılık (self-consistency) modu: aynı bağlam için N örneği farklı
+        sıcaklıklarla ister ve aggregate_samples ile oylar. Örnekler arka ucun
+        eşzamanlılık sınırı kadar paralel çalışır (LLM_BACKEND_CONCURRENCY; ör.
+        Gemini'de eşzamanlı, GPU'ya bağlı Ollama'da sırayla); her istek ayrıca
+        istemcideki süreç geneli arka uç semaforuna tabidir.
+        
+        Argümanlar:
+            context: make_decision'a verilen bağlam
+            samples: Örnek sayısı (varsayılanı config'den alır)
+            
+        Döner:
+            Birleştirilmiş karar sözlüğü
+        """
+        symbol = context.get("symbol", "BİLİNMİYOR")
+        samples = max(1, samples or getattr(config, 'LLM_CONSISTENCY_SAMPLES', 3))
+        temperatures = getattr(config, 'LLM_CONSISTENCY_TEMPERATURES', [0.0, 0.4, 0.8])
+        
+        learned_patterns = self._load_learned_patterns()
+        cache_key = context_fingerprint(context, learned_patterns) if self.decision_cache is not None else None
+        system_prompt = get_system_prompt()
+        user_prompt, prefix = self._decision_prompt(context, learned_patterns)
+        
+        def _sample(i):
+            response_text = self.llm.generate(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=temperatures[i % len(temperatures)],
+                priority=context.get("technical_score") or 0,
+                prefix=prefix
+            )
+            return validate_llm_response(response_text) if response_text else None
+        
+        logger.info(f"🎲 {symbol} - {samples} örnekle öz-tutarlılık analizi başlatılıyor...")
+        workers = min(samples, backend_limit(backend_name(self.llm)) or samples)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="llm-sample") as pool:
+            futures = [pool.submit(_sample, i) for i in range(samples)]
+        
+        valid = []
+        deferred = None
+        for future in futures:
+            try:
+                decision_data = future.result()
+            except QuotaDeferred as e:
+                deferred = e
+                continue
+            except Exception as e:
+                logger.warning(f"⚠️ {symbol} - Öz-tutarlılık örneği başarısız: {str(e)}")
+                continue
+            if decision_data:
+                valid.append(decision_data)
+        
+        if not valid:
+            if deferred is not None:
+                return self._deferred_decision(symbol, deferred)
+            logger.error(f"❌ {symbol} - Öz-tutarlılık: geçerli örnek yok")
+            return {
+                "decision": "PASS",
+                "confidence": 0,
+                "reasoning": "Öz-tutarlılık örneklerinin hiçbiri geçerli değil",
+                "entry_price": 0,
+                "stop_loss": 0,
+                "take_profit": 0,
+                "risk_reward_ratio": 0
+            }
+        
+        decision_data = aggregate_samples(valid)
+        logger.info(f"🗳️ {symbol} - Oylar: {decision_data['consistency']['votes']} -> "
+                    f"{decision_data['decision']} (%{decision_data['confidence']})")
+        return self._finalize_decision(symbol, decision_data, cache_key)
+
+    def make_decisions_batch(self, contexts, fallback=True):
+        """
+        Birden fazla sembol için kararları tek LLM isteğinde toplu olarak alır.
+        Önbellekte geçerli kararı olan semboller isteğe eklenmez; toplu yanıtta
+        eksik veya bozuk çıkan semboller için tekli make_decision'a geri düşülür.
+        
+        Argümanlar:
+            contexts: make_decision'a verilen bağlam sözlüklerinin listesi
+            fallback: False ise geçerli kararı olmayan semboller sonuca eklenmez;
+                tekli istekleri çağıran yapar (ör. LLM dağıtıcısında eşzamanlı)
+            
+        Döner:
+            Sembol -> karar sözlüğü
+        """
+        results = {}
+        learned_patterns = self._load_learned_patterns()
+        
+        # Önce önbellek: sadece kaçıranlar LLM'e gider
+        pending = []
+        for context in contexts:
+            symbol = context.get("symbol", "BİLİNMİYOR")
+            cache_key = None
+            if self.decision_cache is not None:
+                cache_key = context_fingerprint(context, learned_patterns)
+                cached = self.decision_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"♻️ {symbol} - Bağlam değişmedi, önbellekteki karar kullanılıyor")
+                    cached["cache_hit"] = True
+                    results[symbol] = cached
+                    continue
+            pending.append((context, cache_key))
+        
+        batch_size = max(1, getattr(config, 'LLM_BATCH_SIZE', 5))
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            symbols = [c.get("symbol", "BİLİNMİYOR") for c, _ in chunk]
+            
+            decisions = {}
+            if len(chunk) > 1:
+                try:
+                    decisions = self._request_batch([c for c, _ in chunk], learned_patterns)
+                except QuotaDeferred as e:
+                    # Kota yokken tek tek denemek de ertelenir; hepsini birden ertele
+                    for symbol in symbols:
+                        results[symbol] = self._deferred_decision(symbol, e)
+                    continue
+                except Exception as e:
+                    logger.error(f"❌ Toplu LLM isteği başarısız: {str(e)}")
+            
+            for (context, cache_key), symbol in zip(chunk, symbols):
+                decision_data = decisions.get(symbol)
+                if decision_data is None:
+                    if not fallback:
+                        continue
+                    if len(chunk) > 1:
+                        logger.warning(f"⚠️ {symbol} - Toplu yanıtta geçerli karar yok, tekli istek yapılıyor")
+                    # Önbellek zaten yukarıda kontrol edildi
+                    results[symbol] = self.make_decision(context, use_cache=False)
+                else:
+                    results[symbol] = self._finalize_decision(symbol, decision_data, cache_key)
+        
+        return results
+
+    def _request_batch(self, contexts, learned_patterns):
+        """Tek toplu LLM isteği gönderir ve yanıtı sembollere eşler"""
+        symbols = [c.get("symbol", "BİLİNMİYOR") for c in contexts]
+        logger.debug(f"🤖 {len(symbols)} sembol için toplu LLM ({self.llm.model_name}) çağrılıyor: {', '.join(symbols)}")
+        
+        response_text = self.llm.generate(
+            prompt=build_batch_decision_prompt(contexts, learned_patterns),
+            system_prompt=get_batch_system_prompt(),
+            temperature=config.LLM_TEMPERATURE,
+            # Her sembol kendi karar nesnesini yazar
+            max_tokens=config.LLM_MAX_TOKENS * len(contexts),
+            response_schema=BATCH_DECISION_SCHEMA,
+            priority=max(c.get("technical_score") or 0 for c in contexts)
+        )
+        
+        logger.info("=" * 27 + " HAM TOPLU LLM YANITI " + "=" * 27)
+        logger.info(response_text if response_text else "BOŞ YANIT")
+        logger.info("=" * 78)
+        
+        return validate_batch_response(response_text, symbols)
+
+    def _deferred_decision(self, symbol, error):
+        """Kota dolduğunda beklemeden dönen 'ertelendi' kararı (önbelleğe yazılmaz)"""
+        logger.warning(f"⏳ {symbol} - LLM kararı ertelendi: {str(error)}")
+        return {
+            "decision": "PASS",
+            "confidence": 0,
+            "reasoning": f"Kota dolu, karar ertelendi: {str(error)}",
+            "entry_price": 0,
+            "stop_loss": 0,
+            "take_profit": 0,
+            "risk_reward_ratio": 0,
+            "deferred": True
+        }
+
+    @staticmethod
+    def _create_client(use_gemini, model_name=None):
+        """Seçilen arka uç için LLM istemcisini oluşturur"""
+        if use_gemini and getattr(config, 'LLM_OFFLINE_GEMINI', False):
+            from llm.stub_server import OfflineGeminiClient
+            logger.info("🧪 Çevrimdışı Gemini stub'ı kullanılıyor (yük testi)")
+            return OfflineGeminiClient()
+        if use_gemini:
+            from llm.gemini_client import GeminiClient
+            client = GeminiClient(model_name=config.GEMINI_MODEL)
+            logger.info("✅ Gemini API kullanılıyor (bulut tabanlı)")
+            return client
+        from llm.ollama_client import OllamaClient
+        client = OllamaClient(model_name=model_name)
+        logger.info("✅ Ollama kullanılıyor (yerel)")
+        return client
+    
+    def _decision_prompt(self, context, learned_patterns):
+        """
+        Tekli karar komutunu döndürür. Önek önbelleği açıksa komut sabit önek
+        (sistem hafızası + talimatlar) ve sembole özgü son ek olarak ayrılır;
+        istemci öneki önbellekten kullanır.
+        
+        Döner:
+            (komut, önek veya None)
+        """
+        if getattr(config, 'LLM_PREFIX_CACHE', True):
+            return build_decision_suffix(context), build_decision_prefix(learned_patterns)
+        return build_decision_prompt(context, [], learned_patterns), None
+    
+    def _load_learned_patterns(self):
+        """Son 30 gündeki başarılı ve başarısız işlemlerden öğrenilen desenleri getirir"""
+        try:
+            learned_patterns = self.learning_system.get_learned_patterns(days_back=30)
+            if learned_patterns:
+                logger.debug(f"🧠 {len(learned_patterns)} öğrenilmiş desen karar sürecine ekleniyor")
+            return learned_patterns
+        except Exception as e:
+            logger.warning(f"Öğrenilmiş desenler yüklenemedi: {str(e)}")
+            return None
+
+    def _finalize_decision(self, symbol, decision_data, cache_key):
+        """Doğrulanmış kararı işaretler, günlükler ve önbelleğe yazar"""
+        # Eğer güven düşükse, BEKLEMEDE KAL olarak işaretle (gösterim için)
+        if decision_data.get("confidence", 0) < config.MIN_CONFIDENCE:
+            logger.info(f"⚠️ Güven %{decision_data.get('confidence')}, eşiğin (%{config.MIN_CONFIDENCE}) altında")
+            decision_data["decision"] = "BEKLEMEDE KAL"
+            current_reason = decision_data.get("reasoning") or ""
+            decision_data["reasoning"] = f"Güven seviyesi (%{decision_data.get('confidence',0)}) çok düşük. " + current_reason
+            decision_data["entry_price"] = "BEKLEMEDE"
+            decision_data["stop_loss"] = "BEKLEMEDE"
+            decision_data["take_profit"] = "BEKLEMEDE"
+
+        # Not: log_trade_decision artık main.py'de merkezi olarak yapılıyor.
+        # Böylece mükerrer (duplicate) kayıtların önüne geçiliyor.
+
+        # Kısa bekleme yok; ana döngü pass'leri arasında bekleme uygulanacak
+        result_for_log = {
+            "pass": decision_data.get("decision") != "PASS",
+            "confidence": decision_data.get("confidence", 0),
+            "reason": decision_data.get("reasoning", "")
+        }
+        log_trade_decision(logger, symbol, 3, result_for_log)
+
+        # Sadece geçerli yanıtlar önbelleğe alınır
+        if cache_key is not None:
+            self.decision_cache.put(cache_key, decision_data)
+
+        return decision_data
+
     def self_assess(self, context):
         """
         Eğer LLM sürekli 0 güven döndürüyorsa, LLM kendi başına kapsamlı bir analiz yapar.
@@ -0,0 +1,154 @@
+"""
+LLM Karar Önbelleği
+Pass'ler arasında bağlam (teknik sinyaller, haber duygusu, olaylar, fiyat) pek
+değişmez. Prompt girdilerinin nicemlenmiş (quantized) parmak izine göre önceki
+kararı yeniden kullanarak istek kotasını ve gecikmeyi korur.
+TTL, LRU tahliyesi ve diskte kalıcılık içerir.
+"""
+
+import copy
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("DecisionCache")
+
+
+def _bucket(value, size):
+    """Sayısal değeri `size` genişliğinde kovaya yuvarlar (değer yoksa None)"""
+    try:
+        return int(math.floor(float(value) / size))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _price_bucket(price, pct):
+    """Fiyatı sabit göreli genişlikte (yüzde `pct`) logaritmik kovaya yerleştirir"""
+    try:
+        price = float(price)
+        if price <= 0:
+            return None
+        return int(math.floor(math.log(price) / math.log1p(pct / 100.0)))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def context_fingerprint(context, learned_patterns=None, price_bucket_pct=None, rsi_bucket=None):
+    """
+    Karar bağlamının nicemlenmiş parmak izini üretir
+
+    Argümanlar:
+        context: make_decision'a verilen bağlam sözlüğü
+        learned_patterns: Prompt'a eklenen öğrenilmiş desenler
+        price_bucket_pct: Fiyat kovası genişliği (yüzde)
+        rsi_bucket: RSI kovası genişliği (puan)
+
+    Döner:
+        Hex SHA-1 anahtarı
+    """
+    if price_bucket_pct is None:
+        price_bucket_pct = getattr(config, 'LLM_CACHE_PRICE_BUCKET_PCT', 0.05)
+    if rsi_bucket is None:
+        rsi_bucket = getattr(config, 'LLM_CACHE_RSI_BUCKET', 5)
+
+    technical = context.get("technical_signals") or {}
+    macd = technical.get("macd_signal") or {}
+    volume = technical.get("volume") or {}
+
+    key = {
+        "symbol": context.get("symbol"),
+        "direction": context.get("direction"),
+        "price": _price_bucket(context.get("current_price"), price_bucket_pct),
+        "rsi": _bucket(technical.get("rsi"), rsi_bucket),
+        "technical_score": _bucket(context.get("technical_score"), 10),
+        "trends": [technical.get("trend_h1"), technical.get("trend_h4"), technical.get("trend_d1")],
+        "macd": macd.get("signal") if isinstance(macd, dict) else macd,
+        "volume": volume.get("signal") if isinstance(volume, dict) else volume,
+        "news_sentiment": _bucket(context.get("news_sentiment"), 10),
+        # Prompt'a sadece ilk 3 haber ve olay giriyor
+        "news": [n.get("title") for n in (context.get("relevant_news") or [])[:3]],
+        "events": [(e.get("title"), e.get("date")) for e in (context.get("upcoming_events") or [])[:3]],
+        "patterns": learned_patterns or []
+    }
+    raw = json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """TTL + LRU karar önbelleği, JSON dosyasında kalıcı"""
+
+    def __init__(self, path=None, ttl_seconds=None, max_entries=None):
+        """
+        Argümanlar:
+            path: Önbellek dosyası (varsayılanı config'den alır)
+            ttl_seconds: Bir kararın geçerlilik süresi
+            max_entries: En fazla tutulacak karar sayısı (LRU)
+        """
+        self.path = path or getattr(config, 'LLM_CACHE_PATH', './data/llm_decision_cache.json')
+        self.ttl = ttl_seconds if ttl_seconds is not None else getattr(config, 'LLM_CACHE_TTL_SECONDS', 900)
+        self.max_entries = max_entries or getattr(config, 'LLM_CACHE_MAX_ENTRIES', 256)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Kararlar LLM dağıtıcısının iş parçacıklarından da okunur/yazılır
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, key):
+        """Geçerli bir kayıt varsa kararın kopyasını döndürür, yoksa None"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry["stored_at"] > self.ttl:
+                del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry["decision"])
+
+    def put(self, key, decision):
+        """Kararı önbelleğe yazar ve dosyaya kaydeder"""
+        with self._lock:
+            self.entries[key] = {"stored_at": time.time(), "decision": copy.deepcopy(decision)}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"⚠️ Karar önbelleği okunamadı: {str(e)}")
+            return
+
+        now = time.time()
+        # Dosyada LRU sırasıyla (eskiden yeniye) tutulur
+        for key, entry in data.get("entries", []):
+            if now - entry.get("stored_at", 0) <= self.ttl:
+                self.entries[key] = entry
+        if self.entries:
+            logger.info(f"✅ Karar önbelleği yüklendi ({len(self.entries)} kayıt)")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"entries": list(self.entries.items())}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Karar önbelleği kaydedilemedi: {str(e)}")
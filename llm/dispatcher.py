@@ -0,0 +1,204 @@
+"""
+LLM Karar Dağıtıcısı
+3. aşama çağrıları bloklayıcıdır (bir Ollama isteği 180 saniyeye kadar sürebilir).
+Dağıtıcı kararları arka plan iş parçacıklarında çalıştırır: toplamda en fazla K iş,
+arka uç başına ayrı eşzamanlılık sınırı (GPU'ya bağlı Ollama / API'ye bağlı Gemini)
+ve bekleyen işler arasında teknik skora göre öncelik. Böylece bir sembolün LLM
+gecikmesi diğer sembollerin 1. ve 2. aşamasını bekletmez.
+
+Aynı sınırlar istemci düzeyinde de süreç genelindeki semaforlarla uygulanır
+(backend_slot): yedekli istemcinin ikincil istekleri, öz-tutarlılık örnekleri ve
+dağıtıcı dışındaki çağrılar da arka ucun eşzamanlı istek sınırına tabidir.
+"""
+
+import contextlib
+import itertools
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("LLMDispatcher")
+
+DEFAULT_BACKEND_LIMITS = {"ollama": 1, "gemini": 4}
+
+_backend_slots = {}
+_backend_slots_lock = threading.Lock()
+
+
+def backend_name(llm):
+    """LLM istemcisinin arka uç adını döndürür ('gemini' veya 'ollama')"""
+    # Yedekli istemcide sınır birincil arka uca göre uygulanır
+    llm = getattr(llm, "primary", llm)
+    return "gemini" if type(llm).__name__.endswith("GeminiClient") else "ollama"
+
+
+def backend_limit(backend):
+    """Arka ucun eşzamanlı istek sınırı (LLM_BACKEND_CONCURRENCY; tanımsızsa None)"""
+    return getattr(config, 'LLM_BACKEND_CONCURRENCY', DEFAULT_BACKEND_LIMITS).get(backend)
+
+
+def backend_slot(backend):
+    """
+    Arka ucun süreç genelinde paylaşılan istek semaforu. İstemciler her HTTP/API
+    isteğini bu bağlamda yapar; sınır tanımsızsa etkisiz bağlam döner.
+
+    Kullanım:
+        with backend_slot("ollama"):
+            ...istek...
+    """
+    limit = backend_limit(backend)
+    if limit is None:
+        return contextlib.nullcontext()
+    with _backend_slots_lock:
+        if backend not in _backend_slots:
+            _backend_slots[backend] = threading.BoundedSemaphore(max(1, int(limit)))
+        return _backend_slots[backend]
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "backend", "fn", "args", "future")
+
+    def __init__(self, priority, seq, backend, fn, args):
+        self.priority = priority
+        self.seq = seq
+        self.backend = backend
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+
+
+class LLMDispatcher:
+    """Öncelikli, sınırlı eşzamanlı LLM iş kuyruğu"""
+
+    def __init__(self, engine, max_workers=None, backend_limits=None):
+        """
+        Argümanlar:
+            engine: LLMDecisionEngine örneği
+            max_workers: Toplam eşzamanlı iş sayısı (varsayılanı config'den alır)
+            backend_limits: Arka uç -> eşzamanlı istek sınırı (varsayılanı config'den alır)
+        """
+        self.engine = engine
+        self.max_workers = max(1, max_workers or getattr(config, 'LLM_DISPATCH_WORKERS', 3))
+        self.backend_limits = backend_limits or getattr(
+            config, 'LLM_BACKEND_CONCURRENCY', DEFAULT_BACKEND_LIMITS
+        )
+        self.in_flight = defaultdict(int)
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._run, name=f"llm-dispatch-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        logger.info(f"✅ LLM dağıtıcısı başlatıldı ({self.max_workers} iş parçacığı, sınırlar: {self.backend_limits})")
+
+    def submit_decision(self, context, priority=None):
+        """
+        Bir sembolün 3. aşama kararını kuyruğa ekler
+
+        Argümanlar:
+            context: make_decision'a verilecek bağlam
+            priority: Büyük olan önce çalışır (varsayılan: teknik skor)
+
+        Döner:
+            Sonucu karar sözlüğü olan Future
+        """
+        if priority is None:
+            priority = context.get("technical_score") or 0
+        return self.submit(self.engine.make_decision, context, priority=priority)
+
+    def submit(self, fn, *args, priority=0, backend=None):
+        """
+        Herhangi bir LLM işini kuyruğa ekler
+
+        Argümanlar:
+            fn: Çalıştırılacak fonksiyon
+            priority: Büyük olan önce çalışır
+            backend: Sınırın uygulanacağı arka uç (varsayılan: motorun istemcisi)
+
+        Döner:
+            Future (dağıtıcı durdurulduysa iptal edilmiş olarak döner)
+        """
+        job = _Job(priority, next(self._seq), backend or backend_name(self.engine.llm), fn, args)
+        with self._cond:
+            if self._stopped:
+                job.future.cancel()
+                return job.future
+            self._queue.append(job)
+            self._cond.notify()
+        return job.future
+
+    def _take_ready_job(self):
+        """Kapasitesi olan arka uçlar arasından en yüksek öncelikli işi seçer (kilit altında)"""
+        best = None
+        for job in self._queue:
+            limit = self.backend_limits.get(job.backend)
+            if limit is not None and self.in_flight[job.backend] >= limit:
+                continue
+            # Eşit öncelikte önce gelen önce çalışır
+            if best is None or (job.priority, -job.seq) > (best.priority, -best.seq):
+                best = job
+        if best is not None:
+            self._queue.remove(best)
+            self.in_flight[best.backend] += 1
+        return best
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopped:
+                    job = self._take_ready_job()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if job is None:
+                    return
+
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn(*job.args))
+                    except Exception as e:
+                        job.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self.in_flight[job.backend] -= 1
+                    # Arka uç kapasitesi boşaldı, bekleyen işçiler yeniden baksın
+                    self._cond.notify_all()
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._queue)
+
+    def shutdown(self, wait=False, timeout=None):
+        """
+        Dağıtıcıyı durdurur ve kuyruktaki işleri iptal eder. Çalışmakta olan
+        HTTP istekleri kesilemez; iş parçacıkları daemon olduğundan süreç
+        çıkışını engellemezler.
+
+        Argümanlar:
+            wait: True ise çalışan işlerin bitmesi beklenir
+            timeout: İş parçacığı başına en fazla bekleme süresi
+        """
+        with self._cond:
+            self._stopped = True
+            cancelled = 0
+            for job in self._queue:
+                if job.future.cancel():
+                    cancelled += 1
+            self._queue.clear()
+            running = sum(self.in_flight.values())
+            self._cond.notify_all()
+
+        if cancelled or running:
+            logger.info(f"🛑 LLM dağıtıcısı durduruldu ({cancelled} bekleyen iş iptal edildi, {running} iş çalışıyordu)")
+        if wait:
+            for worker in self._workers:
+                worker.join(timeout)
@@ -6,9 +6,15 @@ Hızlı, güvenilir ve ücretsiz kota mevcuttur
 
 import os
 import json
+import hashlib
+import threading
+import time
 import config
 from google import genai
-from google.genai.types import GenerateContentConfig
+from google.genai.types import GenerateContentConfig, CreateCachedContentConfig
+from llm.dispatcher import backend_slot
+from llm.prompts import DECISION_SCHEMA
+from llm.rate_limiter import RequestScheduler, QuotaDeferred
 from utils.logger import setup_logger
 
 logger = setup_logger("GeminiClient")
@@ -40,75 +46,139 @@ class GeminiClient:
         # İstemciyi başlat
         self.client = genai.Client(api_key=self.api_key)
         
+        # İstemci tarafı kota takibi (dakikalık + günlük)
+        self.scheduler = RequestScheduler()
+        
+        # Önek önbelleği: sistem komutu + sabit önek için Gemini bağlam önbelleği
+        self._prefix_key = None
+        self._prefix_cache_name = None
+        self._prefix_expires = 0.0
+        self._prefix_lock = threading.Lock()
+        
         logger.info(f"✅ Gemini API '{self.model_name}' modeli ile başlatıldı")
     
-    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None):
+    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None, response_schema=None, priority=0, prefix=None):
         """
         Gemini'den yanıt üret
+        
+        Argümanlar:
+            response_schema: JSON çıktı şeması (varsayılan: tekli karar şeması)
+            priority: Kota sırasındaki öncelik (büyük olan önce)
+            prefix: Komutun sabit öneki. Bağlam önbelleği varsa yalnızca `prompt`
+                gönderilir; yoksa önek komutun başına eklenir.
+        
+        Raises:
+            QuotaDeferred: Kota dolu; çağıran taraf kararı ertelemeli
         """
+        # Kota yoksa beklemeden ertele (döngü dakikalarca uyumasın)
+        self.scheduler.acquire(priority)
+        
+        cache_name = self._cached_prefix(prefix, system_prompt) if prefix else None
+        if prefix and not cache_name:
+            prompt = prefix + "\n\n" + prompt
+        
         try:
-            # JSON için katı şema tanımla - ÖNCE KRİTİK ALANLAR
-            response_schema = {
-                "type": "OBJECT",
-                "properties": {
-                    "karar": {"type": "STRING", "description": "Karar: AL, SAT veya BEKLE"},
-                    "guven": {"type": "INTEGER", "description": "Güven 0-100"},
-                    "giris_fiyati": {"type": "NUMBER"},
-                    "zarar_kes": {"type": "NUMBER"},
-                    "kar_al": {"type": "NUMBER"},
-                    "risk_skoru": {"type": "INTEGER", "description": "Risk skoru 0-100"},
-                    "risk_odul_orani": {"type": "NUMBER"},
-                    "analiz_vadesi": {"type": "STRING", "description": "Analiz vadesi (H1, H4 vb.)"},
-                    "beklenen_sure": {"type": "STRING", "description": "Beklenen süre"},
-                    "neden": {"type": "STRING", "description": "Türkçe detaylı açıklama"}
-                },
-                "required": ["karar", "guven", "giris_fiyati", "zarar_kes", "kar_al", "risk_skoru", "risk_odul_orani", "analiz_vadesi", "beklenen_sure", "neden"]
-            }
-
             config_gen = GenerateContentConfig(
                 temperature=temperature if temperature is not None else config.LLM_TEMPERATURE,
                 top_p=getattr(config, "LLM_TOP_P", 0.1),
                 max_output_tokens=max_tokens if max_tokens is not None else config.LLM_MAX_TOKENS,
                 response_mime_type="application/json",
-                response_schema=response_schema,
-                system_instruction=system_prompt if system_prompt else None
+                response_schema=response_schema or DECISION_SCHEMA,
+                # Önbellek kullanılıyorsa sistem komutu önbellekte
+                system_instruction=system_prompt if system_prompt and not cache_name else None,
+                cached_content=cache_name
             )
             
-            # Basit tekrar deneme ile içerik üret
-            max_retries = 2
-            for attempt in range(max_retries + 1):
-                try:
+            try:
+                # Süreç genelindeki Gemini eşzamanlılık sınırı (dağıtıcı, yedek istek, örnekler)
+                with backend_slot("gemini"):
                     response = self.client.models.generate_content(
                         model=self.model_name,
                         contents=prompt,
                         config=config_gen
                     )
-                    
-                    if response:
-                        # HATA AYIKLAMA: Meta verileri günlükle
-                        if hasattr(response, 'candidates') and response.candidates:
-                            reason = response.candidates[0].finish_reason
-                            if reason != "STOP":
-                                logger.warning(f"⚠️ Gemini Bitiş Nedeni: {reason}")
-                        
-                        if response.text:
-                            return response.text
-                    
-                    logger.error("❌ Gemini boş yanıt döndürdü")
-                    return None
-                        
-                except Exception as e:
-                    if "429" in str(e) and attempt < max_retries:
-                        logger.warning(f"⚠️ Gemini İstek Sınırı (429). 60 saniye içinde tekrar deneniyor...")
-                        import time
-                        time.sleep(60)
-                        continue
-                    else:
-                        raise e
+            except Exception as e:
+                if "429" in str(e):
+                    # Sunucu tarafı sınır: uyumak yerine kovayı boşalt ve ertele
+                    self.scheduler.penalize()
+                    logger.warning("⚠️ Gemini İstek Sınırı (429). Sonraki istekler ertelenecek.")
+                    raise QuotaDeferred("Gemini 429 döndürdü")
+                if cache_name:
+                    # Önbellek süresi dolmuş/silinmiş olabilir: sonraki istekte yeniden oluştur
+                    self.invalidate_prefix_cache()
+                raise
+            
+            if response:
+                # HATA AYIKLAMA: Meta verileri günlükle
+                if hasattr(response, 'candidates') and response.candidates:
+                    reason = response.candidates[0].finish_reason
+                    if reason != "STOP":
+                        logger.warning(f"⚠️ Gemini Bitiş Nedeni: {reason}")
+                
+                if response.text:
+                    return response.text
+            
+            logger.error("❌ Gemini boş yanıt döndürdü")
+            return None
+        except QuotaDeferred:
+            raise
         except Exception as e:
             logger.error(f"❌ Gemini Seçim Hatası: {str(e)}")
             return None
     
+    def _cached_prefix(self, prefix, system_prompt):
+        """
+        Sistem komutu + önek için Gemini bağlam önbelleğinin adını döndürür.
+        Önek değiştiğinde (ör. öğrenilmiş desenler güncellendi) eski önbellek
+        silinip yenisi oluşturulur. Önek modelin minimum önbellek boyutunun
+        altındaysa oluşturma başarısız olur; bu durumda aynı önek için tekrar
+        denenmez ve tam komut gönderilir (Gemini'nin örtük önbelleği yine de
+        ortak öneki yakalayabilir).
+        
+        Döner:
+            Önbellek adı veya None
+        """
+        if not getattr(config, 'LLM_PREFIX_CACHE', True):
+            return None
+        
+        key = hashlib.sha256(f"{system_prompt or ''}\x00{prefix}".encode('utf-8')).hexdigest()
+        with self._prefix_lock:
+            if key == self._prefix_key and time.time() < self._prefix_expires:
+                return self._prefix_cache_name
+            
+            old_name = self._prefix_cache_name
+            ttl = getattr(config, 'GEMINI_CACHE_TTL_SECONDS', 3600)
+            name = None
+            try:
+                cache = self.client.caches.create(
+                    model=self.model_name,
+                    config=CreateCachedContentConfig(
+                        system_instruction=system_prompt if system_prompt else None,
+                        contents=[prefix],
+                        ttl=f"{ttl}s"
+                    )
+                )
+                name = cache.name
+                logger.info(f"🧩 Komut öneki Gemini önbelleğine alındı ({name})")
+            except Exception as e:
+                logger.warning(f"⚠️ Gemini önek önbelleği oluşturulamadı, tam komut gönderilecek: {str(e)}")
+            
+            if old_name:
+                try:
+                    self.client.caches.delete(name=old_name)
+                except Exception:
+                    pass
+            
+            # Süre dolmadan biraz önce yenile
+            self._prefix_key, self._prefix_cache_name = key, name
+            self._prefix_expires = time.time() + max(60, ttl - 60)
+            return name
+    
+    def invalidate_prefix_cache(self):
+        """Önek önbelleğini unutur; sonraki istek öneki yeniden önbelleğe alır"""
+        with self._prefix_lock:
+            self._prefix_key, self._prefix_cache_name = None, None
+    
     def generate_json(self, prompt, system_prompt=None):
         """
         JSON yanıt üret (zaten Gemini yapılandırmasıyla garanti edilir)
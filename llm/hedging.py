@@ -0,0 +1,209 @@
+"""
+Yedekli (Hedged) LLM İstemcisi
+İsteği önce birincil arka uca gönderir; birincilin geçmiş gecikmelerinin belirli
+bir yüzdeliği içinde geçerli yanıt gelmezse (veya birincil hata/kota ile dönerse)
+aynı isteği ikincil arka uca da gönderir. Şemaya uygun ilk yanıt kazanır, diğeri
+iptal edilir (Ollama akışı kapatılır; Gemini çağrısının sonucu yok sayılır).
+Kazanan arka uç ve gecikme dashboard için kaydedilir.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import config
+from llm.dispatcher import backend_name
+from llm.json_extractor import extract_objects, score_candidate
+from llm.prompts import DECISION_SCHEMA
+from llm.rate_limiter import QuotaDeferred
+from utils.logger import setup_logger
+
+logger = setup_logger("HedgedLLM")
+
+# Geçerlilik için aranan zorunlu alan sayısı (şemada kritik alanlar önde)
+CRITICAL_FIELD_COUNT = 5
+
+
+def is_valid_response(text, response_schema=None):
+    """Yanıtta şemanın kritik zorunlu alanlarını içeren bir JSON nesnesi var mı"""
+    if not text:
+        return False
+    required = (response_schema or DECISION_SCHEMA).get("required", [])[:CRITICAL_FIELD_COUNT]
+    return any(score_candidate(obj, required)[0] == len(required) for obj in extract_objects(text))
+
+
+class HedgedLLM:
+    """İki LLM istemcisini tek istemci arayüzüyle sunan yedekli istemci"""
+
+    def __init__(self, primary, secondary, percentile=None, default_delay=None, metrics_path=None):
+        """
+        Argümanlar:
+            primary: Önce denenen istemci
+            secondary: Gecikme eşiği aşılınca veya birincil başarısız olunca denenen istemci
+            percentile: Yedek isteğin tetiklendiği birincil gecikme yüzdeliği (varsayılanı config'den alır)
+            default_delay: Yeterli gecikme örneği yokken kullanılan eşik (saniye)
+            metrics_path: Kazanan/gecikme metriklerinin yazıldığı dosya
+        """
+        self.primary = primary
+        self.secondary = secondary
+        self.model_name = f"{primary.model_name} | {secondary.model_name}"
+        self.percentile = percentile or getattr(config, 'LLM_HEDGE_PERCENTILE', 90)
+        self.default_delay = default_delay or getattr(config, 'LLM_HEDGE_DEFAULT_DELAY_SECONDS', 8)
+        self.metrics_path = metrics_path or getattr(config, 'LLM_HEDGE_METRICS_PATH', './data/llm_hedge_metrics.json')
+
+        self._latencies = deque(maxlen=getattr(config, 'LLM_HEDGE_WINDOW', 100))
+        self._pool = ThreadPoolExecutor(
+            max_workers=2 * max(1, getattr(config, 'LLM_DISPATCH_WORKERS', 3)) + 2,
+            thread_name_prefix="llm-hedge"
+        )
+        self.metrics = {
+            "primary": backend_name(primary),
+            "secondary": backend_name(secondary),
+            "requests": 0,
+            "hedges_fired": 0,
+            "wins": {"primary": 0, "secondary": 0},
+            "failures": 0,
+            "hedge_delay_seconds": None,
+            "last_winner": None,
+            "last_latency_seconds": None
+        }
+        self._lock = threading.Lock()
+
+        logger.info(f"🪢 Yedekli LLM: birincil {self.metrics['primary']}, ikincil {self.metrics['secondary']} "
+                    f"(p{self.percentile} gecikmede yedek istek)")
+
+    def hedge_delay(self):
+        """Birincilin son gecikmelerinin yüzdeliği; az örnek varsa varsayılan eşik"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < 10:
+            return self.default_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+
+    def _call(self, client, cancel_event, args, kwargs):
+        # Arka uç sınırı istemci isteğinde (backend_slot) uygulanır: yedek havuzundan
+        # giden ikincil istekler de o arka ucun eşzamanlılık sınırına sayılır
+        if backend_name(client) == "ollama":
+            kwargs = dict(kwargs, cancel_event=cancel_event)
+        started = time.monotonic()
+        text = client.generate(*args, **kwargs)
+        latency = time.monotonic() - started
+        if client is self.primary and text:
+            # Kaybetse de kaydedilir; yalnızca kazananları saymak eşiği yapay olarak düşürürdü
+            with self._lock:
+                self._latencies.append(latency)
+        return text, latency
+
+    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None, response_schema=None, priority=0, prefix=None):
+        """
+        İstemci arayüzüyle aynı; şemaya uygun ilk yanıtı döndürür
+
+        Raises:
+            QuotaDeferred: Geçerli yanıt yok ve en az bir arka uç kota nedeniyle erteledi
+        """
+        args = (prompt,)
+        kwargs = {"system_prompt": system_prompt, "temperature": temperature, "max_tokens": max_tokens,
+                  "response_schema": response_schema, "priority": priority, "prefix": prefix}
+        cancel_event = threading.Event()
+        started = time.monotonic()
+        delay = self.hedge_delay()
+
+        futures = {self._pool.submit(self._call, self.primary, cancel_event, args, kwargs): "primary"}
+        hedged = False
+        fallback_text = None
+        deferred = None
+
+        try:
+            while futures:
+                timeout = None if hedged else max(0.0, delay - (time.monotonic() - started))
+                done, _ = wait(list(futures), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    role = futures.pop(future)
+                    try:
+                        text, _ = future.result()
+                    except QuotaDeferred as e:
+                        deferred = e
+                        logger.info(f"⏳ {role} arka uç kota nedeniyle erteledi")
+                        continue
+                    except Exception as e:
+                        logger.warning(f"⚠️ {role} arka uç hatası: {str(e)}")
+                        continue
+
+                    if is_valid_response(text, response_schema):
+                        self._record(role, time.monotonic() - started, hedged, delay)
+                        return text
+                    fallback_text = fallback_text or text
+
+                # Gecikme eşiği aşıldı veya birincil geçersiz döndü: ikincili de çalıştır
+                if not hedged:
+                    hedged = True
+                    reason = "gecikme eşiği aşıldı" if futures else "birincil yanıt geçersiz"
+                    logger.info(f"🪢 Yedek istek {self.metrics['secondary']} arka ucuna gönderiliyor "
+                                f"({reason}, eşik {delay:.1f}s)")
+                    futures[self._pool.submit(self._call, self.secondary, cancel_event, args, kwargs)] = "secondary"
+        finally:
+            # Kaybedeni iptal et: başlamadıysa hiç çalışmaz, Ollama akışı kapanır,
+            # süren Gemini çağrısının sonucu yok sayılır
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+
+        self._record(None, time.monotonic() - started, hedged, delay)
+        if deferred is not None and not fallback_text:
+            raise deferred
+        return fallback_text
+
+    def _record(self, role, latency, hedged, delay):
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["hedges_fired"] += int(hedged)
+            self.metrics["hedge_delay_seconds"] = round(delay, 2)
+            if role is None:
+                self.metrics["failures"] += 1
+            else:
+                self.metrics["wins"][role] += 1
+                self.metrics["last_winner"] = self.metrics[role]
+                self.metrics["last_latency_seconds"] = round(latency, 2)
+            snapshot = json.loads(json.dumps(self.metrics))
+
+        if role is not None:
+            logger.info(f"🏁 Kazanan: {snapshot[role]} ({latency:.1f}s{', yedekli' if hedged else ''})")
+        self._save_metrics(snapshot)
+
+    def get_metrics(self):
+        with self._lock:
+            return json.loads(json.dumps(self.metrics))
+
+    def _save_metrics(self, snapshot):
+        """Metrikleri dashboard için atomik olarak diske yazar"""
+        try:
+            os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+            tmp_path = self.metrics_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.metrics_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Yedekli LLM metrikleri kaydedilemedi: {str(e)}")
+
+    def warm_up(self, background=False):
+        """Yerel modeli olan istemcileri önceden yükler"""
+        for client in (self.primary, self.secondary):
+            if hasattr(client, "warm_up"):
+                client.warm_up(background=background)
+
+    def invalidate_prefix_cache(self):
+        for client in (self.primary, self.secondary):
+            if hasattr(client, "invalidate_prefix_cache"):
+                client.invalidate_prefix_cache()
+
+    def generate_json(self, prompt, system_prompt=None):
+        response_text = self.generate(prompt, system_prompt, temperature=0.1)
+        try:
+            return json.loads(response_text) if response_text else None
+        except json.JSONDecodeError:
+            candidates = extract_objects(response_text)
+            return candidates[0] if candidates else None
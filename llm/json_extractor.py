@@ -0,0 +1,203 @@
+"""
+Artımlı JSON Çıkarıcı
+LLM yanıtını tek geçişte tarayan, parantez ve string farkındalıklı durum makinesi.
+<think> bloklarını atlar, string içindeki parantezleri saymaz ve tamamlanan her
+üst düzey JSON nesnesini aday olarak verir. Akış (stream) parçalarıyla da
+beslenebilir; böylece hem tam yanıtlar hem de Ollama akışı aynı yoldan ayrıştırılır.
+"""
+
+import json
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# İç içe nesne/JSON-string aranırken inilecek en fazla derinlik
+MAX_UNWRAP_DEPTH = 3
+
+
+class JSONObjectExtractor:
+    """Parça parça beslenen metinden tamamlanan üst düzey JSON nesnelerini çıkarır"""
+
+    def __init__(self, skip_think=True):
+        self.skip_think = skip_think
+        # Gelen parçalar listede birikir (her parçada metin yeniden kurulmaz)
+        self._parts = []
+        # Henüz taranmamış kuyruk (yarım etiket veya think kapanış araması için son karakterler)
+        self._pending = ""
+        self.pos = 0            # _pending'in metindeki mutlak başlangıcı
+        self.depth = 0
+        self.start = None       # Açık nesnenin mutlak başlangıcı
+        self._object_parts = [] # Açık nesnenin önceki parçalardaki kısmı
+        self.in_string = False
+        self.escape = False
+        self.in_think = False
+        self.think_start = None
+
+    @property
+    def text(self):
+        """Şimdiye kadar beslenen tüm metin"""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, chunk):
+        """
+        Yeni parçayı ekler ve bu parçayla tamamlanan nesneleri döndürür
+
+        Döner:
+            Ayrıştırılmış sözlüklerin listesi (geçersiz JSON blokları atlanır)
+        """
+        if not chunk:
+            return []
+        self._parts.append(chunk)
+        self._pending += chunk
+        return self._scan()
+
+    def close(self):
+        """
+        Akış bittiğinde çağrılır. Kapanmamış <think> bloğu veya metindeki tek
+        başına '{' yüzünden yutulan kısım varsa kalan metin yeniden taranır.
+        """
+        found = []
+        while True:
+            if self.depth > 0:
+                # Kapanmayan açılış parantezi: bir sonraki karakterden yeniden tara
+                restart = self.start + 1
+                self.depth = 0
+                self.in_string = False
+                self.escape = False
+                self._object_parts = []
+            elif self.in_think:
+                # Kapanmamış düşünce bloğu (yanıt kesilmiş): içeriğini de tara
+                restart = self.think_start
+                self.in_think = False
+                self.skip_think = False
+            else:
+                break
+            self.pos = restart
+            self._pending = self.text[restart:]
+            found.extend(self._scan())
+        return found
+
+    def _scan(self):
+        """
+        Taranmamış kuyruğu tek geçişte işler. Her karakter bir kez taranır;
+        think kapanışı yalnızca yeni gelen kısımda (ve önceki parçanın son
+        len(THINK_CLOSE)-1 karakterinde) aranır.
+        """
+        found = []
+        text = self._pending
+        base = self.pos
+        segment = 0  # Açık nesnenin bu kuyruktaki başlangıcı
+        i = 0
+        n = len(text)
+        while i < n:
+            if self.in_think:
+                end = text.find(THINK_CLOSE, i)
+                if end == -1:
+                    # Düşünce bloğu sürüyor: sadece etiketin bölünmüş olabileceği son karakterler tutulur
+                    keep = max(i, n - (len(THINK_CLOSE) - 1))
+                    self.pos, self._pending = base + keep, text[keep:]
+                    return found
+                i = end + len(THINK_CLOSE)
+                self.in_think = False
+                continue
+
+            ch = text[i]
+            if self.depth == 0 and self.skip_think and ch == "<":
+                head = text[i:i + len(THINK_OPEN)]
+                if head == THINK_OPEN:
+                    self.in_think = True
+                    self.think_start = base + i
+                    i += len(THINK_OPEN)
+                    continue
+                if len(head) < len(THINK_OPEN) and THINK_OPEN.startswith(head):
+                    # Etiketin yarısı geldi, devamını bekle
+                    self.pos, self._pending = base + i, text[i:]
+                    return found
+            i += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                if self.depth > 0:
+                    self.in_string = True
+            elif ch == "{":
+                if self.depth == 0:
+                    self.start = base + i - 1
+                    segment = i - 1
+                    self._object_parts = []
+                self.depth += 1
+            elif ch == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    self._object_parts.append(text[segment:i])
+                    raw = "".join(self._object_parts)
+                    self._object_parts = []
+                    try:
+                        obj = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if isinstance(obj, dict):
+                        found.append(obj)
+
+        if self.depth > 0:
+            self._object_parts.append(text[segment:])
+        self.pos, self._pending = base + n, ""
+        return found
+
+
+def extract_objects(text, skip_think=True):
+    """Tam bir metindeki tüm üst düzey JSON nesnelerini tek geçişte döndürür"""
+    extractor = JSONObjectExtractor(skip_think=skip_think)
+    return extractor.feed(text or "") + extractor.close()
+
+
+def score_candidate(obj, keys):
+    """
+    Adayı beklenen anahtarlara göre puanlar. Model bazen kararı bir sarmalayıcı
+    nesnenin veya JSON-string değerinin içine koyar; bu yüzden iç içe sözlükler
+    de taranır ve en çok anahtar içeren (eşitlikte en dıştaki) döner.
+
+    Döner:
+        (eşleşen anahtar sayısı, o anahtarları içeren sözlük)
+    """
+    best = (sum(1 for k in keys if k in obj), obj)
+    stack = [(obj, 0)]
+    while stack:
+        current, depth = stack.pop()
+        if depth >= MAX_UNWRAP_DEPTH:
+            continue
+        for value in current.values():
+            if isinstance(value, str) and value.lstrip().startswith("{"):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    continue
+            if isinstance(value, dict):
+                score = sum(1 for k in keys if k in value)
+                if score > best[0]:
+                    best = (score, value)
+                stack.append((value, depth + 1))
+    return best
+
+
+def best_candidate(candidates, keys):
+    """
+    Adaylar arasından beklenen anahtarlarla en iyi eşleşeni seçer
+    (eşitlikte metinde önce gelen)
+
+    Döner:
+        (puan, sözlük) veya aday yoksa (0, None)
+    """
+    best = (0, None)
+    for obj in candidates:
+        scored = score_candidate(obj, keys)
+        if best[1] is None or scored[0] > best[0]:
+            best = scored
+    return best
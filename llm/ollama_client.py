@@ -5,11 +5,20 @@ RTX 3050 4GB VRAM için optimize edilmiştir
 
 import requests
 import json
+import os
+import threading
+import time
 import config
+from llm.dispatcher import backend_slot
+from llm.prompts import DECISION_SCHEMA
+from llm.json_extractor import JSONObjectExtractor
 from utils.logger import setup_logger
 
 logger = setup_logger("OllamaClient")
 
+# Bundan uzun load_duration modelin VRAM'e yeniden yüklendiğini gösterir
+COLD_LOAD_SECONDS = 1.0
+
 
 class OllamaClient:
     """Ollama API İstemcisi"""
@@ -18,19 +27,53 @@ class OllamaClient:
         """
         Argümanlar:
             model_name: Kullanılacak model (varsayılanı config'den alır)
-            host: Ollama ana bilgisayar URL'si (varsayılan localhost)
+            host: Ollama ana bilgisayar URL'si (varsayılanı config'den alır)
         """
         self.model_name = model_name or config.LLM_MODEL
-        self.host = host or "http://127.0.0.1:11434"
+        self.host = host or getattr(config, 'OLLAMA_HOST', "http://127.0.0.1:11434")
         self.api_url = f"{self.host}/api/generate"
         
+        # Kalıcı oturum: her istekte TCP bağlantısı yeniden kurulmaz
+        self.session = requests.Session()
+        pool_size = max(2, getattr(config, 'LLM_BACKEND_CONCURRENCY', {}).get("ollama", 1) + 1)
+        self.session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        
+        # Model pass'ler arası beklemede VRAM'den atılmasın
+        self.keep_alive = self._keep_alive_setting()
+        self.metrics_path = getattr(config, 'OLLAMA_METRICS_PATH', './data/ollama_metrics.json')
+        self.metrics = {
+            "model": self.model_name,
+            "keep_alive": self.keep_alive,
+            "requests": 0,
+            "loads": 0,
+            "unloads": 0,
+            "load_seconds_total": 0.0,
+            "last_load_seconds": None,
+            "last_load_at": None,
+            "last_unload_at": None
+        }
+        self._metrics_lock = threading.Lock()
+        self._model_loaded = False
+        
         # Ollama'nın çalışıp çalışmadığını kontrol et
         self.check_connection()
+        
+        # Başlangıçta modeli arka planda VRAM'e yükle (ilk karar soğuk yüklemeyi beklemesin)
+        if getattr(config, 'OLLAMA_PRELOAD', True):
+            self.warm_up(background=True)
+    
+    def _keep_alive_setting(self):
+        """Ollama keep_alive değeri: config'de yoksa pass bekleme süresi + pay"""
+        keep_alive = getattr(config, 'OLLAMA_KEEP_ALIVE', None)
+        if keep_alive is None:
+            seconds = getattr(config, 'LLM_PASS_WAIT_SECONDS', 300) + getattr(config, 'OLLAMA_KEEP_ALIVE_MARGIN', 120)
+            keep_alive = f"{int(seconds)}s"
+        return keep_alive
     
     def check_connection(self):
         """Ollama sunucusunun çalıştığını doğrula"""
         try:
-            response = requests.get(f"{self.host}/api/tags", timeout=5)
+            response = self.session.get(f"{self.host}/api/tags", timeout=5)
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 model_names = [m["name"] for m in models]
@@ -48,7 +91,8 @@ class OllamaClient:
             logger.error(f"   Ollama'nın çalıştığından emin olun: ollama serve")
             logger.error(f"   Hata: {str(e)}")
     
-    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None):
+    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None, response_schema=None, priority=0, prefix=None,
+                 cancel_event=None):
         """
         Ollama'dan yanıt üret
         
@@ -57,10 +101,28 @@ class OllamaClient:
             system_prompt: Sistem komutu
             temperature: Örnekleme sıcaklığı (varsayılanı config'den alır)
             max_tokens: Üretilecek maksimum token sayısı (varsayılanı config'den alır)
+            response_schema: Verilirse çıktı JSON moduna zorlanır (şema Gemini biçiminde
+                olduğundan Ollama'ya aktarılmaz, yapı komutta tarif edilir). Akış
+                modunda şemanın zorunlu anahtarları erken bitirme koşuludur.
+            priority: Yerel modelde kota yok; GeminiClient ile aynı arayüz için
+            prefix: Komutun sabit öneki; komutun başına eklenir. Ollama aynı
+                token dizisiyle başlayan isteklerde bu kısmı KV önbelleğinden
+                yeniden kullanır, önek bu yüzden hep en başta ve değişmeden gider.
+            cancel_event: Akış modunda set edilirse bağlantı kapatılır ve üretim durur
+                (ör. yedekli istekte diğer arka uç önce yanıt verdi)
             
         Döner:
             Üretilen metin yanıtı
         """
+        # GPU'ya giden tüm istekler (dağıtıcı, yedek istek, öz-tutarlılık örnekleri)
+        # süreç genelindeki Ollama sınırını paylaşır
+        with backend_slot("ollama"):
+            if cancel_event is not None and cancel_event.is_set():
+                # Sıra beklerken yanıt gereksizleşti (ör. yedekli istekte diğer arka uç kazandı)
+                return None
+            return self._generate(prompt, system_prompt, temperature, max_tokens, response_schema, prefix, cancel_event)
+    
+    def _generate(self, prompt, system_prompt, temperature, max_tokens, response_schema, prefix, cancel_event):
         if temperature is None:
             temperature = config.LLM_TEMPERATURE
         
@@ -79,17 +141,33 @@ class OllamaClient:
             }
         }
         
+        # `context` ile önceden hazırlanmış önek kullanılmaz: şablonlu modda hazırlık
+        # isteğinin ürettiği asistan token'ı bağlama girer ve son ek ikinci bir
+        # kullanıcı turu olur. Tam komut gönderilir; ortak baş kısım Ollama'nın
+        # kendi önek eşleşmesiyle yeniden işlenmez.
+        if prefix:
+            payload["prompt"] = prefix + "\n\n" + prompt
         if system_prompt:
             payload["system"] = system_prompt
         
+        if response_schema:
+            payload["format"] = "json"
+        
+        payload["keep_alive"] = self.keep_alive
+        
+        if getattr(config, 'OLLAMA_STREAM', False):
+            required = (response_schema or DECISION_SCHEMA).get("required", [])
+            return self._generate_stream(payload, required, cancel_event)
+        
         try:
             logger.debug(f"🤖 Ollama'ya ({self.model_name}) istek gönderiliyor...")
             
-            response = requests.post(self.api_url, json=payload, timeout=180)  # 4GB GPU'lar için 180s yapıldı
+            response = self.session.post(self.api_url, json=payload, timeout=180)  # 4GB GPU'lar için 180s yapıldı
             
             if response.status_code == 200:
                 result = response.json()
                 generated_text = result.get("response", "")
+                self._record_request(result.get("load_duration"))
                 
                 logger.debug(f"✅ LLM yanıtı alındı ({len(generated_text)} karakter)")
                 
@@ -106,6 +184,145 @@ class OllamaClient:
             logger.error(f"❌ Ollama üretimi başarısız oldu: {str(e)}")
             return None
     
+    def _generate_stream(self, payload, required_keys, cancel_event=None):
+        """
+        Yanıtı akış (stream) olarak alır. Gerekli anahtarları içeren tam JSON
+        nesnesi geldiği anda bağlantı kapatılır; Ollama üretimi durdurur ve GPU
+        bir sonraki isteğe daha erken serbest kalır.
+        
+        Döner:
+            O ana kadar üretilen metin (think bloğu dahil) veya hata durumunda None
+        """
+        payload = dict(payload, stream=True)
+        extractor = JSONObjectExtractor()
+        required = set(required_keys)
+        started = time.time()
+        
+        try:
+            logger.debug(f"🤖 Ollama'ya ({self.model_name}) akış isteği gönderiliyor...")
+            
+            with self.session.post(self.api_url, json=payload, stream=True, timeout=180) as response:
+                if response.status_code != 200:
+                    logger.error(f"❌ Ollama API hatası: {response.status_code}")
+                    return None
+                
+                for line in response.iter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        logger.debug("🛑 Akış iptal edildi (yanıt artık gerekmiyor)")
+                        self._record_request(None)
+                        return None
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    completed = extractor.feed(chunk.get("response", ""))
+                    if any(required.issubset(obj) for obj in completed):
+                        logger.debug(f"✅ JSON tamamlandı, akış erken kapatıldı "
+                                     f"({len(extractor.text)} karakter, {time.time() - started:.1f}s)")
+                        # Erken kapatmada son parça (load_duration) gelmez
+                        self._record_request(None)
+                        break
+                    if chunk.get("done"):
+                        self._record_request(chunk.get("load_duration"))
+                        break
+            
+            logger.debug(f"✅ LLM yanıtı alındı ({len(extractor.text)} karakter)")
+            return extractor.text
+        
+        except requests.Timeout:
+            logger.error("❌ Ollama isteği zaman aşımına uğradı")
+            return None
+        
+        except Exception as e:
+            logger.error(f"❌ Ollama üretimi başarısız oldu: {str(e)}")
+            return None
+    
+    def is_model_loaded(self):
+        """Modelin şu an VRAM'de olup olmadığını /api/ps ile sorgular (bilinmiyorsa None)"""
+        try:
+            response = self.session.get(f"{self.host}/api/ps", timeout=5)
+            if response.status_code != 200:
+                return None
+            running = [m.get("name") or m.get("model") for m in response.json().get("models", [])]
+            return self.model_name in running
+        except requests.RequestException:
+            return None
+    
+    def preload(self):
+        """Boş komutla modeli VRAM'e yükler ve keep_alive süresini yeniler"""
+        try:
+            response = self.session.post(
+                self.api_url,
+                json={"model": self.model_name, "keep_alive": self.keep_alive},
+                timeout=180
+            )
+            if response.status_code == 200:
+                self._record_load(response.json().get("load_duration"))
+                return True
+            logger.warning(f"⚠️ Ollama ön yükleme başarısız: {response.status_code}")
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Ollama ön yükleme başarısız: {str(e)}")
+        return False
+    
+    def warm_up(self, background=False):
+        """
+        Pass başında çağrılır: model VRAM'den atılmışsa boşaltma olayını kaydeder
+        ve modeli yeniden yükler. background=True ise yükleme 1. ve 2. aşamalarla
+        paralel yürür.
+        """
+        def _run():
+            loaded = self.is_model_loaded()
+            if loaded:
+                self._model_loaded = True
+                return
+            if loaded is False and self._model_loaded:
+                with self._metrics_lock:
+                    self.metrics["unloads"] += 1
+                    self.metrics["last_unload_at"] = time.time()
+                self._save_metrics()
+                logger.info(f"ℹ️ '{self.model_name}' VRAM'den boşaltılmış, yeniden yükleniyor...")
+            self.preload()
+        
+        if background:
+            threading.Thread(target=_run, name="ollama-warmup", daemon=True).start()
+        else:
+            _run()
+    
+    def _record_request(self, load_duration_ns):
+        with self._metrics_lock:
+            self.metrics["requests"] += 1
+        self._record_load(load_duration_ns)
+    
+    def _record_load(self, load_duration_ns):
+        """Ollama'nın bildirdiği load_duration soğuk yükleme ise yükleme olayı olarak kaydeder"""
+        self._model_loaded = True
+        if not load_duration_ns:
+            return
+        seconds = load_duration_ns / 1e9
+        if seconds < COLD_LOAD_SECONDS:
+            return
+        with self._metrics_lock:
+            self.metrics["loads"] += 1
+            self.metrics["load_seconds_total"] = round(self.metrics["load_seconds_total"] + seconds, 2)
+            self.metrics["last_load_seconds"] = round(seconds, 2)
+            self.metrics["last_load_at"] = time.time()
+        logger.info(f"📥 '{self.model_name}' VRAM'e yüklendi ({seconds:.1f}s)")
+        self._save_metrics()
+    
+    def get_metrics(self):
+        with self._metrics_lock:
+            return dict(self.metrics)
+    
+    def _save_metrics(self):
+        """Metrikleri dashboard için atomik olarak diske yazar"""
+        try:
+            os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+            tmp_path = self.metrics_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.get_metrics(), f, ensure_ascii=False)
+            os.replace(tmp_path, self.metrics_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Ollama metrikleri kaydedilemedi: {str(e)}")
+    
     def generate_json(self, prompt, system_prompt=None):
         """
         JSON yanıtı üret (format zorlaması ile)
@@ -4,6 +4,7 @@ Halüsinasyonu önlemeye ve hatalardan ders çıkarmaya odaklanmış komutlar
 """
 
 import json
+from llm.json_extractor import extract_objects, best_candidate
 
 
 def get_system_prompt():
@@ -26,7 +27,73 @@ Markdown bloğu veya ek açıklama kullanma. <think> bloğunda analizini yap, so
   "beklenen_sure": "4 saat",
   "neden": "Analiz açıklaması"
 }"""
- 
+
+
+def get_batch_system_prompt():
+    """
+    Toplu (çok sembollü) kararlar için sistem komutunu döndürür.
+    Her sembol için tekli formatla aynı alanlar + "sembol" anahtarı istenir.
+    """
+    return """Sen bir finansal analistsin. Birden fazla varlığı AYRI AYRI analiz et ve SADECE aşağıdaki JSON formatında yanıt ver.
+Markdown bloğu veya ek açıklama kullanma. <think> bloğunda analizini yap, sonra doğrudan JSON'u yaz.
+"kararlar" listesinde verilen HER varlık için tam olarak bir kayıt olmalı ve "sembol" alanı varlık adıyla birebir aynı olmalı.
+
+{
+  "kararlar": [
+    {
+      "sembol": "EURUSD=X",
+      "karar": "AL/SAT/BEKLE",
+      "guven": 75,
+      "giris_fiyati": 1.1234,
+      "zarar_kes": 1.1200,
+      "kar_al": 1.1300,
+      "risk_skoru": 40,
+      "risk_odul_orani": 2.5,
+      "analiz_vadesi": "H1",
+      "beklenen_sure": "4 saat",
+      "neden": "Analiz açıklaması"
+    }
+  ]
+}"""
+
+
+# Gemini için katı JSON şeması - ÖNCE KRİTİK ALANLAR
+DECISION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "karar": {"type": "STRING", "description": "Karar: AL, SAT veya BEKLE"},
+        "guven": {"type": "INTEGER", "description": "Güven 0-100"},
+        "giris_fiyati": {"type": "NUMBER"},
+        "zarar_kes": {"type": "NUMBER"},
+        "kar_al": {"type": "NUMBER"},
+        "risk_skoru": {"type": "INTEGER", "description": "Risk skoru 0-100"},
+        "risk_odul_orani": {"type": "NUMBER"},
+        "analiz_vadesi": {"type": "STRING", "description": "Analiz vadesi (H1, H4 vb.)"},
+        "beklenen_sure": {"type": "STRING", "description": "Beklenen süre"},
+        "neden": {"type": "STRING", "description": "Türkçe detaylı açıklama"}
+    },
+    "required": ["karar", "guven", "giris_fiyati", "zarar_kes", "kar_al", "risk_skoru", "risk_odul_orani", "analiz_vadesi", "beklenen_sure", "neden"]
+}
+
+# Toplu kararlar: sembol anahtarlı karar nesneleri dizisi
+BATCH_DECISION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "kararlar": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "sembol": {"type": "STRING", "description": "Varlık adı (prompt'taki ile aynı)"},
+                    **DECISION_SCHEMA["properties"]
+                },
+                "required": ["sembol"] + DECISION_SCHEMA["required"]
+            }
+        }
+    },
+    "required": ["kararlar"]
+}
+
 
 
 def build_decision_prompt(context, strategy_excerpts=None, learned_patterns=None):
@@ -41,6 +108,90 @@ def build_decision_prompt(context, strategy_excerpts=None, learned_patterns=None
     Döner:
         Formatlanmış komut (prompt) dizesi
     """
+    prompt = "TİCARET FIRSATI DEĞERLENDİRMESİ\n\n"
+    prompt += _format_symbol_section(context)
+    prompt += _format_learned_patterns(learned_patterns)
+
+    prompt += """
+GÖREV: Yukarıdaki verileri ve sistem hafızasını birleştirerek nihai kararı ver.
+
+ANALİZ KRİTERLERİ:
+1. Risk/Ödül (RR) oranı mutlaka 1.5 üzerinde olmalıdır. Max RR: 10.0.
+2. Analiz yaptığın vadeyi (H1/H4/Günlük) ve işlemin ne kadar süre açık kalması gerektiğini belirt.
+3. "neden" kısmında hem teknik verileri hem de 'sistem hafızasından' yararak neden AL veya SAT dediğini açıkla.
+4. SADECE JSON formatında yanıt ver. JSON HARİCİ HİÇBİR ŞEY YAZMA. Açıklama ekleme."""
+    
+    return prompt
+
+
+def build_decision_prefix(learned_patterns=None):
+    """
+    Önek önbelleği için komutun sabit kısmı: sistem hafızası ve görev talimatları.
+    Semboller arasında değişmez; yalnızca öğrenilmiş desenler değişince yenilenir.
+    Sembole özgü veri build_decision_suffix ile ayrı gönderilir.
+
+    Argümanlar:
+        learned_patterns: Geçmiş başarılı ve başarısız işlemlerden öğrenilen veriler
+
+    Döner:
+        Formatlanmış önek dizesi
+    """
+    prompt = "TİCARET FIRSATI DEĞERLENDİRMESİ\n"
+    prompt += _format_learned_patterns(learned_patterns)
+
+    prompt += """
+GÖREV: Bu mesajdan sonra tek bir varlığın verileri gelecek. O verileri ve sistem hafızasını birleştirerek nihai kararı ver.
+
+ANALİZ KRİTERLERİ:
+1. Risk/Ödül (RR) oranı mutlaka 1.5 üzerinde olmalıdır. Max RR: 10.0.
+2. Analiz yaptığın vadeyi (H1/H4/Günlük) ve işlemin ne kadar süre açık kalması gerektiğini belirt.
+3. "neden" kısmında hem teknik verileri hem de 'sistem hafızasından' yararak neden AL veya SAT dediğini açıkla.
+4. SADECE JSON formatında yanıt ver. JSON HARİCİ HİÇBİR ŞEY YAZMA. Açıklama ekleme."""
+
+    return prompt
+
+
+def build_decision_suffix(context):
+    """Önek önbelleğiyle birlikte gönderilen sembole özgü kısım"""
+    return "DEĞERLENDİRİLECEK VARLIK:\n" + _format_symbol_section(context) + \
+        "\nYukarıdaki talimatlara göre SADECE JSON kararını yaz."
+
+
+def build_batch_decision_prompt(contexts, learned_patterns=None):
+    """
+    Birden fazla sembol için tek bir komut metni oluşturur.
+    Sistem hafızası ve görev talimatları bir kez yazılır, her sembolün verisi ayrı bölümde.
+    
+    Argümanlar:
+        contexts: build_decision_prompt'a verilen bağlam sözlüklerinin listesi
+        learned_patterns: Geçmiş başarılı ve başarısız işlemlerden öğrenilen veriler
+        
+    Döner:
+        Formatlanmış komut (prompt) dizesi
+    """
+    symbols = [c.get("symbol", "BİLİNMİYOR") for c in contexts]
+    prompt = f"TOPLU TİCARET FIRSATI DEĞERLENDİRMESİ ({len(contexts)} varlık: {', '.join(symbols)})\n"
+    
+    for i, context in enumerate(contexts, 1):
+        prompt += f"\n===== {i}. " + _format_symbol_section(context)
+    
+    prompt += _format_learned_patterns(learned_patterns)
+    
+    prompt += f"""
+GÖREV: Her varlığı kendi verileri ve sistem hafızasıyla BAĞIMSIZ olarak değerlendir ve her biri için nihai kararı ver.
+
+ANALİZ KRİTERLERİ:
+1. Risk/Ödül (RR) oranı mutlaka 1.5 üzerinde olmalıdır. Max RR: 10.0.
+2. Analiz yaptığın vadeyi (H1/H4/Günlük) ve işlemin ne kadar süre açık kalması gerektiğini belirt.
+3. "neden" kısmında hem teknik verileri hem de 'sistem hafızasından' yararak neden AL veya SAT dediğini açıkla.
+4. "kararlar" listesinde şu {len(symbols)} sembolün her biri için tam bir kayıt olmalı: {', '.join(symbols)}
+5. SADECE JSON formatında yanıt ver. JSON HARİCİ HİÇBİR ŞEY YAZMA. Açıklama ekleme."""
+    
+    return prompt
+
+
+def _format_symbol_section(context):
+    """Tek bir sembolün fiyat, teknik, haber ve takvim verilerini metne döker"""
     symbol = context.get("symbol", "BİLİNMİYOR")
     direction = context.get("direction", "BİLİNMİYOR")
     current_price = context.get("current_price", 0)
@@ -59,9 +210,7 @@ def build_decision_prompt(context, strategy_excerpts=None, learned_patterns=None
     # Yön çevirisi
     direction_tr = direction.replace("BUY", "AL").replace("SELL", "SAT").replace("NEUTRAL", "NÖTR")
     
-    prompt = f"""TİCARET FIRSATI DEĞERLENDİRMESİ
-
-VARLIK: {symbol}
+    prompt = f"""VARLIK: {symbol}
 TAVSİYE EDİLEN YÖN: {direction_tr}
 GÜNCEL FİYAT: {current_price}
 
@@ -87,6 +236,13 @@ GÜNCEL FİYAT: {current_price}
         for event in upcoming_events[:3]:
             prompt += f"- {event.get('title', 'N/A')} ({event.get('date', 'TBD')}) [Etki: {event.get('impact', 'N/A')}]\n"
 
+    return prompt
+
+
+def _format_learned_patterns(learned_patterns):
+    """Öğrenilmiş desenleri 'sistem hafızası' bölümü olarak metne döker"""
+    prompt = ""
+
     # 🧠 ÖĞRENİLMİŞ DESENLER EKLE (KARAR VERİRKEN EN ÖNEMLİ BÖLÜM)
     if learned_patterns:
         prompt += "\n🧠 SİSTEM HAFIZASI (GEÇMİŞ İŞLEMLERDEN ÖĞRENİLENLER):\n"
@@ -109,89 +265,45 @@ GÜNCEL FİYAT: {current_price}
         if learned_patterns:
             prompt += "\n⚠️ TALİMAT: Eğer mevcut teknik kurulum 'HATALI KURULUMLAR' listesindeki bir desene benziyorsa, güven seviyesini düşür ve BEKLE kararı ver.\n"
 
-    prompt += """
-GÖREV: Yukarıdaki verileri ve sistem hafızasını birleştirerek nihai kararı ver.
-
-ANALİZ KRİTERLERİ:
-1. Risk/Ödül (RR) oranı mutlaka 1.5 üzerinde olmalıdır. Max RR: 10.0.
-2. Analiz yaptığın vadeyi (H1/H4/Günlük) ve işlemin ne kadar süre açık kalması gerektiğini belirt.
-3. "neden" kısmında hem teknik verileri hem de 'sistem hafızasından' yararak neden AL veya SAT dediğini açıkla.
-4. SADECE JSON formatında yanıt ver. JSON HARİCİ HİÇBİR ŞEY YAZMA. Açıklama ekleme."""
-    
     return prompt
 
 
 
+# Türkçe yanıt alanları -> iç alan adları
+DECISION_FIELD_MAPPING = {
+    "karar": "decision",
+    "guven": "confidence",
+    "giris_fiyati": "entry_price",
+    "iris_fiyati": "entry_price", # Model hatası toleransı
+    "zarar_kes": "stop_loss",
+    "kar_al": "take_profit",
+    "risk_skoru": "risk_score",
+    "risk_odul_orani": "rr_ratio",
+    "analiz_vadesi": "timeframe",
+    "beklenen_sure": "expected_duration",
+    "neden": "reasoning"
+}
+
+
 def validate_llm_response(response_text):
     """
     LLM JSON yanıtını doğrular ve ayrıştırır.
-    Sadece JSON kısmını çekip hataları tolere eder.
+    Yanıt tek geçişte taranır (think blokları atlanır, iç içe ve sarmalanmış
+    nesneler desteklenir); adaylar alan eşlemesine göre puanlanır ve en iyisi seçilir.
     """
-    import os
-    import re
-    import json
-    # Alanları eşle
-    mapping = {
-        "karar": "decision",
-        "guven": "confidence",
-        "giris_fiyati": "entry_price",
-        "iris_fiyati": "entry_price", # Model hatası toleransı
-        "zarar_kes": "stop_loss",
-        "kar_al": "take_profit",
-        "risk_skoru": "risk_score",
-        "risk_odul_orani": "rr_ratio",
-        "analiz_vadesi": "timeframe",
-        "beklenen_sure": "expected_duration",
-        "neden": "reasoning"
-    }
+    if not response_text:
+        return None
     
-    # Gereksiz düşünce (think) bloklarını tamamen temizle
-    response_text = re.sub(r'<think>.*?</think>', '', response_text, flags=re.DOTALL)
-    
-    # Tüm JSON benzeri blokları bul ({...})
-    json_blocks = re.findall(r'(\{.*?\})', response_text, re.DOTALL)
-    
-    data = None
-    for block in json_blocks:
-        try:
-            # Bloğu temizle ve ayrıştır
-            candidate = json.loads(block)
-            # Eğer anahtarların çoğu mevcutsa doğru bloğu bulduk demektir
-            matches = sum(1 for k in mapping.keys() if k in candidate)
-            if matches >= 5:
-                data = candidate
-                break
-        except:
-            continue
-            
+    _, data = best_candidate(extract_objects(response_text), DECISION_FIELD_MAPPING)
     if not data:
-        # Son çare: Tüm metni temizle ve en baştan en sona parantezleri ara
-        try:
-            start = response_text.find('{')
-            end = response_text.rfind('}')
-            if start != -1 and end != -1:
-                data = json.loads(response_text[start:end+1])
-        except:
-            return None
-
-    if not data: return None
-
-    # Eğer model JSON içine JSON koyarsa (DeepSeek hatası)
-    # Bazen key olarak tüm şablonu yazıp value olarak sonucu koyuyor
-    # Bu durumda en uzun string değere sahip anahtarı veya iç içe objeyi bulmalıyız
-    if len(data) > 0:
-        for k, v in data.items():
-            if isinstance(v, dict) and sum(1 for subk in mapping.keys() if subk in v) >= 3:
-                data = v
-                break
-            if isinstance(v, str) and v.startswith("{"):
-                try:
-                    sub_data = json.loads(v)
-                    if sum(1 for subk in mapping.keys() if subk in sub_data) >= 3:
-                        data = sub_data
-                        break
-                except: pass
+        return None
     
+    return _map_decision_fields(data)
+
+
+def _map_decision_fields(data):
+    """Ayrıştırılmış Türkçe karar nesnesini iç alan adlarına ve tiplere çevirir"""
+    mapping = DECISION_FIELD_MAPPING
     result = {}
     for tr, en in mapping.items():
         val = data.get(tr)
@@ -212,3 +324,44 @@ def validate_llm_response(response_text):
     else: result["decision"] = "PASS"
 
     return result
+
+
+def validate_batch_response(response_text, symbols):
+    """
+    Toplu LLM yanıtını ayrıştırır ve kararları sembollere eşler.
+    Eksik veya bozuk kayıtlar None olarak döner; çağıran taraf bu semboller
+    için tekli isteğe geri düşer.
+    
+    Argümanlar:
+        response_text: Ham LLM yanıtı
+        symbols: İstekte gönderilen semboller
+        
+    Döner:
+        Sembol -> karar sözlüğü (veya None)
+    """
+    from utils.sentiment_index import normalize_symbol
+
+    results = {symbol: None for symbol in symbols}
+    if not response_text:
+        return results
+
+    candidates = extract_objects(response_text)
+    entries = next((c["kararlar"] for c in candidates if isinstance(c.get("kararlar"), list)), None)
+    if entries is None:
+        # Bazı modeller sarmalayıcı nesne olmadan doğrudan dizi döndürür;
+        # dizideki her nesne üst düzey aday olarak çıkar
+        entries = [c for c in candidates if "sembol" in c]
+
+    wanted = {normalize_symbol(s): s for s in symbols}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        symbol = wanted.get(normalize_symbol(entry.get("sembol", "")))
+        if symbol is None or results[symbol] is not None:
+            continue
+        # Tekli doğrulamayla aynı eşik: anahtarların çoğu mevcut olmalı
+        if sum(1 for k in DECISION_FIELD_MAPPING if k in entry) < 5:
+            continue
+        results[symbol] = _map_decision_fields(entry)
+
+    return results
@@ -0,0 +1,152 @@
+"""
+Gemini İstek Zamanlayıcısı
+Dakikalık kotayı token bucket ile, günlük kotayı diskte kalıcı bir sayaçla izler.
+Bekleyen çağrılar önceliğe göre sıraya girer; kota kısa sürede açılmayacaksa
+çağrı beklemek yerine hemen QuotaDeferred ile ertelenir. Böylece 429 durumunda
+ticaret döngüsü dakikalarca uyumaz.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("RateLimiter")
+
+
+class QuotaDeferred(Exception):
+    """İstek kotası dolduğu için çağrı ertelendi"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RequestScheduler:
+    """Öncelikli token bucket (dakikalık) + günlük bütçe"""
+
+    def __init__(self, rpm=None, rpd=None, burst=None, max_wait=None, state_path=None):
+        """
+        Argümanlar:
+            rpm: Dakikalık istek sınırı (varsayılanı config'den alır)
+            rpd: Günlük istek sınırı
+            burst: Art arda gönderilebilecek en fazla istek (istekleri zamana yayar)
+            max_wait: Bir çağrının sırada en fazla bekleyeceği süre (saniye)
+            state_path: Günlük sayacın tutulduğu dosya
+        """
+        self.rpm = rpm or getattr(config, 'GEMINI_RPM_LIMIT', 15)
+        self.rpd = rpd or getattr(config, 'GEMINI_RPD_LIMIT', 1500)
+        self.capacity = float(burst or getattr(config, 'GEMINI_BURST', 3))
+        self.max_wait = max_wait if max_wait is not None else getattr(config, 'GEMINI_MAX_QUEUE_WAIT_SECONDS', 20)
+        self.state_path = state_path or getattr(config, 'GEMINI_QUOTA_PATH', './data/gemini_quota.json')
+
+        self.refill_per_second = self.rpm / 60.0
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.deferred = 0
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._day, self._day_count = self._load_day()
+
+    def _load_day(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("day") == today:
+                return today, int(state.get("count", 0))
+        except Exception:
+            pass
+        return today, 0
+
+    def _save_day(self):
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"day": self._day, "count": self._day_count}, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Günlük kota sayacı kaydedilemedi: {str(e)}")
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_per_second)
+        self.last_refill = now
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today != self._day:
+            self._day, self._day_count = today, 0
+
+    def _ready_in(self, now):
+        """Bir sonraki token'a kalan süre (saniye)"""
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.refill_per_second)
+        return wait
+
+    def acquire(self, priority=0):
+        """
+        İstek hakkı alır. Yüksek öncelikli bekleyenler önce hizmet alır.
+
+        Argümanlar:
+            priority: Büyük olan önce (ör. teknik skor)
+
+        Raises:
+            QuotaDeferred: Günlük kota bitti veya hak `max_wait` içinde açılmayacak
+        """
+        deadline = time.monotonic() + self.max_wait
+        waiter = (-priority, next(self._seq))
+
+        with self._cond:
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    if self._day_count >= self.rpd:
+                        self.deferred += 1
+                        raise QuotaDeferred(f"Günlük Gemini kotası doldu ({self._day_count}/{self.rpd})")
+
+                    wait = self._ready_in(now)
+                    if wait > deadline - now:
+                        self.deferred += 1
+                        raise QuotaDeferred(f"Gemini kotası {wait:.0f}s içinde açılmayacak", retry_after=wait)
+
+                    if wait == 0 and min(self._waiters) == waiter:
+                        self.tokens -= 1
+                        self._day_count += 1
+                        self._save_day()
+                        return
+
+                    self._cond.wait(timeout=wait if wait > 0 else None)
+            finally:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    def penalize(self, retry_after=None):
+        """Sunucu 429 döndürdüğünde kovayı boşaltır ve belirtilen süre yeni istek göndermez"""
+        retry_after = retry_after or getattr(config, 'GEMINI_429_COOLDOWN_SECONDS', 60)
+        with self._cond:
+            self.tokens = 0.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def status(self):
+        """Anlık kota durumu (günlük kullanım, kalan token, ertelenen çağrı sayısı)"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "day": self._day,
+                "used_today": self._day_count,
+                "daily_limit": self.rpd,
+                "tokens": round(self.tokens, 2),
+                "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+                "deferred": self.deferred
+            }
@@ -0,0 +1,321 @@
+"""
+Yerel Sahte (Stub) LLM Sunucusu
+GPU veya Gemini anahtarı olmadan 3. aşamayı yük ve gecikme testine sokmak için
+Ollama uyumlu /api/generate, /api/tags ve /api/ps uçlarını sunar. Ayrıca
+GeminiClient arayüzünü taklit eden çevrimdışı bir istemci (OfflineGeminiClient)
+içerir. Her ikisi de şemaya uygun kararlar döndürür; gecikme dağılımı, hata
+oranı, 429 patlamaları ve akış (stream) ayarlanabilir.
+
+Kullanım:
+    python -m llm.stub_server --port 11435 --latency-ms 800 --error-rate 0.05 --think
+    config.py: OLLAMA_HOST = "http://127.0.0.1:11435"
+"""
+
+import argparse
+import http.server
+import json
+import math
+import random
+import re
+import threading
+import time
+import config
+from llm.rate_limiter import RequestScheduler, QuotaDeferred
+from utils.logger import setup_logger
+
+logger = setup_logger("StubLLM")
+
+SECTION_RE = re.compile(r"VARLIK:\s*(\S+)\s+TAVSİYE EDİLEN YÖN:\s*(\S+)\s+GÜNCEL FİYAT:\s*([0-9.]+)")
+
+
+class StubBehavior:
+    """Sahte arka ucun gecikme, hata ve karar üretme davranışı"""
+
+    def __init__(self, latency_ms=800, latency_sigma=0.5, error_rate=0.0, burst_429_rate=0.0,
+                 burst_429_length=5, think=False, load_seconds=2.5, keep_alive_seconds=300, seed=None):
+        """
+        Argümanlar:
+            latency_ms: Gecikme medyanı (log-normal dağılım)
+            latency_sigma: Log-normal yayılım (0 = sabit gecikme)
+            error_rate: İsteğin 500 ile başarısız olma olasılığı
+            burst_429_rate: Bir 429 patlamasının başlama olasılığı
+            burst_429_length: Patlamanın sürdüğü ardışık istek sayısı
+            think: True ise yanıt <think> bloğuyla başlar (deepseek-r1 benzeri)
+            load_seconds: Model soğukken eklenen yükleme süresi
+            keep_alive_seconds: Bu kadar boşta kalan model "boşaltılmış" sayılır
+            seed: Tekrarlanabilir testler için rastgelelik tohumu
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.burst_429_rate = burst_429_rate
+        self.burst_429_length = burst_429_length
+        self.think = think
+        self.load_seconds = load_seconds
+        self.keep_alive_seconds = keep_alive_seconds
+        self.rng = random.Random(seed)
+        self.last_used = None
+        self._burst_left = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        return cls(**getattr(config, 'LLM_STUB_OPTIONS', {}))
+
+    def sample_latency(self):
+        """Saniye cinsinden gecikme örneği"""
+        with self._lock:
+            noise = self.rng.gauss(0, 1)
+        return self.latency_ms / 1000.0 * math.exp(self.latency_sigma * noise)
+
+    def next_outcome(self):
+        """Bu isteğin sonucu: 'ok', 'error' veya '429'"""
+        with self._lock:
+            if self._burst_left > 0:
+                self._burst_left -= 1
+                return "429"
+            if self.burst_429_rate and self.rng.random() < self.burst_429_rate:
+                self._burst_left = self.burst_429_length - 1
+                return "429"
+            if self.error_rate and self.rng.random() < self.error_rate:
+                return "error"
+            return "ok"
+
+    def touch(self):
+        """Modeli kullanıldı olarak işaretler; soğuksa yükleme süresini döndürür"""
+        with self._lock:
+            now = time.time()
+            cold = self.last_used is None or now - self.last_used > self.keep_alive_seconds
+            self.last_used = now
+        return self.load_seconds if cold else 0.0
+
+    def is_loaded(self):
+        return self.last_used is not None and time.time() - self.last_used <= self.keep_alive_seconds
+
+    def decision(self, symbol, direction="BUY", price=1.0):
+        """Şemaya uygun (Türkçe anahtarlı) tek bir karar üretir"""
+        with self._lock:
+            roll = self.rng.random()
+            confidence = self.rng.randint(40, 95)
+        side = "AL" if direction == "AL" or direction == "BUY" else "SAT"
+        opposite = "SAT" if side == "AL" else "AL"
+        karar = side if roll < 0.6 else ("BEKLE" if roll < 0.85 else opposite)
+        sign = 1 if karar == "AL" else -1
+        price = float(price or 1.0)
+        return {
+            "sembol": symbol,
+            "karar": karar,
+            "guven": confidence,
+            "giris_fiyati": price,
+            "zarar_kes": round(price * (1 - sign * 0.005), 6),
+            "kar_al": round(price * (1 + sign * 0.01), 6),
+            "risk_skoru": 100 - confidence,
+            "risk_odul_orani": 2.0,
+            "analiz_vadesi": "H1",
+            "beklenen_sure": "4 saat",
+            "neden": f"Stub karar ({symbol})"
+        }
+
+    def respond(self, prompt, batch=None):
+        """Komuttaki varlık bölümlerine göre tekli veya toplu yanıt metni üretir"""
+        sections = SECTION_RE.findall(prompt or "")
+        if batch is None:
+            batch = len(sections) > 1
+        if not sections:
+            sections = [("BİLİNMİYOR", "AL", "1.0")]
+
+        decisions = [self.decision(s, d, p) for s, d, p in sections]
+        body = {"kararlar": decisions} if batch else decisions[0]
+        text = json.dumps(body, ensure_ascii=False)
+        if self.think:
+            text = "<think>Teknik veriler inceleniyor... {taslak} değerlendirme.</think>\n" + text
+        return text
+
+
+class StubOllamaHandler(http.server.BaseHTTPRequestHandler):
+    """Ollama API'sinin test için yeterli alt kümesi"""
+
+    behavior = None
+    models = []
+    stats = None
+
+    def log_message(self, format, *args):
+        return
+
+    def _send_json(self, code, obj):
+        data = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    @staticmethod
+    def _fake_context(payload, text):
+        """Ollama'nın `context` alanını taklit eder (istekteki context + kabaca token sayısı)"""
+        length = (len(payload.get("system") or "") + len(payload.get("prompt") or "") + len(text)) // 4
+        return list(payload.get("context") or []) + list(range(length))
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            return self._send_json(200, {"models": [{"name": m, "model": m} for m in self.models]})
+        if self.path == '/api/ps':
+            loaded = self.models[:1] if self.behavior.is_loaded() else []
+            return self._send_json(200, {"models": [{"name": m, "model": m} for m in loaded]})
+        if self.path == '/api/stub/stats':
+            with self.stats_lock:
+                return self._send_json(200, dict(self.stats))
+        return self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != '/api/generate':
+            return self._send_json(404, {"error": "not found"})
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "invalid json"})
+
+        self._count("requests")
+        model = payload.get("model", self.models[0] if self.models else "stub")
+
+        # Boş komut: Ollama'daki gibi sadece modeli yükle
+        if not payload.get("prompt"):
+            load = self.behavior.touch()
+            time.sleep(load)
+            return self._send_json(200, {"model": model, "response": "", "done": True,
+                                         "load_duration": int(load * 1e9)})
+
+        outcome = self.behavior.next_outcome()
+        if outcome == "429":
+            self._count("rate_limited")
+            return self._send_json(429, {"error": "rate limited (stub)"})
+        if outcome == "error":
+            self._count("errors")
+            return self._send_json(500, {"error": "internal error (stub)"})
+
+        load = self.behavior.touch()
+        latency = self.behavior.sample_latency()
+        text = self.behavior.respond(payload.get("prompt"), batch=None)
+
+        if not payload.get("stream", True):
+            time.sleep(load + latency)
+            return self._send_json(200, {
+                "model": model, "response": text, "done": True,
+                "context": self._fake_context(payload, text),
+                "load_duration": int(load * 1e9),
+                "total_duration": int((load + latency) * 1e9)
+            })
+
+        # Akış: NDJSON satırları, gecikme parçalara yayılır; bağlantı kapanınca biter
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        pieces = [text[i:i + 8] for i in range(0, len(text), 8)]
+        time.sleep(load)
+        try:
+            for piece in pieces:
+                time.sleep(latency / len(pieces))
+                self.wfile.write((json.dumps({"model": model, "response": piece, "done": False}) + "\n").encode('utf-8'))
+                self.wfile.flush()
+            done = {"model": model, "response": "", "done": True,
+                    "context": self._fake_context(payload, text), "load_duration": int(load * 1e9)}
+            self.wfile.write((json.dumps(done) + "\n").encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            # İstemci JSON tamamlanınca erken kapattı
+            self._count("cancelled_streams")
+
+
+def create_stub_server(host="127.0.0.1", port=11435, behavior=None, models=None):
+    """
+    Stub sunucusunu oluşturur (başlatmaz). port=0 ile boş bir port seçilir.
+
+    Döner:
+        ThreadingHTTPServer örneği (server.server_address ile gerçek port okunur)
+    """
+    handler = type("BoundStubHandler", (StubOllamaHandler,), {
+        "behavior": behavior or StubBehavior.from_config(),
+        "models": models or [config.LLM_MODEL],
+        "stats": {},
+        "stats_lock": threading.Lock()
+    })
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class OfflineGeminiClient:
+    """
+    GeminiClient ile aynı arayüze sahip çevrimdışı istemci. Gerçek istemcideki
+    kota zamanlayıcısını kullanır; 429 patlamaları QuotaDeferred olarak yansır.
+    Günlük sayaç GEMINI_STUB_QUOTA_PATH'te tutulur: yük testleri gerçek Gemini
+    kotasını tüketmez.
+    """
+
+    def __init__(self, model_name=None, behavior=None, scheduler=None):
+        """
+        Argümanlar:
+            model_name: Gösterilecek model adı
+            behavior: StubBehavior (varsayılanı config.LLM_STUB_OPTIONS)
+            scheduler: Kota zamanlayıcısı (varsayılan: stub'a ayrılmış sayaç dosyasıyla)
+        """
+        self.model_name = model_name or "gemini-offline-stub"
+        self.behavior = behavior or StubBehavior.from_config()
+        self.scheduler = scheduler or RequestScheduler(
+            state_path=getattr(config, 'GEMINI_STUB_QUOTA_PATH', './data/gemini_stub_quota.json')
+        )
+        logger.info(f"✅ Çevrimdışı Gemini stub'ı '{self.model_name}' başlatıldı")
+
+    def generate(self, prompt, system_prompt=None, temperature=None, max_tokens=None, response_schema=None, priority=0, prefix=None):
+        self.scheduler.acquire(priority)
+        if prefix:
+            prompt = prefix + "\n\n" + prompt
+
+        outcome = self.behavior.next_outcome()
+        time.sleep(self.behavior.sample_latency())
+        if outcome == "429":
+            self.scheduler.penalize()
+            logger.warning("⚠️ Gemini İstek Sınırı (429, stub). Sonraki istekler ertelenecek.")
+            raise QuotaDeferred("Gemini 429 döndürdü (stub)")
+        if outcome == "error":
+            logger.error("❌ Gemini Seçim Hatası: stub hata")
+            return None
+
+        batch = bool(response_schema and "kararlar" in response_schema.get("properties", {}))
+        return self.behavior.respond(prompt, batch=batch)
+
+    def generate_json(self, prompt, system_prompt=None):
+        response_text = self.generate(prompt, system_prompt, temperature=0.1)
+        return json.loads(response_text) if response_text else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ollama uyumlu stub LLM sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-429-rate", type=float, default=0.0)
+    parser.add_argument("--burst-429-length", type=int, default=5)
+    parser.add_argument("--load-seconds", type=float, default=2.5)
+    parser.add_argument("--think", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    behavior = StubBehavior(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                            error_rate=args.error_rate, burst_429_rate=args.burst_429_rate,
+                            burst_429_length=args.burst_429_length, think=args.think,
+                            load_seconds=args.load_seconds, seed=args.seed)
+    server = create_stub_server(args.host, args.port, behavior)
+    logger.info(f"🧪 Stub LLM sunucusu http://{args.host}:{args.port} adresinde (model: {config.LLM_MODEL})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Stub LLM sunucusu durduruldu")
+        server.server_close()
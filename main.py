@@ -9,15 +9,21 @@ import os
 import webbrowser
 import threading
 import subprocess
+from concurrent.futures import as_completed
 from datetime import datetime
 import json
 import config
 from core.broker_yfinance import YFinanceBroker
 from core.data_fetcher import DataFetcher
+from core.mark_to_market import MarkToMarket
 from core.risk_manager import RiskManager
+from database.command_queue import CommandQueue
+from database.simulated_trades_db import SimulatedTradeStore
 from filters.stage1_technical import TechnicalFilter
 from filters.stage2_news import NewsFilter
 from filters.stage3_llm import LLMDecisionEngine
+from filters.change_gate import ChangeGate
+from llm.dispatcher import LLMDispatcher
 from utils.logger import setup_logger
 from utils.economic_calendar import EconomicCalendar
 from utils.formatter import UIFormatter
@@ -172,21 +178,28 @@ def initialize_system():
         "news_filter": news_filter,
         "news_db": news_db, # Haber veritabanı erişimi
         "economic_calendar": economic_calendar,
-        "llm_engine": llm_engine
+        "llm_engine": llm_engine,
+        "llm_dispatcher": None,  # LLM motoruyla birlikte gecikmeli başlatılır
+        # Değişmeyen semboller için 3. aşamayı atlayan kapı
+        "change_gate": ChangeGate() if getattr(config, 'ENABLE_CHANGE_GATE', True) else None
     }
 
 
 # --- Simulated trades helpers (for DRY_RUN / suggestion-only mode) ---
-SIM_TRADES_FILE = os.path.join('data', 'simulated_trades.json')
+SIM_STORE = None
+
+def get_sim_store():
+    """Simüle işlem deposunu ilk ihtiyaçta açar (eski simulated_trades.json bir kez içe aktarılır)"""
+    global SIM_STORE
+    if SIM_STORE is None:
+        SIM_STORE = SimulatedTradeStore()
+    return SIM_STORE
 
 def load_simulated_trades():
     try:
-        if os.path.exists(SIM_TRADES_FILE):
-            with open(SIM_TRADES_FILE, 'r', encoding='utf-8') as sf:
-                return json.load(sf)
+        return get_sim_store().all_trades()
     except Exception:
-        pass
-    return []
+        return []
 
 
 def save_result_if_changed(symbol, data, archive=True):
@@ -207,82 +220,21 @@ def save_result_if_changed(symbol, data, archive=True):
         except Exception:
             pass
 
-def save_simulated_trades(trades):
-    try:
-        os.makedirs(os.path.dirname(SIM_TRADES_FILE), exist_ok=True)
-        with open(SIM_TRADES_FILE, 'w', encoding='utf-8') as sf:
-            json.dump(trades, sf, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
 def add_simulated_trade(trade):
-    trades = load_simulated_trades()
-    trades.append(trade)
-    save_simulated_trades(trades)
+    get_sim_store().add(trade)
 
 def update_simulated_trades(components):
-    """Refresh current prices for simulated trades and compute unrealized P/L."""
-    trades = load_simulated_trades()
-    updated = False
-    for t in trades:
-        try:
-            p = components['data_fetcher'].get_current_price(t.get('symbol'))
-            price = None
-            if isinstance(p, dict):
-                price = p.get('mid') or p.get('price')
-            else:
-                try:
-                    price = float(p)
-                except Exception:
-                    price = None
-
-            if price is None:
-                continue
-
-            t['current_price'] = price
-
-            # Ensure notional exists (fallback)
-            if t.get('notional_usd') is None:
-                try:
-                    t['notional_usd'] = round((t.get('lot', 0) or 0) * 100000 * (t.get('entry_price') or price), 2)
-                except Exception:
-                    t['notional_usd'] = None
-
-            # Compute unrealized USD and percent (BUY positive, SELL inverted)
-            if t.get('entry_price'):
-                try:
-                    change = (price - float(t['entry_price'])) / float(t['entry_price'])
-                    if t.get('direction', '').upper() == 'SELL':
-                        change = -change
-                    notional = float(t.get('notional_usd') or 0)
-                    t['unrealized_usd'] = round(change * notional, 2)
-                    t['unrealized_pct'] = round(change * 100, 4)
-                except Exception:
-                    t['unrealized_usd'] = 0.0
-                    t['unrealized_pct'] = 0.0
-
-            updated = True
-        except Exception:
-            continue
+    """
+    Açık simüle işlemleri toplu olarak piyasaya göre değerler: fiyatlar benzersiz
+    semboller için tek seferde alınır, yalnızca değişen satırlar yazılır.
 
-    if updated:
-        save_simulated_trades(trades)
-    return trades
+    Döner:
+        simulated_trades_summary ile aynı alanlara sahip güncel özet
+    """
+    return MarkToMarket(get_sim_store(), components['data_fetcher']).run()
 
 def simulated_trades_summary():
-    trades = load_simulated_trades()
-    total_unreal = sum((t.get('unrealized_usd') or 0) for t in trades if t.get('status') == 'OPEN')
-    total_notional = sum((t.get('notional_usd') or 0) for t in trades if t.get('status') == 'OPEN')
-    total_realized = sum((t.get('realized_usd') or 0) for t in trades if t.get('status') == 'CLOSED')
-    pct = (total_unreal / total_notional * 100) if total_notional else 0.0
-    return {
-        'count_open': sum(1 for t in trades if t.get('status') == 'OPEN'),
-        'count_closed': sum(1 for t in trades if t.get('status') == 'CLOSED'),
-        'total_unrealized_usd': round(total_unreal,2),
-        'total_notional_usd': round(total_notional,2),
-        'total_realized_usd': round(total_realized,2),
-        'total_unrealized_pct': round(pct,4)
-    }
+    return get_sim_store().summary()
 
 
 def pip_multiplier(symbol: str):
@@ -361,22 +313,103 @@ def open_simulated_trade_from_spec(spec, components):
         return None
 
 
+def execute_position_plan(components, plan_data, latest_results=None):
+    """
+    Pozisyon planını simüle işlemlere uygular: açık işlemi olmayan ve marjı
+    serbest bakiyeye sığan her plan kalemi için işlem açılır. SL/TP sembolün
+    en son web sonucundan alınır.
+
+    Argümanlar:
+        components: Bileşen sözlüğü (broker, data_fetcher)
+        plan_data: position_plan.json kalemleri
+        latest_results: Sembol başına son web sonuçları (varsayılan: ui.results.latest_by_symbol())
+    """
+    # Determine available free balance
+    try:
+        if getattr(config, 'DRY_RUN', False):
+            initial_balance = float(getattr(config, 'VIRTUAL_BALANCE', 100.0))
+        else:
+            initial_balance = float(components['broker'].get_balance() or 0)
+    except Exception:
+        initial_balance = 100.0
+
+    # Calculate current free balance by subtracting margin of open trades
+    trades = get_sim_store().open_trades()
+    used_margin = sum(t.get('margin_required') or 0 for t in trades)
+    free_bal = max(0.0, initial_balance - used_margin)
+
+    for item in plan_data:
+        try:
+            sym = item['symbol']
+            # check if exists
+            already_open = False
+            for t in trades:
+                if t['symbol'] == sym and t['status'] == 'OPEN':
+                    already_open = True; break
+            if already_open: continue
+
+            lot = float(item.get('lot', 0.01))
+            entry = item.get('entry')
+            if not entry:
+                cp = components['data_fetcher'].get_current_price(sym)
+                entry = float(cp) if cp else None
+            
+            if not entry: continue
+
+            notional = compute_notional(sym, lot, entry)
+            leverage = 100.0 # Assumed leverage
+            margin_req = (notional or 0) / leverage
+
+            if free_bal >= margin_req:
+                spec = {
+                    'symbol': sym,
+                    'direction': item.get('decision'),
+                    'lot': lot,
+                    'entry': entry,
+                    'stop_loss': None, # risk manager handles it in real trades, here we can fetch from signal
+                    'take_profit': None,
+                    'leverage': leverage
+                }
+                # Fetch TP/SL from web results for this signal
+                rec = ui.results.latest(sym)
+                if rec is None:
+                    if latest_results is None:
+                        latest_results = ui.results.latest_by_symbol()
+                    rec = next((s for s in latest_results
+                                if s.get('symbol') == sym or s.get('display_name') == sym), None)
+                if rec is not None:
+                    spec['stop_loss'] = rec.get('data', {}).get('stop_loss')
+                    spec['take_profit'] = rec.get('data', {}).get('take_profit')
+                
+                t = open_simulated_trade_from_spec(spec, components)
+                if t:
+                    free_bal -= margin_req
+                    logger.info(f"✅ Bot Planı Uyguladı: {sym} işlem açıldı. Lot: {lot}")
+        except Exception as e:
+            logger.error(f"Plan kalemi uygulanamadı ({item.get('symbol')}): {e}")
+            continue
+    
+    # Save stats summary
+    try:
+        summary = simulated_trades_summary()
+        ui.save_result_for_web('SIMULATED_TRADES_SUMMARY', summary)
+    except Exception:
+        pass
+
+
 def close_simulated_trade_by_spec(spec, components):
     # spec may have 'id' or 'symbol' and optional 'close_price'
     try:
-        trades = load_simulated_trades()
-        changed = False
-        for t in trades:
-            if t.get('status') != 'OPEN':
-                continue
-            match = False
-            if spec.get('id') and spec.get('id') == t.get('id'):
-                match = True
-            elif spec.get('symbol') and spec.get('symbol') == t.get('symbol'):
-                match = True
-            if not match:
-                continue
+        store = get_sim_store()
+        # Eşleşme eskisi gibi: id'si veya sembolü tutan açık işlemler
+        trades = {}
+        if spec.get('id'):
+            trades.update((t['id'], t) for t in store.open_trades(trade_id=spec.get('id')))
+        if spec.get('symbol'):
+            trades.update((t['id'], t) for t in store.open_trades(symbol=spec.get('symbol')))
 
+        changed = False
+        for t in trades.values():
             close_price = spec.get('close_price')
             if close_price is None and components is not None:
                 try:
@@ -399,71 +432,168 @@ def close_simulated_trade_by_spec(spec, components):
             except Exception:
                 realized = 0.0
 
-            t['status'] = 'CLOSED'
-            t['closed_at'] = datetime.now().isoformat()
-            t['close_price'] = close_price
-            t['realized_usd'] = realized
-            t['unrealized_usd'] = 0.0
-            t['unrealized_pct'] = 0.0
-            changed = True
+            # Koşullu UPDATE: başka bir yazar önce kapattıysa ikinci kez kapanmaz
+            changed = store.close(t['id'], close_price, realized) or changed
 
-        if changed:
-            save_simulated_trades(trades)
         return changed
     except Exception as e:
         logger.error(f"close_simulated_trade failed: {e}")
         return False
 
 
-def watch_manual_trade_files(components):
-    """If files `data/open_trade.json` or `data/close_trade.json` exist, process and remove them."""
+def close_triggered_trade(trade, outcome, price, components):
+    """TP/SL'i tetiklenen bekleyen işlemi kapatır ve simüle işlemi senkronlar"""
+    profit_pips = abs(price - trade["entry_price"]) * (10000 if "JPY" not in trade["symbol"] else 100)
+    updated = components["llm_engine"].learning_system.update_trade_outcome(
+        trade_id=trade["id"],
+        outcome=outcome,
+        profit_pips=profit_pips,
+        close_price=price
+    )
+    if not updated:
+        # Defter bayattı (işlem başka süreçte kapatıldı/silindi): sim işleme dokunma
+        return False
+    
+    # SYNC: simulated_trades.json'daki kaydı da kapat
     try:
-        open_path = os.path.join('data', 'open_trade.json')
-        if os.path.exists(open_path):
-            try:
-                with open(open_path, 'r', encoding='utf-8') as of:
-                    spec = json.load(of)
-                # support list or single
-                if isinstance(spec, list):
-                    for s in spec:
-                        t = open_simulated_trade_from_spec(s, components)
-                        if t:
-                            logger.info(f"🔁 Manuel sim trade açıldı: {t.get('id')} {t.get('symbol')} {t.get('direction')} {t.get('lot')}")
-                elif isinstance(spec, dict):
-                    t = open_simulated_trade_from_spec(spec, components)
-                    if t:
-                        logger.info(f"🔁 Manuel sim trade açıldı: {t.get('id')} {t.get('symbol')} {t.get('direction')} {t.get('lot')}")
-            except Exception as e:
-                logger.error(f"open_trade.json işlenirken hata: {e}")
+        close_simulated_trade_by_spec({
+            'symbol': trade["symbol"],
+            'close_price': price
+        }, components)
+    except Exception:
+        pass
+    return True
+
+
+def current_price(components, symbol):
+    """DataFetcher'dan güncel fiyatı sayı olarak döndürür (alınamazsa None)"""
+    try:
+        price_info = components["data_fetcher"].get_current_price(symbol)
+        if price_info is None:
+            return None
+        if isinstance(price_info, dict):
+            return price_info.get("mid")
+        # Eğer dict değilse, belki broker doğrudan fiyat döndü
+        return float(price_info)
+    except Exception:
+        return None
+
+
+def check_pending_trades(components):
+    """
+    Bekleyen işlemleri denetler: her sembol için fiyat bir kez alınır, TP/SL'i
+    tetiklenen işlemler kapatılır, çok uzun süredir açık kalanlar için LLM'e
+    kapatma sorulur.
+    """
+    learning = components["llm_engine"].learning_system
+    book = learning.pending_book
+    if len(book):
+        logger.info(f"🔍 {len(book)} adet bekleyen işlem denetleniyor...")
+    for symbol in book.symbols():
+        # Güncel fiyatı al (DataFetcher üzerinden, daha güvenli) - sembol başına bir kez
+        price = current_price(components, symbol)
+        if price is None: continue
+
+        # TP/SL Kontrolü: tetiklenen işlemler sıralı seviyelerden bisect ile bulunur
+        closed = book.on_price(symbol, price, lambda trade, outcome, p: close_triggered_trade(trade, outcome, p, components))
+        if closed:
+            # Pattern analizini tetikle
+            learning.analyze_patterns(min_samples=1) # Test için düşük eşik
+
+        # Tetiklenmeyen işlemler: çok uzun süredir açıksa LLM'e kapatma sorulur
+        for trade in book.trades(symbol):
+            # Eğer 2 günden uzun süredir açık kaldıysa LLM'e sorup zorunlu kapatma uygula
             try:
-                os.remove(open_path)
+                from datetime import datetime as _dt
+                age = _dt.now() - _dt.fromisoformat(trade["timestamp"]) if isinstance(trade.get("timestamp"), str) else None
             except Exception:
-                pass
+                age = None
+            close_after_days = getattr(config, 'CLOSE_PENDING_AFTER_DAYS', 2)
+            if age is not None and age.total_seconds() >= close_after_days * 86400:
+                logger.info(f"⏳ Trade ID {trade['id']} açık {age.days} gün; LLM'e kapatma kararı soruluyor...")
+                try:
+                    decision = components["llm_engine"].self_assess({"symbol": trade["symbol"], "entry_price": trade["entry_price"], "current_price": price, "direction": trade["direction"], "context": trade})
+                    # Expect decision like {'action': 'CLOSE'|'KEEP', 'reason': '...'}
+                    if isinstance(decision, dict) and decision.get('action') == 'CLOSE':
+                        # Force close and add cooldown
+                        if not components["llm_engine"].learning_system.force_close_trade(trade["id"], close_price=price, reason='LLM_FORCED_CLOSE'):
+                            continue
+
+                        # SYNC: simulated_trades.json'daki kaydı da kapat
+                        try:
+                            close_simulated_trade_by_spec({
+                                'symbol': trade["symbol"],
+                                'close_price': price
+                            }, components)
+                        except Exception:
+                            pass
+                        # Add re-entry cooldown
+                        try:
+                            cooldown_hours = getattr(config, 'REENTRY_COOLDOWN_HOURS', 5)
+                            tol = getattr(config, 'REENTRY_PRICE_TOLERANCE', 0.001)
+                            components["llm_engine"].learning_system.add_entry_cooldown(trade["symbol"], price, cooldown_hours, tol)
+                        except Exception as _e:
+                            logger.error(f"Cooldown eklenemedi: {_e}")
+                except Exception as e:
+                    logger.error(f"LLM self-assess hatası: {e}")
+
+
+def apply_open_trade_command(payload, command_id, components):
+    """Kuyruktan gelen manuel işlem açma komutu (tekrar uygulanırsa aynı işlemi döndürür)"""
+    spec = dict(payload)
+    spec.setdefault('id', f"cmd-{command_id}")
+    existing = get_sim_store().get(spec['id'])
+    if existing is not None:
+        return existing
+    trade = open_simulated_trade_from_spec(spec, components)
+    if trade is None:
+        raise RuntimeError("Simüle işlem açılamadı")
+    logger.info(f"🔁 Manuel sim trade açıldı: {trade.get('id')} {trade.get('symbol')} {trade.get('direction')} {trade.get('lot')}")
+    return trade
+
+
+def apply_close_trade_command(payload, command_id, components):
+    """Kuyruktan gelen manuel işlem kapama komutu (koşullu kapatma: tekrar uygulanırsa etkisiz)"""
+    if not payload.get('id') and not payload.get('symbol'):
+        raise ValueError("Kapatma için 'id' veya 'symbol' gerekli")
+    closed = close_simulated_trade_by_spec(payload, components)
+    if closed:
+        logger.info(f"🔁 Manuel sim trade kapatıldı {payload}")
+    return {"closed": closed}
+
+
+def start_command_worker(components, stop_event):
+    """
+    Dashboard'un komut kuyruğunu (manuel işlem açma/kapama) arka planda boşaltır.
+    Yeni komut birkaç on milisaniye içinde fark edilir; ana döngünün beklemesine bağlı değildir.
+    """
+    queue = CommandQueue()
+    queue.requeue_stale()
+    handlers = {
+        "open_trade": lambda payload, command_id: apply_open_trade_command(payload, command_id, components),
+        "close_trade": lambda payload, command_id: apply_close_trade_command(payload, command_id, components)
+    }
 
-        close_path = os.path.join('data', 'close_trade.json')
-        if os.path.exists(close_path):
+    def _run():
+        while not stop_event.is_set():
             try:
-                with open(close_path, 'r', encoding='utf-8') as cf:
-                    spec = json.load(cf)
-                if isinstance(spec, list):
-                    for s in spec:
-                        if close_simulated_trade_by_spec(s, components):
-                            logger.info(f"🔁 Manuel sim trade kapatıldı (list) {s}")
-                elif isinstance(spec, dict):
-                    if close_simulated_trade_by_spec(spec, components):
-                        logger.info(f"🔁 Manuel sim trade kapatıldı {spec}")
+                if queue.wait(timeout=1.0):
+                    queue.drain(handlers)
             except Exception as e:
-                logger.error(f"close_trade.json işlenirken hata: {e}")
-            try:
-                os.remove(close_path)
-            except Exception:
-                pass
-    except Exception:
-        pass
+                logger.error(f"⚠️ Komut kuyruğu hatası: {e}")
+                stop_event.wait(1)
 
-def process_symbol(symbol, components):
+    thread = threading.Thread(target=_run, daemon=True, name="command-worker")
+    thread.start()
+    logger.info("📬 Manuel işlem komut kuyruğu dinleniyor")
+    return thread
+
+def prepare_symbol(symbol, components):
     """
-    Tek bir sembolü üç kademeli filtreden geçirir
+    Sembolü 1. ve 2. aşamadan geçirir ve LLM bağlamını hazırlar
+    
+    Döner:
+        3. aşamaya gidecek aday sözlüğü veya sembol elendiyse None
     """
     ui.print_market_header(symbol)
     
@@ -472,7 +602,6 @@ def process_symbol(symbol, components):
     technical_filter = components["technical_filter"]
     news_filter = components["news_filter"]
     economic_calendar = components["economic_calendar"]
-    risk_manager = components["risk_manager"]
     broker = components["broker"]
     
     # Açık pozisyon kontrolü - AYNI SEMBOLDE İŞLEM VAR MI?
@@ -480,10 +609,11 @@ def process_symbol(symbol, components):
     for pos in open_positions:
         if pos.get('symbol') == symbol:
             logger.info(f"ℹ️ {symbol} - Zaten açık bir pozisyon var, analiz atlanıyor.")
-            return False
+            return None
 
     # LLM için gelecek olayları hazırla
     upcoming_events = economic_calendar.get_upcoming_events(symbol=symbol)
+    stage_started = time.perf_counter()
 
     # ========================================
     # 1. AŞAMA: TEKNİK SERT FİLTRE
@@ -498,16 +628,17 @@ def process_symbol(symbol, components):
     
     if not market_data or market_data.get("current_price") is None:
         logger.warning(f"⚠️ {symbol} - Piyasa verisi alınamadı")
-        return False
+        return None
     
     current_price = market_data["current_price"]
     logger.info(f"💰 {symbol} Güncel Fiyat: {current_price}")
     
     stage1_result = technical_filter.analyze(market_data)
+    stage1_ms = (time.perf_counter() - stage_started) * 1000
     
     if not stage1_result["pass"]:
         logger.info(f"❌ {symbol} - 1. Aşama BAŞARISIZ (Teknik Filtre): {stage1_result['reason']}")
-        return False
+        return None
     
     ui.print_stage_result(1, stage1_result, symbol)
     
@@ -525,23 +656,9 @@ def process_symbol(symbol, components):
         hours_lookback=config.NEWS_LOOKBACK_HOURS
     )
     
+    stage2_ms = (time.perf_counter() - stage_started) * 1000 - stage1_ms
     ui.print_stage_result(2, stage2_result, symbol)
     
-    # ========================================
-    # 3. AŞAMA: LLM KARARI (SNIPER MODU)
-    # ========================================
-    # Hedef: Strateji bilgisiyle son doğrulama
-    # ŞİMDİ LLM'i yüklüyoruz (2-5 saniye, GPU gerekir)
-    
-    if components["llm_engine"] is None:
-        logger.info("🔧 LLM Karar Motoru ilk kez yükleniyor...")
-        components["llm_engine"] = LLMDecisionEngine(
-            model_name=config.LLM_MODEL,
-            rag_data_path=config.RAG_DATA_PATH
-        )
-    
-    llm_engine = components["llm_engine"]
-    
     # LLM için bağlam hazırla
     context = {
         "symbol": symbol,
@@ -554,8 +671,199 @@ def process_symbol(symbol, components):
         "direction": trade_direction
     }
     
+    # Değişiklik kapısı: 1-2. aşama imzası son LLM analizinden beri aynıysa 3. aşamayı atla
+    signature = None
+    change_gate = components.get("change_gate")
+    if change_gate is not None:
+        signature = change_gate.signature(context)
+        run_stage3, reason = change_gate.check(symbol, signature)
+        if not run_stage3:
+            logger.info(f"⏭️ {symbol} - 3. Aşama atlandı: {reason}")
+            skip_info = change_gate.skip_record(symbol, current_price)
+            if skip_info is not None:
+                ui.save_result_for_web(symbol, skip_info)
+            return None
+        logger.debug(f"🔁 {symbol} - 3. Aşama çalışacak: {reason}")
+    
+    return {
+        "symbol": symbol,
+        "context": context,
+        "market_data": market_data,
+        "stage1_result": stage1_result,
+        "stage2_result": stage2_result,
+        "gate_signature": signature,
+        # Aşama gecikmeleri (analitik dışa aktarım için karar arşivine yazılır)
+        "stage_timings": {"stage1_ms": round(stage1_ms, 1), "stage2_ms": round(stage2_ms, 1)},
+        "prepared_at": time.perf_counter()
+    }
+
+
+def get_llm_engine(components):
+    """LLM Karar Motorunu ilk ihtiyaçta yükler (2-5 saniye, GPU gerekir)"""
+    if components["llm_engine"] is None:
+        logger.info("🔧 LLM Karar Motoru ilk kez yükleniyor...")
+        components["llm_engine"] = LLMDecisionEngine(
+            model_name=config.LLM_MODEL,
+            rag_data_path=config.RAG_DATA_PATH
+        )
+    return components["llm_engine"]
+
+
+def process_symbol(symbol, components):
+    """
+    Tek bir sembolü üç kademeli filtreden geçirir
+    """
+    candidate = prepare_symbol(symbol, components)
+    if candidate is None:
+        return False
+    
+    # ========================================
+    # 3. AŞAMA: LLM KARARI (SNIPER MODU)
+    # ========================================
+    # Hedef: Strateji bilgisiyle son doğrulama
+    
+    llm_engine = get_llm_engine(components)
+    
     # LLM'e Sor: "Bu işlemi yapmalı mıyım?"
-    stage3_result = llm_engine.make_decision(context)
+    stage3_result = llm_engine.make_decision(candidate["context"])
+    return finish_symbol(candidate, stage3_result, components)
+
+
+def process_symbols_batch(symbols, components):
+    """
+    Pass'teki tüm sembolleri 1. ve 2. aşamadan geçirir, 2. aşamayı geçen adaylar
+    için 3. aşamayı tek (toplu) LLM isteğiyle yapar. Toplu yanıtta eksik veya bozuk
+    çıkan semboller tek tek sorulur; LLM_CONCURRENT_MODE da açıksa bu tekli
+    istekler LLM dağıtıcısında eşzamanlı yürür.
+    
+    Döner:
+        İşlem açılan sembol sayısı
+    """
+    candidates = []
+    for symbol in symbols:
+        try:
+            candidate = prepare_symbol(symbol, components)
+            if candidate is not None:
+                candidates.append(candidate)
+        except Exception as e:
+            logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
+    
+    if not candidates:
+        return 0
+    
+    llm_engine = get_llm_engine(components)
+    concurrent = getattr(config, 'LLM_CONCURRENT_MODE', False)
+    decisions = {}
+    if len(candidates) >= getattr(config, 'LLM_BATCH_MIN_CANDIDATES', 2):
+        logger.info(f"📦 {len(candidates)} aday için toplu LLM kararı isteniyor...")
+        decisions = llm_engine.make_decisions_batch([c["context"] for c in candidates],
+                                                    fallback=not concurrent)
+    
+    # Toplu yanıtta kararı olmayanlar dağıtıcıya: ana iş parçacığı sırayla beklemez
+    futures = {}
+    if concurrent:
+        pending = [c for c in candidates if c["symbol"] not in decisions]
+        if pending:
+            dispatcher = get_llm_dispatcher(components)
+            futures = {dispatcher.submit_decision(c["context"]): c for c in pending}
+    
+    opened = 0
+    for candidate in candidates:
+        symbol = candidate["symbol"]
+        if futures and symbol not in decisions:
+            continue
+        try:
+            stage3_result = decisions.get(symbol) or llm_engine.make_decision(candidate["context"])
+            if finish_symbol(candidate, stage3_result, components):
+                opened += 1
+        except Exception as e:
+            logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
+    
+    for future in as_completed(futures):
+        candidate = futures[future]
+        symbol = candidate["symbol"]
+        try:
+            if finish_symbol(candidate, future.result(), components):
+                opened += 1
+        except Exception as e:
+            logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
+    return opened
+
+
+def get_llm_dispatcher(components):
+    """LLM dağıtıcısını (ve gerekirse motoru) ilk ihtiyaçta başlatır"""
+    if components.get("llm_dispatcher") is None:
+        components["llm_dispatcher"] = LLMDispatcher(get_llm_engine(components))
+    return components["llm_dispatcher"]
+
+
+def stop_llm_dispatcher(components):
+    """Kapanışta kuyruktaki LLM işlerini iptal eder"""
+    dispatcher = components.get("llm_dispatcher")
+    if dispatcher is not None:
+        dispatcher.shutdown()
+
+
+def process_symbols_concurrent(symbols, components):
+    """
+    Sembolleri 1. ve 2. aşamadan sırayla geçirir; 2. aşamayı geçen her aday
+    hemen LLM dağıtıcısına verilir ve diğer semboller işlenirken arka planda
+    karara bağlanır. Biten kararlar geliş sırasıyla sonuçlandırılır.
+    
+    Döner:
+        İşlem açılan sembol sayısı
+    """
+    dispatcher = None
+    futures = {}
+    for symbol in symbols:
+        try:
+            candidate = prepare_symbol(symbol, components)
+            if candidate is None:
+                continue
+            if dispatcher is None:
+                dispatcher = get_llm_dispatcher(components)
+            futures[dispatcher.submit_decision(candidate["context"])] = candidate
+        except Exception as e:
+            logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
+    
+    opened = 0
+    for future in as_completed(futures):
+        candidate = futures[future]
+        symbol = candidate["symbol"]
+        try:
+            if finish_symbol(candidate, future.result(), components):
+                opened += 1
+        except Exception as e:
+            logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
+    return opened
+
+
+def finish_symbol(candidate, stage3_result, components):
+    """
+    3. aşama kararını işler: web kaydı, düşük güven yeniden denemeleri,
+    risk yönetimi ve emir gönderimi
+    
+    Döner:
+        İşlem açıldıysa True
+    """
+    symbol = candidate["symbol"]
+    context = candidate["context"]
+    market_data = candidate["market_data"]
+    stage1_result = candidate["stage1_result"]
+    stage2_result = candidate["stage2_result"]
+    
+    risk_manager = components["risk_manager"]
+    broker = components["broker"]
+    llm_engine = get_llm_engine(components)
+
+    # Kota dolduğu için ertelenen karar: analiz sayılmaz, sonraki pass'te tekrar denenir
+    if stage3_result.get("deferred"):
+        logger.info(f"⏳ {symbol} - 3. Aşama ertelendi (kota): {stage3_result.get('reasoning')}")
+        return False
+
+    # 3. aşama çalıştı: kapı bu imzayı ve kararı hatırlasın
+    if components.get("change_gate") is not None:
+        components["change_gate"].record(symbol, candidate.get("gate_signature"), stage3_result)
 
     # Kaydet: her LLM analizi hemen web'e kaydedilsin (intermediate)
     try:
@@ -570,6 +878,10 @@ def process_symbol(symbol, components):
         # ensure entry price present for display
         temp_save.setdefault('entry_price', float(market_data.get('current_price', 0) or 0))
         temp_save.update(analysis_meta)
+        if candidate.get("stage_timings"):
+            # 3. aşama: aday hazırlandıktan karar işlenene kadar (toplu/dağıtıcı kuyruğu dahil)
+            temp_save["stage_timings"] = dict(candidate["stage_timings"],
+                                              stage3_ms=round((time.perf_counter() - candidate["prepared_at"]) * 1000, 1))
         ui.save_result_for_web(symbol, temp_save, archive=True)
     except Exception:
         pass
@@ -613,44 +925,20 @@ def process_symbol(symbol, components):
         logger.info(f"❌ {symbol} - 3. Aşama REDDEDİLDİ: {stage3_result['reasoning']}")
         return False
     
-    # Eğer LLM düşük güven verirse, belirlenen sayıda yeniden dene (force_publish varsa atla).
+    # Eğer LLM düşük güven verirse, aynı bağlamla eşzamanlı örnekler alıp oyla (force_publish varsa atla).
     if stage3_result.get("confidence", 0) < config.MIN_CONFIDENCE and not stage3_result.get('force_publish', False):
-        logger.info(f"❌ {symbol} - İlk karar düşük güven seviyesi ({stage3_result['confidence']}% < {config.MIN_CONFIDENCE}%). Yeniden denenecek...")
-
-        retry_count = 0
-        improved = False
-        last_result = stage3_result
-
-        while retry_count < getattr(config, 'MAX_CONFIDENCE_RETRIES', 5):
-            retry_count += 1
-            try:
-                time.sleep(getattr(config, 'CONFIDENCE_RETRY_DELAY', 5))
-                # Güncel bağlam için fiyatı güncelle
-                market_data = data_fetcher.get_multi_timeframe_data(
-                    symbol=symbol,
-                    timeframes=list(config.TIMEFRAMES.keys())
-                )
-                context["current_price"] = market_data.get("current_price", context.get("current_price"))
-
-                # Yeni karar al
-                last_result = llm_engine.make_decision(context)
-                logger.info(f"🔁 {symbol} - Yeniden deneme {retry_count}: Güven %{last_result.get('confidence',0)}")
-                # Save this retry analysis to web results (sadece log'a yazalım, web'i kirletmeyelim)
-                try:
-                    logger.debug(f"🔁 {symbol} - Yeniden deneme {retry_count} kaydedildi (internal)")
-                except Exception:
-                    pass
+        logger.info(f"❌ {symbol} - İlk karar düşük güven seviyesi ({stage3_result['confidence']}% < {config.MIN_CONFIDENCE}%). Öz-tutarlılık örneklemesi yapılacak...")
 
-                if last_result.get("confidence", 0) >= config.MIN_CONFIDENCE:
-                    improved = True
-                    stage3_result = last_result
-                    logger.info(f"✅ {symbol} - Güven arttı: %{stage3_result['confidence']}")
-                    break
-            except Exception as e:
-                logger.error(f"⚠️ {symbol} - Güven yeniden deneme hatası: {e}")
+        last_result = llm_engine.make_decision_consistent(context)
+        if last_result.get("deferred"):
+            logger.info(f"⏳ {symbol} - Öz-tutarlılık örneklemesi ertelendi (kota)")
+            return False
 
-        if not improved:
-            # 5 denemeden sonra da artmadıysa düşük güven olarak işaretle ve web'e kaydet
+        if last_result.get("confidence", 0) >= config.MIN_CONFIDENCE:
+            stage3_result = last_result
+            logger.info(f"✅ {symbol} - Güven arttı: %{stage3_result['confidence']}")
+        else:
+            # Oylama sonrası da artmadıysa düşük güven olarak işaretle ve web'e kaydet
             logger.info(f"❌ {symbol} - Düşük güven seviyesi devam ediyor ({last_result.get('confidence',0)}%). Web'de 'düşük güven' olarak işaretlenecek.")
             signal_info = {
                 "decision": f"DÜŞÜK GÜVEN ({last_result.get('confidence',0)}%)",
@@ -905,11 +1193,36 @@ def process_symbol(symbol, components):
         return False
 
 from update_news import update_news
+from utils.news_ingestion import NewsSignal
 
 def run_dashboard_server():
     """Dashboard sunucusunu arka planda çalıştırır"""
     subprocess.run(["python", "run_dashboard.py"])
 
+def start_news_ingestion_daemon():
+    """Haber alım servisini ayrı bir süreç olarak başlatır (ana döngü HTTP beklemez)"""
+    import sys
+    try:
+        proc = subprocess.Popen([sys.executable, "update_news.py", "--daemon"])
+        logger.info(f"📰 Haber alım servisi başlatıldı (PID {proc.pid})")
+        return proc
+    except Exception as e:
+        logger.error(f"⚠️ Haber alım servisi başlatılamadı: {e}")
+        return None
+
+def stop_news_ingestion_daemon(proc):
+    """Haber alım servisini kapatır"""
+    if proc is None:
+        return
+    try:
+        proc.terminate()
+        proc.wait(timeout=10)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+
 def main():
     """Ana işlem döngüsü"""
     import sys
@@ -940,6 +1253,17 @@ def main():
         logger.error("❌ Sistem başlatma başarısız")
         return
     
+    # Haber alım servisi (ayrı süreç) ve ana döngüyü uyandıran sinyal
+    news_daemon = None
+    if getattr(config, 'NEWS_INGEST_DAEMON', False):
+        news_daemon = start_news_ingestion_daemon()
+    news_signal = NewsSignal()
+    last_news_seq = int(news_signal.read().get("seq", 0))
+    
+    # Dashboard'dan gelen manuel işlem komutları (kalıcı kuyruk)
+    command_stop = threading.Event()
+    start_command_worker(components, command_stop)
+    
     # Ana döngü
     try:
         # Veri dizininin var olduğundan emin ol
@@ -958,18 +1282,19 @@ def main():
             # Update simulated trades as early as possible each loop
             try:
                 if components is not None:
-                    updated_trades = update_simulated_trades(components)
+                    summary = update_simulated_trades(components)
                     # push a short summary to web/dashboard
                     try:
-                        summary = simulated_trades_summary()
                         ui.save_result_for_web('SIMULATED_TRADES_SUMMARY', summary)
                     except Exception:
                         pass
             except Exception:
                 pass
             
-            # Haberleri API'den güncelle (Sadece 24 saatte bir)
-            if time.time() - last_news_update > NEWS_UPDATE_INTERVAL:
+            # Haberleri API'den güncelle (Servis çalışmıyorsa sadece 24 saatte bir)
+            if news_daemon is not None and news_daemon.poll() is None:
+                logger.debug("ℹ️ Haberler ayrı alım servisi tarafından güncelleniyor.")
+            elif time.time() - last_news_update > NEWS_UPDATE_INTERVAL:
                 try:
                     logger.info("🌍 Dış kaynaktan (API) haberler güncelleniyor (24 saatlik rutin)...")
                     update_news()
@@ -1001,16 +1326,9 @@ def main():
                         logger.info("🔁 Monitoring resumed — reconcile başlatılıyor...")
                         if "llm_engine" in components and components["llm_engine"] is not None:
                             try:
-                                # Provide a price getter that returns float current price or None
-                                def _price_getter(sym):
-                                    try:
-                                        p = data_fetcher.get_current_price(sym)
-                                        if isinstance(p, dict):
-                                            return p.get('mid')
-                                        return float(p)
-                                    except Exception:
-                                        return None
-                                components["llm_engine"].learning_system.reconcile_pending_trades_on_resume(_price_getter)
+                                # Price getter that returns float current price or None
+                                components["llm_engine"].learning_system.reconcile_pending_trades_on_resume(
+                                    lambda sym: current_price(components, sym))
                             except Exception as e:
                                 logger.error(f"Reconcile hatası: {e}")
                         # Remove resumed_at so reconciliation runs only once
@@ -1024,84 +1342,7 @@ def main():
 
                 if "llm_engine" in components and components["llm_engine"] is not None:
                     try:
-                        pending_trades = components["llm_engine"].learning_system.get_pending_trades()
-                        if pending_trades:
-                            logger.info(f"🔍 {len(pending_trades)} adet bekleyen işlem denetleniyor...")
-                        for trade in pending_trades:
-                            # Güncel fiyatı al (DataFetcher üzerinden, daha güvenli)
-                            price_info = data_fetcher.get_current_price(trade["symbol"])
-                            if price_info is None: continue
-
-                            price = price_info.get("mid") if isinstance(price_info, dict) else None
-                            if price is None:
-                                # Eğer dict değilse, belki broker doğrudan fiyat döndü
-                                try:
-                                    price = float(price_info)
-                                except Exception:
-                                    continue
-                            
-                            # TP/SL Kontrolü
-                            outcome = None
-                            if trade["direction"] == "BUY":
-                                if price >= trade["take_profit"]: outcome = "WIN"
-                                elif price <= trade["stop_loss"]: outcome = "LOSS"
-                            else: # SELL
-                                if price <= trade["take_profit"]: outcome = "WIN"
-                                elif price >= trade["stop_loss"]: outcome = "LOSS"
-                            
-                            if outcome:
-                                profit_pips = abs(price - trade["entry_price"]) * (10000 if "JPY" not in trade["symbol"] else 100)
-                                components["llm_engine"].learning_system.update_trade_outcome(
-                                    trade_id=trade["id"],
-                                    outcome=outcome,
-                                    profit_pips=profit_pips,
-                                    close_price=price
-                                )
-                                # Pattern analizini tetikle
-                                components["llm_engine"].learning_system.analyze_patterns(min_samples=1) # Test için düşük eşik
-                                
-                                # SYNC: simulated_trades.json'daki kaydı da kapat
-                                try:
-                                    close_simulated_trade_by_spec({
-                                        'symbol': trade["symbol"],
-                                        'close_price': price
-                                    }, components)
-                                except Exception:
-                                    pass
-                            else:
-                                # Eğer 2 günden uzun süredir açık kaldıysa LLM'e sorup zorunlu kapatma uygula
-                                try:
-                                    from datetime import datetime as _dt
-                                    age = _dt.now() - _dt.fromisoformat(trade["timestamp"]) if isinstance(trade.get("timestamp"), str) else None
-                                except Exception:
-                                    age = None
-                                close_after_days = getattr(config, 'CLOSE_PENDING_AFTER_DAYS', 2)
-                                if age is not None and age.total_seconds() >= close_after_days * 86400:
-                                    logger.info(f"⏳ Trade ID {trade['id']} açık {age.days} gün; LLM'e kapatma kararı soruluyor...")
-                                    try:
-                                        decision = components["llm_engine"].self_assess({"symbol": trade["symbol"], "entry_price": trade["entry_price"], "current_price": price, "direction": trade["direction"], "context": trade})
-                                        # Expect decision like {'action': 'CLOSE'|'KEEP', 'reason': '...'}
-                                        if isinstance(decision, dict) and decision.get('action') == 'CLOSE':
-                                            # Force close and add cooldown
-                                            components["llm_engine"].learning_system.force_close_trade(trade["id"], close_price=price, reason='LLM_FORCED_CLOSE')
-                                            
-                                            # SYNC: simulated_trades.json'daki kaydı da kapat
-                                            try:
-                                                close_simulated_trade_by_spec({
-                                                    'symbol': trade["symbol"],
-                                                    'close_price': price
-                                                }, components)
-                                            except Exception:
-                                                pass
-                                            # Add re-entry cooldown
-                                            try:
-                                                cooldown_hours = getattr(config, 'REENTRY_COOLDOWN_HOURS', 5)
-                                                tol = getattr(config, 'REENTRY_PRICE_TOLERANCE', 0.001)
-                                                components["llm_engine"].learning_system.add_entry_cooldown(trade["symbol"], price, cooldown_hours, tol)
-                                            except Exception as _e:
-                                                logger.error(f"Cooldown eklenemedi: {_e}")
-                                    except Exception as e:
-                                        logger.error(f"LLM self-assess hatası: {e}")
+                        check_pending_trades(components)
                     except Exception as e:
                         logger.error(f"⚠️ Bekleyen işlem denetleme hatası: {e}")
 
@@ -1147,43 +1388,45 @@ def main():
             runs = getattr(config, 'LLM_PASS_RUNS', 3)
             post_wait = getattr(config, 'LLM_PASS_WAIT_SECONDS', 300)
 
+            # Bekleme sırasında model VRAM'den atıldıysa 1-2. aşamalarla paralel yeniden yükle
+            llm_client = getattr(components.get("llm_engine"), "llm", None)
+            if getattr(config, 'OLLAMA_PRELOAD', True) and hasattr(llm_client, "warm_up"):
+                llm_client.warm_up(background=True)
+
             for run_idx in range(runs):
                 logger.info(f"🔁 LLM Pass {run_idx+1}/{runs} başlatılıyor...")
-                for symbol in config.SYMBOLS:
-                    try:
-                        process_symbol(symbol, components)
+                if getattr(config, 'LLM_BATCH_MODE', False):
+                    # Toplu mod: 2. aşamayı geçen tüm adaylar tek LLM isteğinde;
+                    # LLM_CONCURRENT_MODE da açıksa tekli geri düşüşler dağıtıcıda
+                    process_symbols_batch(config.SYMBOLS, components)
+
+                    import gc
+                    gc.collect()
+                elif getattr(config, 'LLM_CONCURRENT_MODE', False):
+                    # Eşzamanlı mod: LLM kararları arka planda, 1-2. aşamalar sürerken
+                    process_symbols_concurrent(config.SYMBOLS, components)
+
+                    import gc
+                    gc.collect()
+                else:
+                    for symbol in config.SYMBOLS:
+                        try:
+                            process_symbol(symbol, components)
 
-                        import gc
-                        gc.collect()
+                            import gc
+                            gc.collect()
 
-                        # Küçük aralık, ama aynı sembolün arka arkaya işlenmesini engeller
-                        time.sleep(1)
-                    except Exception as e:
-                        logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
+                            # Küçük aralık, ama aynı sembolün arka arkaya işlenmesini engeller
+                            time.sleep(1)
+                        except Exception as e:
+                            logger.error(f"❌ {symbol} işlenirken hata: {str(e)}")
             
             # After each pass, compute a position plan (allocation) based on latest signals
             try:
                 plan = []
 
-                # load latest web results (if any)
-                wr_path = os.path.join('data', 'web_results.json')
-                if os.path.exists(wr_path):
-                    try:
-                        with open(wr_path, 'r', encoding='utf-8') as wf:
-                            web = json.load(wf)
-                    except Exception:
-                        web = []
-                else:
-                    web = []
-
-                # Keep only latest per symbol (newest first)
-                seen = set()
-                unique = []
-                for s in web:
-                    key = s.get('symbol') or s.get('display_name')
-                    if key and key not in seen:
-                        seen.add(key)
-                        unique.append(s)
+                # Latest web result per symbol (newest first), from the result log's symbol index
+                unique = ui.results.latest_by_symbol()
 
                 for s in unique:
                     data = s.get('data', {})
@@ -1263,100 +1506,40 @@ def main():
                 
                 # Execute Plan
                 try:
-                    def execute_position_plan(components, plan_data):
-                        # Determine available free balance
-                        try:
-                            if getattr(config, 'DRY_RUN', False):
-                                initial_balance = float(getattr(config, 'VIRTUAL_BALANCE', 100.0))
-                            else:
-                                initial_balance = float(components['broker'].get_balance() or 0)
-                        except Exception:
-                            initial_balance = 100.0
-
-                        # Calculate current free balance by subtracting margin of open trades
-                        trades = load_simulated_trades()
-                        used_margin = sum(t.get('margin_required', 0) for t in trades if t.get('status') == 'OPEN')
-                        free_bal = max(0.0, initial_balance - used_margin)
-
-                        for item in plan_data:
-                            try:
-                                sym = item['symbol']
-                                # check if exists
-                                already_open = False
-                                for t in trades:
-                                    if t['symbol'] == sym and t['status'] == 'OPEN':
-                                        already_open = True; break
-                                if already_open: continue
-
-                                lot = float(item.get('lot', 0.01))
-                                entry = item.get('entry')
-                                if not entry:
-                                    cp = components['data_fetcher'].get_current_price(sym)
-                                    entry = float(cp) if cp else None
-                                
-                                if not entry: continue
-
-                                notional = compute_notional(sym, lot, entry)
-                                leverage = 100.0 # Assumed leverage
-                                margin_req = (notional or 0) / leverage
-
-                                if free_bal >= margin_req:
-                                    spec = {
-                                        'symbol': sym,
-                                        'direction': item.get('decision'),
-                                        'lot': lot,
-                                        'entry': entry,
-                                        'stop_loss': None, # risk manager handles it in real trades, here we can fetch from signal
-                                        'take_profit': None,
-                                        'leverage': leverage
-                                    }
-                                    # Fetch TP/SL from web results for this signal
-                                    for s in web:
-                                        if (s.get('symbol') == sym or s.get('display_name') == sym):
-                                            spec['stop_loss'] = s.get('data', {}).get('stop_loss')
-                                            spec['take_profit'] = s.get('data', {}).get('take_profit')
-                                            break
-                                    
-                                    t = open_simulated_trade_from_spec(spec, components)
-                                    if t:
-                                        free_bal -= margin_req
-                                        logger.info(f"✅ Bot Planı Uyguladı: {sym} işlem açıldı. Lot: {lot}")
-                            except Exception:
-                                continue
-                        
-                        # Save stats summary
-                        try:
-                            summary = simulated_trades_summary()
-                            ui.save_result_for_web('SIMULATED_TRADES_SUMMARY', summary)
-                        except Exception:
-                            pass
-
-                    execute_position_plan(components, plan)
+                    execute_position_plan(components, plan, unique)
                 except Exception as e:
                     logger.error(f"Plan yürütme hatası: {e}")
             except Exception as e:
                 logger.error(f"⚠️ Position plan generation error: {e}")
 
-            # Tüm pass'ler tamamlandı — belirtilen süre kadar bekle
+            # Tüm pass'ler tamamlandı — belirtilen süre kadar bekle.
+            # Yüksek etkili yeni haber gelirse bekleme erken biter.
             logger.info(f"⏳ Tüm pass'ler tamamlandı. {post_wait}s bekleniyor...")
-            time.sleep(post_wait)
+            signal_state = news_signal.wait(post_wait, last_news_seq)
+            if signal_state is not None:
+                last_news_seq = int(signal_state.get("seq", last_news_seq))
+                logger.info(f"🔔 Yüksek etkili yeni haber ({', '.join(signal_state.get('symbols', []))}) — tarama erken başlatılıyor")
     
     except KeyboardInterrupt:
         logger.info("")
         logger.info("=" * 60)
         logger.info("🛑 SNIPER BOT KULLANICI TARAFINDAN DURDURULDU")
         logger.info("=" * 60)
+        command_stop.set()
+        stop_news_ingestion_daemon(news_daemon)
+        stop_llm_dispatcher(components)
         components["broker"].close()
-        # İşlem sonu dosyayı sil
-        if os.path.exists("data/web_results.json"):
-            os.remove("data/web_results.json")
+        # İşlem sonu web sonuçlarını temizle
+        ui.results.clear()
     
     except Exception as e:
         logger.error(f"❌ Ana döngüde kritik hata: {str(e)}")
+        command_stop.set()
+        stop_news_ingestion_daemon(news_daemon)
+        stop_llm_dispatcher(components)
         components["broker"].close()
-        # İşlem sonu dosyayı sil
-        if os.path.exists("data/web_results.json"):
-            os.remove("data/web_results.json")
+        # İşlem sonu web sonuçlarını temizle
+        ui.results.clear()
 
 if __name__ == "__main__":
     main()
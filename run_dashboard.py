@@ -12,9 +12,31 @@ try:
 except Exception:
     YFinanceBroker = None
 import config
+from database.command_queue import CommandQueue
+from utils.result_log import open_result_log, WEB_RESULTS, ANALYSIS_ARCHIVE
 
 PORT = 8000
 DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+# Manuel işlem komutları bu kuyruğa yazılır; işlem döngüsü tüketir
+COMMAND_WAIT_MAX_SECONDS = 5
+_command_queue = None
+
+
+def get_command_queue():
+    global _command_queue
+    if _command_queue is None:
+        _command_queue = CommandQueue(os.path.join(DIRECTORY, getattr(config, 'COMMAND_QUEUE_DB_PATH', './database/commands.db')))
+    return _command_queue
+
+
+# Web sonuçları ve analiz arşivi günlükleri (yalnızca yeni eklenen satırlar okunur)
+_result_logs = {}
+
+
+def get_result_log(name):
+    if name not in _result_logs:
+        _result_logs[name] = open_result_log(name, os.path.join(DIRECTORY, getattr(config, 'RESULT_LOG_DIR', './data/results')))
+    return _result_logs[name]
 
 # Terminal kirliliğini önlemek için logları sessize alıyoruz
 class QuietHandler(http.server.SimpleHTTPRequestHandler):
@@ -43,17 +65,12 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         parsed = urlparse(self.path)
         if parsed.path.startswith('/api/archive'):
-            # return the analysis archive
-            archive_path = os.path.join(DIRECTORY, 'data', 'analysis_archive.json')
-            if os.path.exists(archive_path):
-                try:
-                    with open(archive_path, 'r', encoding='utf-8') as f:
-                        arr = json.load(f)
-                except Exception:
-                    arr = []
-            else:
-                arr = []
-            return self._send_json(200, arr)
+            # return the analysis archive (newest first)
+            return self._send_json(200, get_result_log(ANALYSIS_ARCHIVE).entries())
+
+        if parsed.path.startswith('/api/results') or parsed.path == '/data/web_results.json':
+            # latest web results (newest first); the old static file path is served from the log too
+            return self._send_json(200, get_result_log(WEB_RESULTS).entries())
 
         if parsed.path.startswith('/api/stats'):
             # compute simple stats from learning DB
@@ -72,14 +89,13 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
                 try:
                     conn = sqlite3.connect(db_path)
                     cur = conn.cursor()
-                    cur.execute("SELECT COUNT(*) FROM trade_history")
-                    stats['total_trades'] = cur.fetchone()[0] or 0
-                    cur.execute("SELECT COUNT(*) FROM trade_history WHERE outcome = 'WIN'")
-                    stats['wins'] = cur.fetchone()[0] or 0
-                    cur.execute("SELECT COUNT(*) FROM trade_history WHERE outcome = 'LOSS'")
-                    stats['losses'] = cur.fetchone()[0] or 0
-                    cur.execute("SELECT COUNT(*) FROM trade_history WHERE outcome = 'PENDING'")
-                    stats['pending'] = cur.fetchone()[0] or 0
+                    # Tek geçiş: (outcome, symbol) indeksi üzerinde gruplu sayım
+                    cur.execute("SELECT outcome, COUNT(*) FROM trade_history GROUP BY outcome")
+                    counts = dict(cur.fetchall())
+                    stats['total_trades'] = sum(counts.values())
+                    stats['wins'] = counts.get('WIN', 0)
+                    stats['losses'] = counts.get('LOSS', 0)
+                    stats['pending'] = counts.get('PENDING', 0)
                     if stats['total_trades'] > 0:
                         stats['success_rate'] = round(100.0 * stats['wins'] / stats['total_trades'], 2)
                     # compute used balance from pending trades (approximate notional)
@@ -149,6 +165,19 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
                 st = {'paused': False}
             return self._send_json(200, st)
 
+        if parsed.path == '/api/llm_metrics':
+            # Ollama model yükleme/boşaltma ve yedekli istek (kazanan arka uç) metrikleri
+            metrics = {}
+            for key, name in (('ollama', 'ollama_metrics.json'), ('hedge', 'llm_hedge_metrics.json')):
+                metrics_path = os.path.join(DIRECTORY, 'data', name)
+                if os.path.exists(metrics_path):
+                    try:
+                        with open(metrics_path, 'r', encoding='utf-8') as f:
+                            metrics[key] = json.load(f)
+                    except Exception:
+                        pass
+            return self._send_json(200, metrics)
+
         if parsed.path.startswith('/api/open_positions'):
             # Return list of pending trades with current price and P/L
             db_path = os.path.join(DIRECTORY, 'database', 'learning.db')
@@ -252,6 +281,23 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
 
             return self._send_json(200, results)
 
+        if parsed.path == '/api/commands':
+            # Son manuel işlem komutları ve durumları
+            try:
+                limit = int(parse_qs(parsed.query).get('limit', ['50'])[0])
+            except ValueError:
+                limit = 50
+            return self._send_json(200, get_command_queue().recent(limit))
+
+        if parsed.path.startswith('/api/commands/'):
+            try:
+                item = get_command_queue().get(int(parsed.path.rsplit('/', 1)[-1]))
+            except ValueError:
+                item = None
+            if item is None:
+                return self._send_json(404, {'error': 'command not found'})
+            return self._send_json(200, item)
+
         # fallback to normal static file serving
         return super().do_GET()
 
@@ -262,31 +308,16 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
 
         if parsed.path == '/api/archive/delete':
             # delete archive file, clear web results, and clear trade history; record deletion meta
-            archive_path = os.path.join(DIRECTORY, 'data', 'analysis_archive.json')
             meta_path = os.path.join(DIRECTORY, 'data', 'archive_meta.json')
-            web_results_path = os.path.join(DIRECTORY, 'data', 'web_results.json')
             db_path = os.path.join(DIRECTORY, 'database', 'learning.db')
             try:
-                # count archived items if present and remove archive file
-                archive_count = 0
-                if os.path.exists(archive_path):
-                    try:
-                        with open(archive_path, 'r', encoding='utf-8') as f:
-                            arr = json.load(f)
-                            archive_count = len(arr)
-                    except Exception:
-                        archive_count = 0
-                    try:
-                        os.remove(archive_path)
-                    except Exception:
-                        pass
+                # count archived items and clear the archive log
+                archive_log = get_result_log(ANALYSIS_ARCHIVE)
+                archive_count = len(archive_log)
+                archive_log.clear()
 
                 # reset web results
-                try:
-                    with open(web_results_path, 'w', encoding='utf-8') as wf:
-                        json.dump([], wf, ensure_ascii=False, indent=2)
-                except Exception:
-                    pass
+                get_result_log(WEB_RESULTS).clear()
 
                 # clear trade_history in learning DB and count removed rows
                 db_deleted = 0
@@ -297,6 +328,12 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
                         cur.execute("SELECT COUNT(*) FROM trade_history")
                         before = cur.fetchone()[0] or 0
                         cur.execute("DELETE FROM trade_history")
+                        # Artımlı pattern sayaçları da geçmişle birlikte sıfırlanır
+                        for table in ('pattern_stats_trend', 'pattern_stats_confidence', 'pattern_stats_sentiment'):
+                            try:
+                                cur.execute(f"DELETE FROM {table}")
+                            except sqlite3.OperationalError:
+                                pass  # Eski veritabanı: tablo henüz yok
                         conn.commit()
                         db_deleted = before
                         conn.close()
@@ -321,14 +358,10 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
                 payload = json.loads(body) if body else {}
             except Exception:
                 payload = {}
-            archive_path = os.path.join(DIRECTORY, 'data', 'analysis_archive.json')
-            if not os.path.exists(archive_path):
+            archive_log = get_result_log(ANALYSIS_ARCHIVE)
+            arr = archive_log.entries()
+            if not arr:
                 return self._send_json(404, {'error': 'archive not found'})
-            try:
-                with open(archive_path, 'r', encoding='utf-8') as f:
-                    arr = json.load(f)
-            except Exception:
-                arr = []
 
             updated = []
             now = datetime.now()
@@ -345,15 +378,40 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
                 item['data'] = data
                 updated.append(item)
 
-            # save updated archive
+            # save updated archive (rare bulk edit: the log is rewritten as one segment)
             try:
-                with open(archive_path, 'w', encoding='utf-8') as f:
-                    json.dump(arr, f, ensure_ascii=False, indent=2)
+                if updated:
+                    archive_log.rewrite(arr)
             except Exception as e:
                 return self._send_json(500, {'error': str(e)})
 
             return self._send_json(200, {'updated': len(updated)})
 
+        if parsed.path in ('/api/trades/open', '/api/trades/close'):
+            # Manuel işlem komutu: kuyruğa yazılır, işlem döngüsü milisaniyeler içinde uygular.
+            # ?wait=<sn> verilirse sonuç beklenir; Idempotency-Key başlığı tekrarları tek komuta indirir.
+            try:
+                payload = json.loads(body) if body else {}
+            except Exception:
+                return self._send_json(400, {'ok': False, 'error': 'invalid JSON'})
+            command = 'open_trade' if parsed.path.endswith('/open') else 'close_trade'
+            key = self.headers.get('Idempotency-Key') or (payload.pop('idempotency_key', None) if isinstance(payload, dict) else None)
+            try:
+                wait = min(float(parse_qs(parsed.query).get('wait', ['0'])[0]), COMMAND_WAIT_MAX_SECONDS)
+            except ValueError:
+                wait = 0
+            try:
+                queue = get_command_queue()
+                item = queue.submit(command, payload, idempotency_key=key)
+                if wait > 0:
+                    item = queue.wait_for_result(item['id'], wait)
+            except ValueError as e:
+                return self._send_json(400, {'ok': False, 'error': str(e)})
+            except Exception as e:
+                return self._send_json(500, {'ok': False, 'error': str(e)})
+            done = item['status'] in ('DONE', 'FAILED')
+            return self._send_json(200 if done else 202, {'ok': item['status'] != 'FAILED', 'command': item})
+
         if parsed.path == '/api/monitoring/pause' and self.command == 'POST':
             state_path = os.path.join(DIRECTORY, 'data', 'monitoring_state.json')
             os.makedirs(os.path.dirname(state_path), exist_ok=True)
@@ -0,0 +1,79 @@
+"""
+Test Script - Artımlı Parquet Analitik Dışa Aktarımı
+"""
+
+import os
+import sqlite3
+import tempfile
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from database.news_db import NewsDatabase
+from utils.analytics_export import AnalyticsExporter, AnalyticsStore
+
+
+def _learning_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE trade_history (
+            id INTEGER PRIMARY KEY, symbol TEXT, outcome TEXT, close_time TEXT,
+            trend_h1 TEXT, trend_h4 TEXT, trend_d1 TEXT, profit_pips REAL
+        )
+    """)
+    conn.executemany("INSERT INTO trade_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+        (1, "EURUSD=X", "WIN", "2026-01-05T10:00:00", "UP", "UP", "UP", 20.0),
+        (2, "EURUSD=X", "LOSS", "2026-01-06T10:00:00", "UP", "UP", "UP", -10.0),
+    ])
+    conn.commit()
+    return conn
+
+
+def test_corrected_trade_counted_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = _learning_db(os.path.join(tmp, "learning.db"))
+        exporter = AnalyticsExporter(export_dir=os.path.join(tmp, "analytics"),
+                                     learning_db_path=os.path.join(tmp, "learning.db"),
+                                     news_db_path=os.path.join(tmp, "news.db"),
+                                     results_dir=os.path.join(tmp, "results"))
+        assert exporter.export_trades() == 2
+
+        # İşlem 1 sonradan LOSS olarak düzeltilir ve yeniden aktarılır
+        conn.execute("UPDATE trade_history SET outcome = 'LOSS', profit_pips = -5, close_time = '2026-01-07T10:00:00' WHERE id = 1")
+        conn.commit()
+        conn.close()
+        assert exporter.export_trades() == 1
+
+        store = AnalyticsStore(export_dir=exporter.export_dir)
+        trades = {r["id"]: r for r in store.load("trades").to_pylist()}
+        assert len(trades) == 2 and trades[1]["outcome"] == "LOSS"
+
+        regimes = store.win_rate_by_regime()
+        assert regimes == [{"trend_h1": "UP", "trend_h4": "UP", "trend_d1": "UP",
+                            "total": 2, "wins": 0, "win_rate": 0.0, "avg_pips": -7.5}]
+        print("✅ Düzeltilen işlem id başına son satırıyla bir kez sayıldı")
+
+
+def test_late_news_in_earlier_partition_exported():
+    with tempfile.TemporaryDirectory() as tmp:
+        news_db = NewsDatabase(os.path.join(tmp, "news.db"))
+        news_db.add_news("Yeni", "Test", "2026-02-10T09:00:00", 10, "HIGH", "EURUSD")
+        exporter = AnalyticsExporter(export_dir=os.path.join(tmp, "analytics"),
+                                     learning_db_path=os.path.join(tmp, "learning.db"),
+                                     news_db_path=news_db.db_path,
+                                     results_dir=os.path.join(tmp, "results"))
+        assert exporter.export_news() == 1
+
+        # Geç gelen haber yayın tarihine göre önceki ayın bölümüne (daha küçük id) yazılır
+        news_db.add_news("Geç", "Test", "2026-01-31", -20, "MEDIUM", "EURUSD")
+        assert exporter.export_news() == 1
+        assert exporter.export_news() == 0
+
+        titles = sorted(AnalyticsStore(export_dir=exporter.export_dir).load("news", columns=["title"])["title"].to_pylist())
+        assert titles == ["Geç", "Yeni"]
+        print("✅ Önceki aya düşen geç haber bölüm bazlı işaretle aktarıldı")
+
+
+if __name__ == "__main__":
+    test_corrected_trade_counted_once()
+    test_late_news_in_earlier_partition_exported()
@@ -0,0 +1,76 @@
+"""
+Test Script - Artımlı JSON Çıkarıcı
+"""
+
+import json
+import time
+from llm.json_extractor import JSONObjectExtractor, extract_objects, best_candidate
+from llm.prompts import DECISION_FIELD_MAPPING
+
+DECISION = {
+    "karar": "AL",
+    "guven": 80,
+    "giris_fiyati": 1.1,
+    "zarar_kes": 1.09,
+    "kar_al": 1.12,
+    "risk_skoru": 30,
+    "neden": "Destek {1.09} kırılmadı \"güçlü\""
+}
+
+
+def test_nested_and_think_skipped():
+    text = "<think>Belki {\"karar\": \"SAT\"} ...</think>Sonuç: " + json.dumps({"sonuc": DECISION, "ek": {"x": 1}})
+    score, data = best_candidate(extract_objects(text), DECISION_FIELD_MAPPING)
+    assert data["karar"] == "AL" and score == len(DECISION), (score, data)
+    print("✅ İç içe nesne bulundu, think bloğu atlandı")
+
+
+def test_stream_chunks_match_full_text():
+    text = "Açıklama {yarım " + json.dumps(DECISION) + " son"
+    extractor = JSONObjectExtractor()
+    found = []
+    for i in range(0, len(text), 4):
+        found.extend(extractor.feed(text[i:i + 4]))
+    found.extend(extractor.close())
+    assert found == extract_objects(text)
+    assert found[-1]["karar"] == "AL"
+    print(f"✅ Akışla {len(found)} nesne çıkarıldı")
+
+
+def test_json_string_wrapper():
+    text = json.dumps({"yanit": json.dumps(DECISION)})
+    score, data = best_candidate(extract_objects(text), DECISION_FIELD_MAPPING)
+    assert data["guven"] == 80
+    print("✅ JSON-string içindeki karar çözüldü")
+
+
+
+def test_long_think_stream_is_linear():
+    """Uzun düşünce bloğu küçük parçalarla akarken her parça blok başından yeniden taranmaz"""
+    extractor = JSONObjectExtractor()
+    started = time.perf_counter()
+    assert extractor.feed("<think>") == []
+    for _ in range(20000):
+        assert extractor.feed("düşünüyorum { belki } ... ") == []
+    found = extractor.feed("</thi") + extractor.feed("nk>" + json.dumps(DECISION)) + extractor.close()
+    elapsed = time.perf_counter() - started
+    assert found == [DECISION]
+    assert len(extractor.text) > 500000
+    assert elapsed < 1.0, elapsed
+    print(f"✅ 20000 parçalık düşünce bloğu {elapsed * 1000:.0f} ms'de işlendi")
+
+
+def test_unclosed_think_rescanned_on_close():
+    extractor = JSONObjectExtractor()
+    assert extractor.feed("<think>taslak ") == []
+    assert extractor.feed(json.dumps(DECISION)) == []
+    assert extractor.close() == [DECISION]
+    print("✅ Kapanmamış think bloğu kapanışta tarandı")
+
+
+if __name__ == "__main__":
+    test_nested_and_think_skipped()
+    test_stream_chunks_match_full_text()
+    test_json_string_wrapper()
+    test_long_think_stream_is_linear()
+    test_unclosed_think_rescanned_on_close()
@@ -0,0 +1,37 @@
+"""
+Test Script - Toplu LLM Kararları ve Tekli Geri Düşüş
+"""
+
+from filters.stage3_llm import LLMDecisionEngine
+
+
+def _engine(batch_decisions):
+    engine = LLMDecisionEngine.__new__(LLMDecisionEngine)
+    engine.decision_cache = None
+    engine._load_learned_patterns = lambda: None
+    engine._request_batch = lambda contexts, patterns: dict(batch_decisions)
+    engine.single_calls = []
+    engine.make_decision = lambda context, use_cache=True: engine.single_calls.append(context["symbol"]) or {
+        "decision": "PASS", "confidence": 0}
+    return engine
+
+
+def test_batch_fallback_left_to_caller():
+    contexts = [{"symbol": "EURUSD=X"}, {"symbol": "GBPUSD=X"}]
+    decision = {"decision": "BUY", "confidence": 80, "reasoning": "test"}
+
+    # Varsayılan: eksik sembol motor içinde hemen tekli sorulur
+    engine = _engine({"EURUSD=X": dict(decision)})
+    assert set(engine.make_decisions_batch(contexts)) == {"EURUSD=X", "GBPUSD=X"}
+    assert engine.single_calls == ["GBPUSD=X"]
+
+    # fallback=False: eksik sembol sonuçta yok, tekli isteği çağıran (dağıtıcı) yapar
+    engine = _engine({"EURUSD=X": dict(decision)})
+    results = engine.make_decisions_batch(contexts, fallback=False)
+    assert list(results) == ["EURUSD=X"] and results["EURUSD=X"]["decision"] == "BUY"
+    assert engine.single_calls == []
+    print("✅ Toplu yanıtta eksik kalan sembol dağıtıcıya bırakıldı")
+
+
+if __name__ == "__main__":
+    test_batch_fallback_left_to_caller()
@@ -0,0 +1,187 @@
+"""
+Test Script - Stub LLM Sunucusu
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from llm.stub_server import StubBehavior, create_stub_server, OfflineGeminiClient
+from llm.rate_limiter import QuotaDeferred, RequestScheduler
+from llm.prompts import validate_llm_response, validate_batch_response
+
+PROMPT = "VARLIK: EURUSD=X\nTAVSİYE EDİLEN YÖN: BUY\nGÜNCEL FİYAT: 1.08500\n"
+BATCH_PROMPT = PROMPT + "\n" + PROMPT.replace("EURUSD=X", "GBPUSD=X")
+
+
+def _post(base, payload):
+    request = urllib.request.Request(f"{base}/api/generate", data=json.dumps(payload).encode('utf-8'),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read().decode('utf-8')
+
+
+def test_ollama_endpoints():
+    behavior = StubBehavior(latency_ms=20, latency_sigma=0, load_seconds=0, think=True, seed=1)
+    server = create_stub_server(port=0, behavior=behavior, models=["stub:latest"])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/api/tags", timeout=5) as response:
+            assert json.load(response)["models"][0]["name"] == "stub:latest"
+
+        text = json.loads(_post(base, {"prompt": PROMPT, "stream": False}))["response"]
+        assert validate_llm_response(text)["decision"] in ("BUY", "SELL", "PASS")
+
+        lines = [json.loads(l) for l in _post(base, {"prompt": BATCH_PROMPT, "stream": True}).splitlines()]
+        assert lines[-1]["done"]
+        decisions = validate_batch_response("".join(l["response"] for l in lines), ["EURUSD=X", "GBPUSD=X"])
+        assert set(decisions) == {"EURUSD=X", "GBPUSD=X"}
+        print("✅ /api/tags, /api/generate (akışlı ve akışsız) şemaya uygun")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_ollama_error_status():
+    behavior = StubBehavior(latency_ms=1, latency_sigma=0, error_rate=1.0, seed=1)
+    server = create_stub_server(port=0, behavior=behavior)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        _post(f"http://127.0.0.1:{server.server_address[1]}", {"prompt": PROMPT, "stream": False})
+        assert False, "500 bekleniyordu"
+    except urllib.error.HTTPError as e:
+        assert e.code == 500
+        print("✅ Hata oranı 500 olarak yansıdı")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_offline_gemini_429_burst(tmp_path):
+    behavior = StubBehavior(latency_ms=1, latency_sigma=0, burst_429_rate=1.0, burst_429_length=2, seed=1)
+    client = OfflineGeminiClient(behavior=behavior, scheduler=RequestScheduler(state_path=str(tmp_path / "quota.json")))
+    try:
+        client.generate(PROMPT)
+        assert False, "QuotaDeferred bekleniyordu"
+    except QuotaDeferred:
+        pass
+    # Cezadan sonra kota hemen açılmaz: sonraki çağrı beklemeden ertelenir
+    client.scheduler.max_wait = 0
+    try:
+        client.generate(PROMPT)
+        assert False, "QuotaDeferred bekleniyordu"
+    except QuotaDeferred:
+        print("✅ 429 patlaması kota zamanlayıcısına yansıdı")
+
+
+
+def test_offline_gemini_keeps_live_quota_untouched(tmp_path):
+    import config
+
+    saved = {key: getattr(config, key, None) for key in ("GEMINI_QUOTA_PATH", "GEMINI_STUB_QUOTA_PATH")}
+    config.GEMINI_QUOTA_PATH = str(tmp_path / "gemini_quota.json")
+    config.GEMINI_STUB_QUOTA_PATH = str(tmp_path / "gemini_stub_quota.json")
+    try:
+        client = OfflineGeminiClient(behavior=StubBehavior(latency_ms=1, latency_sigma=0, seed=1))
+        for _ in range(3):
+            client.generate(PROMPT)
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+    assert not (tmp_path / "gemini_quota.json").exists()
+    with open(tmp_path / "gemini_stub_quota.json", encoding="utf-8") as f:
+        assert json.load(f)["count"] == 3
+    print("✅ Stub istekleri gerçek Gemini günlük sayacına yazılmadı")
+
+
+def test_ollama_prefix_sent_in_single_turn():
+    """Önek `context` ile önceden hazırlanmaz; her istek tek kullanıcı turunda tam komutu taşır"""
+    import config
+    from llm.ollama_client import OllamaClient
+
+    saved = {key: getattr(config, key, None) for key in ("OLLAMA_PRELOAD", "LLM_PREFIX_CACHE", "OLLAMA_STREAM")}
+    config.OLLAMA_PRELOAD, config.LLM_PREFIX_CACHE, config.OLLAMA_STREAM = False, True, False
+    server = create_stub_server(port=0, behavior=StubBehavior(latency_ms=1, latency_sigma=0, load_seconds=0, seed=1),
+                                models=["stub:latest"])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        ollama = OllamaClient(model_name="stub:latest", host=f"http://127.0.0.1:{server.server_address[1]}")
+        payloads = []
+        post = ollama.session.post
+
+        def recording_post(url, json=None, **kwargs):
+            payloads.append(json)
+            return post(url, json=json, **kwargs)
+        ollama.session.post = recording_post
+
+        prefix = "SİSTEM HAFIZASI\nTALİMATLAR"
+        for _ in range(2):
+            assert ollama.generate(PROMPT, system_prompt="SİSTEM", prefix=prefix)
+        assert len(payloads) == 2
+        for payload in payloads:
+            assert "context" not in payload and payload["system"] == "SİSTEM"
+            assert payload["prompt"] == prefix + "\n\n" + PROMPT
+        print("✅ Önekli Ollama istekleri ek hazırlık isteği olmadan tek turda gitti")
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+        server.shutdown()
+        server.server_close()
+
+
+def test_hedge_requests_respect_backend_limit(tmp_path):
+    """Yedek havuzundan giden ikincil Ollama istekleri de tek GPU sınırına tabi"""
+    import config
+    from llm.hedging import HedgedLLM
+    from llm.ollama_client import OllamaClient
+
+    saved = {key: getattr(config, key, None) for key in ("OLLAMA_PRELOAD", "LLM_PREFIX_CACHE")}
+    config.OLLAMA_PRELOAD = config.LLM_PREFIX_CACHE = False
+    behavior = StubBehavior(latency_ms=30, latency_sigma=0, load_seconds=0, seed=1)
+    server = create_stub_server(port=0, behavior=behavior, models=["stub:latest"])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        ollama = OllamaClient(model_name="stub:latest", host=f"http://127.0.0.1:{server.server_address[1]}")
+        active, peak = [0], [0]
+        lock = threading.Lock()
+        post = ollama.session.post
+
+        def counting_post(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                return post(*args, **kwargs)
+            finally:
+                with lock:
+                    active[0] -= 1
+        ollama.session.post = counting_post
+
+        # Birincil hep geç yanıt verir: her istek Ollama'ya yedeklenir
+        slow = OfflineGeminiClient(behavior=StubBehavior(latency_ms=300, latency_sigma=0, seed=2),
+                                   scheduler=RequestScheduler(state_path=str(tmp_path / "quota.json")))
+        hedged = HedgedLLM(slow, ollama, default_delay=0.01, metrics_path=str(tmp_path / "hedge.json"))
+        threads = [threading.Thread(target=hedged.generate, args=(PROMPT,)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+        assert peak[0] == 1, peak[0]
+        print("✅ Yedek istekler Ollama eşzamanlılık sınırını aşmadı")
+    finally:
+        for key, value in saved.items():
+            setattr(config, key, value)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_ollama_endpoints()
+    test_ollama_error_status()
+    test_offline_gemini_429_burst(pathlib.Path(tempfile.mkdtemp()))
+    test_offline_gemini_keeps_live_quota_untouched(pathlib.Path(tempfile.mkdtemp()))
+    test_ollama_prefix_sent_in_single_turn()
+    test_hedge_requests_respect_backend_limit(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,90 @@
+"""
+Test Script - Ana Döngü Adımları (bekleyen işlem denetimi, pozisyon planı)
+"""
+
+import os
+import sqlite3
+import config
+import main
+from database.simulated_trades_db import SimulatedTradeStore
+from utils.formatter import UIFormatter
+from utils.learning_system import TradePerformanceTracker
+
+
+class FakeDataFetcher:
+    """Sabit fiyat döndüren DataFetcher"""
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    def get_current_price(self, symbol):
+        return self.prices.get(symbol)
+
+
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DRY_RUN", True)
+    monkeypatch.setattr(config, "VIRTUAL_BALANCE", 10000.0)
+    monkeypatch.setattr(main, "SIM_STORE", SimulatedTradeStore(str(tmp_path / "sim.db"), legacy_json_path=None))
+    monkeypatch.setattr(main, "ui", UIFormatter(results_dir=str(tmp_path / "results")))
+
+
+class FakeEngine:
+    """Sadece öğrenme sistemini taşıyan LLM motoru"""
+
+    def __init__(self, learning_system):
+        self.learning_system = learning_system
+
+
+def test_pending_trade_closed_by_main_loop_trigger(tmp_path, monkeypatch):
+    _isolate(tmp_path, monkeypatch)
+    learning = TradePerformanceTracker(db_path=os.path.join(str(tmp_path), "learning.db"))
+    trade_id = learning.log_trade_decision(
+        "EURUSD=X", "BUY", {}, {"entry_price": 1.10, "stop_loss": 1.09, "take_profit": 1.11, "confidence": 80}
+    )
+    components = {"llm_engine": FakeEngine(learning),
+                  "data_fetcher": FakeDataFetcher({"EURUSD=X": {"mid": 1.115}})}
+    main.open_simulated_trade_from_spec({"symbol": "EURUSD=X", "direction": "BUY", "lot": 0.01,
+                                         "entry": 1.10, "leverage": 100}, components)
+
+    # Fiyat TP'yi geçti: döngü adımı DataFetcher'dan fiyatı alıp işlemi kapatır
+    main.check_pending_trades(components)
+
+    with sqlite3.connect(learning.db_path) as conn:
+        outcome = conn.execute("SELECT outcome FROM trade_history WHERE id = ?", (trade_id,)).fetchone()[0]
+    assert outcome == "WIN"
+    assert len(learning.pending_book) == 0
+    assert main.get_sim_store().open_trades() == []
+    print("✅ Ana döngü adımı TP'ye ulaşan bekleyen işlemi kapattı")
+
+
+def test_position_plan_opens_trade_with_signal_levels(tmp_path, monkeypatch):
+    _isolate(tmp_path, monkeypatch)
+    main.ui.save_result_for_web("EURUSD=X", {"decision": "BUY", "confidence": 80, "entry_price": 1.085,
+                                             "stop_loss": 1.08, "take_profit": 1.095})
+    components = {"data_fetcher": FakeDataFetcher({"EURUSD=X": 1.085, "GBPUSD=X": 1.27})}
+    plan = [
+        {"symbol": "EURUSD=X", "decision": "BUY", "entry": 1.085, "lot": 0.01},
+        # Web sonucu yok, son sonuçlar listesinde görünen adla eşleşir; giriş güncel fiyattan
+        {"symbol": "GBP/USD", "decision": "SELL", "entry": None, "lot": 0.01},
+    ]
+    latest = [{"symbol": "GBPUSD=X", "display_name": "GBP/USD",
+               "data": {"decision": "SELL", "stop_loss": 1.28, "take_profit": 1.25}}]
+    components["data_fetcher"].prices["GBP/USD"] = 1.27
+
+    main.execute_position_plan(components, plan, latest)
+
+    trades = {t["symbol"]: t for t in main.get_sim_store().open_trades()}
+    assert set(trades) == {"EURUSD=X", "GBP/USD"}
+    assert (trades["EURUSD=X"]["stop_loss"], trades["EURUSD=X"]["take_profit"]) == (1.08, 1.095)
+    assert (trades["GBP/USD"]["stop_loss"], trades["GBP/USD"]["take_profit"]) == (1.28, 1.25)
+    assert trades["GBP/USD"]["direction"] == "SELL" and trades["GBP/USD"]["entry_price"] == 1.27
+
+    # Aynı plan tekrar uygulanınca açık işlem ikinci kez açılmaz
+    main.execute_position_plan(components, plan, latest)
+    assert len(main.get_sim_store().open_trades()) == 2
+    print("✅ Plan kalemleri SL/TP ile simüle işlem olarak açıldı")
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
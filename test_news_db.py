@@ -0,0 +1,106 @@
+"""
+Test Script - Aylık Haber Bölümleri ve Disk Geri Kazanımı
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+from database.news_db import NewsDatabase
+
+
+def test_clear_old_news_reclaims_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = NewsDatabase(os.path.join(tmp, "news.db"))
+        old = (datetime.now() - timedelta(days=120)).replace(day=1).isoformat()
+        db.add_news_batch([
+            {"title": f"Eski haber {i}", "content": "x" * 2000, "source": "Test", "published_at": old,
+             "sentiment_score": 0, "impact_level": "LOW", "symbols": "EURUSD"}
+            for i in range(2000)
+        ])
+        size_before = os.path.getsize(db.db_path)
+
+        db.clear_old_news(days_old=30)
+
+        with sqlite3.connect(db.db_path) as conn:
+            freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        assert freelist <= 1, freelist
+        assert os.path.getsize(db.db_path) < size_before / 4
+        print(f"✅ Bölüm silindi, boş sayfa: {freelist}, boyut {size_before} -> {os.path.getsize(db.db_path)}")
+
+
+def _legacy_db(path, months=("2026-01", "2026-02", "2026-03")):
+    """Bölümlemeden önceki tek parça `news` tablosuyla veritabanı"""
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE news (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT,
+                source TEXT NOT NULL, published_at DATETIME NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP, sentiment_score INTEGER NOT NULL,
+                impact_level TEXT NOT NULL, symbols TEXT NOT NULL, category TEXT, url TEXT
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO news (title, source, published_at, sentiment_score, impact_level, symbols) "
+            "VALUES (?, 'Test', ?, 0, 'LOW', 'EURUSD')",
+            [(f"Haber {m} {i}", f"{m}-1{i}T10:00:00") for m in months for i in range(3)]
+        )
+
+
+def _titles(db):
+    with sqlite3.connect(db.db_path) as conn:
+        return sorted(r[0] for r in conn.execute("SELECT title FROM news"))
+
+
+def test_legacy_migration_rolled_back_on_crash():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "news.db")
+        _legacy_db(path)
+
+        class CrashingNewsDatabase(NewsDatabase):
+            created = 0
+
+            def _ensure_partition(self, conn, key):
+                table = super()._ensure_partition(conn, key)
+                CrashingNewsDatabase.created += 1
+                if CrashingNewsDatabase.created == 2:
+                    raise sqlite3.OperationalError("taşıma ortasında çökme")
+                return table
+
+        with pytest.raises(sqlite3.OperationalError):
+            CrashingNewsDatabase(path)
+
+        # Yeniden adlandırma ve ilk bölüm geri alındı: eski tablo olduğu gibi duruyor
+        with sqlite3.connect(path) as conn:
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            assert "news" in tables and "news_legacy" not in tables
+            assert conn.execute("SELECT COUNT(*) FROM news").fetchone()[0] == 9
+
+        db = NewsDatabase(path)
+        assert len(_titles(db)) == 9
+        print("✅ Yarıda kesilen taşıma geri alındı, sonraki açılışta tamamlandı")
+
+
+def test_half_migrated_legacy_table_resumed():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "news.db")
+        _legacy_db(path)
+        # Önceki sürümün bıraktığı durum: tablo kenara alınmış, ilk ay taşınmış
+        with sqlite3.connect(path) as conn:
+            conn.execute("ALTER TABLE news RENAME TO news_legacy")
+            conn.execute("CREATE TABLE news_202601 AS SELECT * FROM news_legacy WHERE published_at LIKE '2026-01%'")
+            conn.execute("CREATE VIEW news AS SELECT * FROM news_202601")
+
+        db = NewsDatabase(path)
+        titles = _titles(db)
+        assert len(titles) == len(set(titles)) == 9
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'news_legacy'").fetchone() is None
+        print("✅ Yarım kalan news_legacy taşıması tekrarsız tamamlandı")
+
+
+if __name__ == "__main__":
+    test_clear_old_news_reclaims_pages()
+    test_legacy_migration_rolled_back_on_crash()
+    test_half_migrated_legacy_table_resumed()
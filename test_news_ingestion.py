@@ -0,0 +1,81 @@
+"""
+Test Script - Artımlı Haber Alımı (NewsAPI yüksek su işareti)
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+import config
+import utils.news_fetcher as news_fetcher
+from database.news_db import NewsDatabase
+from utils.news_ingestion import NewsIngestionService, NewsSignal
+
+
+class FakeNewsAPI:
+    """NewsAPI /v2/everything taklidi: yeniden eskiye sıralı, from/to kapsayıcı, sayfalı"""
+
+    def __init__(self):
+        self.articles = []
+        self.requests = 0
+        self.base = datetime.utcnow() - timedelta(hours=10)
+
+    def add(self, count, start=0):
+        for i in range(start, start + count):
+            self.articles.append({
+                "title": f"EUR haberi {i}",
+                "description": "",
+                "source": {"name": "Test"},
+                "publishedAt": (self.base + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "url": f"https://example.com/{i}"
+            })
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+        matched = sorted((a for a in self.articles
+                          if a["publishedAt"] >= params["from"]
+                          and (not params.get("to") or a["publishedAt"] <= params["to"])),
+                         key=lambda a: a["publishedAt"], reverse=True)
+        size, page = params["pageSize"], params["page"]
+        return FakeResponse({"totalResults": len(matched), "articles": matched[(page - 1) * size:page * size]})
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def test_newsapi_backlog_beyond_one_page_not_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "NEWS_DB_PATH", str(tmp_path / "news.db"))
+    monkeypatch.setattr(config, "NEWSAPI_MAX_PAGES", 1)
+    monkeypatch.setenv("NEWSAPI_KEY", "test")
+    api = FakeNewsAPI()
+    monkeypatch.setattr(news_fetcher.requests, "get", api.get)
+
+    db = NewsDatabase()
+    service = NewsIngestionService(db=db, signal=NewsSignal(str(tmp_path / "signal.json")))
+
+    # 250 haber, yoklama başına tek sayfa (100): boşluk sonraki yoklamalarda kapanır
+    api.add(250)
+    added = [len(service._ingest_newsapi()) for _ in range(3)]
+    # "to" kapsayıcı: imleçteki haber ikinci sayfada tekrar gelir ve atlanır
+    assert added == [100, 99, 51], added
+    assert db.get_high_water("newsapi") == api.articles[-1]["publishedAt"]
+    assert db.get_high_water("newsapi:backfill") is None
+
+    api.add(3, start=250)
+    assert len(service._ingest_newsapi()) == 3
+    assert len(service._ingest_newsapi()) == 0
+
+    with sqlite3.connect(db.db_path) as conn:
+        titles = [r[0] for r in conn.execute("SELECT title FROM news")]
+    assert len(titles) == len(set(titles)) == 253
+    print(f"✅ 253 haberin tamamı {api.requests} istekte, tekrarsız alındı")
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-q"])
@@ -0,0 +1,100 @@
+"""
+Test Script - Bekleyen İşlem Defteri (SL/TP seviye indeksi)
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+from utils.pending_book import PendingTradeBook
+
+
+def _trade(trade_id, symbol, direction, entry, sl, tp):
+    return {"id": trade_id, "symbol": symbol, "direction": direction,
+            "entry_price": entry, "stop_loss": sl, "take_profit": tp}
+
+
+def _scan(trades, symbol, price):
+    """Eski doğrusal tarama (referans)"""
+    hits = {}
+    for t in trades:
+        if t["symbol"] != symbol:
+            continue
+        if t["direction"] == "BUY":
+            outcome = "WIN" if price >= t["take_profit"] else "LOSS" if price <= t["stop_loss"] else None
+        else:
+            outcome = "WIN" if price <= t["take_profit"] else "LOSS" if price >= t["stop_loss"] else None
+        if outcome:
+            hits[t["id"]] = outcome
+    return hits
+
+
+def test_triggers_match_linear_scan():
+    rng = random.Random(7)
+    trades = []
+    for i in range(300):
+        direction = rng.choice(["BUY", "SELL"])
+        entry = rng.uniform(1.0, 2.0)
+        sl, tp = (entry * 0.99, entry * 1.01) if direction == "BUY" else (entry * 1.01, entry * 0.99)
+        trades.append(_trade(i, rng.choice(["EURUSD=X", "USDJPY=X"]), direction, entry, sl, tp))
+    book = PendingTradeBook(lambda: trades)
+
+    for _ in range(200):
+        symbol, price = rng.choice(["EURUSD=X", "USDJPY=X"]), rng.uniform(0.9, 2.1)
+        assert {t["id"]: o for t, o in book.triggered(symbol, price)} == _scan(trades, symbol, price)
+    print(f"✅ {len(book)} işlemde bisect sonuçları doğrusal taramayla aynı")
+
+
+def test_add_remove_keep_book_in_sync():
+    book = PendingTradeBook(lambda: [])
+    assert len(book) == 0
+    book.add(_trade(1, "EURUSD=X", "BUY", 1.10, 1.09, 1.12))
+    book.add(_trade(2, "EURUSD=X", "SELL", 1.10, 1.12, 1.09))
+    assert {t["id"]: o for t, o in book.triggered("EURUSD=X", 1.125)} == {1: "WIN", 2: "LOSS"}
+
+    book.remove(1)
+    assert [(t["id"], o) for t, o in book.triggered("EURUSD=X", 1.125)] == [(2, "LOSS")]
+    assert book.triggered("EURUSD=X", 1.10) == []
+    assert book.symbols() == ["EURUSD=X"]
+    print("✅ Ekleme/kapatma defteri senkron tutuyor")
+
+
+def test_on_price_calls_handler():
+    book = PendingTradeBook(lambda: [_trade(5, "GBPUSD=X", "BUY", 1.30, 1.29, 1.31)])
+    closed = []
+    assert book.on_price("GBPUSD=X", 1.285, lambda t, o, p: (closed.append((t["id"], o, p)), book.remove(t["id"]))) == 1
+    assert closed == [(5, "LOSS", 1.285)]
+    assert len(book) == 0
+    print("✅ Fiyat akışında tetiklenen işlem handler ile kapatıldı")
+
+
+
+def test_stale_book_entry_not_closed_after_external_delete():
+    from utils.learning_system import TradePerformanceTracker
+
+    with tempfile.TemporaryDirectory() as tmp:
+        learning = TradePerformanceTracker(db_path=os.path.join(tmp, "learning.db"))
+        trade_id = learning.log_trade_decision(
+            "EURUSD=X", "BUY", {}, {"entry_price": 1.10, "stop_loss": 1.09, "take_profit": 1.11, "confidence": 80}
+        )
+        assert len(learning.pending_book) == 1
+
+        # Dashboard başka süreçte geçmişi siler; defter henüz yeniden yüklenmedi
+        with sqlite3.connect(learning.db_path) as conn:
+            conn.execute("DELETE FROM trade_history")
+
+        closed = learning.pending_book.on_price(
+            "EURUSD=X", 1.12,
+            lambda t, o, p: learning.update_trade_outcome(t["id"], o, profit_pips=20, close_price=p)
+        )
+        assert closed == 0
+        assert len(learning.pending_book) == 0
+        assert learning.update_trade_outcome(trade_id, "WIN") is False
+        print("✅ Silinmiş işlem bayat defterden kapatılmadı, defterden düştü")
+
+
+if __name__ == "__main__":
+    test_triggers_match_linear_scan()
+    test_add_remove_keep_book_in_sync()
+    test_on_price_calls_handler()
+    test_stale_book_entry_not_closed_after_external_delete()
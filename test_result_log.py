@@ -0,0 +1,76 @@
+"""
+Test Script - Sadece Eklenen Sonuç Günlüğü (web sonuçları / analiz arşivi)
+"""
+
+import json
+import os
+import tempfile
+from utils.result_log import ResultLog
+
+
+def _result(i, symbol="EURUSD=X", decision="BEKLE"):
+    return {"symbol": symbol, "timestamp": f"2026-01-01 00:00:{i:02d}", "data": {"decision": decision, "i": i}}
+
+
+def _segments(directory):
+    return sorted(n for n in os.listdir(directory) if n.endswith(".jsonl"))
+
+
+def test_view_matches_old_insert_and_truncate():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = ResultLog(os.path.join(tmp, "web"), keep=20, segment_entries=5)
+        reference = []
+        for i in range(57):
+            record = _result(i, symbol=f"S{i % 4}")
+            log.append(record)
+            reference.insert(0, record)
+            reference = reference[:20]
+        assert log.entries() == reference
+        assert log.entries(limit=3) == reference[:3]
+        # Sıkıştırma: yalnızca son 20 kaydı kapsayan segmentler kalır
+        assert len(_segments(log.directory)) <= 5
+        latest = {r["symbol"]: r for r in reversed(reference)}
+        assert log.latest("S1") == latest["S1"]
+        assert [r["symbol"] for r in log.latest_by_symbol()] == ["S0", "S3", "S2", "S1"]
+        print("✅ Görünüm eski başa ekle + 200'de kes davranışıyla aynı")
+
+
+def test_reader_follows_writer_and_clear():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "archive")
+        writer = ResultLog(directory, keep=10, segment_entries=4)
+        reader = ResultLog(directory, keep=10, segment_entries=4)
+        for i in range(7):
+            writer.append(_result(i))
+        assert reader.entries() == writer.entries()
+
+        # Yazımı süren yarım satır okunmaz
+        with open(os.path.join(directory, _segments(directory)[-1]), "ab") as f:
+            f.write(b'{"symbol": "EURUSD=X"')
+        assert len(reader) == 7
+
+        reader.rewrite([dict(r, scheduled=True) for r in reader.entries()])
+        assert all(r.get("scheduled") for r in writer.entries())
+
+        reader.clear()
+        writer.append(_result(99))
+        assert reader.entries() == [_result(99)]
+        print("✅ Diğer süreçteki okuyucu eklemeleri, yeniden yazmayı ve temizlemeyi görüyor")
+
+
+def test_legacy_json_imported_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "web_results.json")
+        old = [_result(i) for i in range(5, 0, -1)]
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump(old, f)
+        log = ResultLog(os.path.join(tmp, "web"), keep=200, legacy_json_path=legacy)
+        assert log.entries() == old
+        assert not os.path.exists(legacy) and os.path.exists(legacy + ".migrated")
+        print("✅ Eski web_results.json bir kez içe aktarıldı")
+
+
+if __name__ == "__main__":
+    test_view_matches_old_insert_and_truncate()
+    test_reader_follows_writer_and_clear()
+    test_legacy_json_imported_once()
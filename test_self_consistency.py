@@ -0,0 +1,103 @@
+"""
+Test Script - Öz-tutarlılık Oylaması
+"""
+
+import threading
+import time
+from filters.stage3_llm import aggregate_samples
+from llm.stub_server import StubBehavior
+
+
+def _sample(decision, confidence, entry=1.10, sl=1.09, tp=1.12):
+    return {
+        "decision": decision,
+        "confidence": confidence,
+        "entry_price": entry,
+        "stop_loss": sl,
+        "take_profit": tp,
+        "reasoning": f"{decision} {confidence}"
+    }
+
+
+def test_unanimous_keeps_confidence():
+    result = aggregate_samples([_sample("BUY", 80), _sample("BUY", 70), _sample("BUY", 90)])
+    assert result["decision"] == "BUY"
+    assert result["confidence"] == 80
+    assert result["consistency"]["votes"] == {"BUY": 3}
+    print(f"✅ Oybirliği: {result['decision']} (%{result['confidence']})")
+
+
+def test_majority_keeps_mean_confidence():
+    result = aggregate_samples([_sample("SELL", 90, entry=1.2), _sample("SELL", 60, entry=1.1), _sample("BUY", 95)])
+    assert result["decision"] == "SELL"
+    assert result["confidence"] == 75  # çoğunluğun ortalaması, oy oranıyla küçültülmez
+    assert abs(result["entry_price"] - 1.15) < 1e-9
+    assert result["reasoning"].startswith("[Öz-tutarlılık 2/3]")
+    assert result["consistency"]["agreement"] == 0.67
+    print(f"✅ Çoğunluk: {result['decision']} (%{result['confidence']})")
+
+
+def test_split_majority_at_full_confidence_passes_gate():
+    import config
+    result = aggregate_samples([_sample("BUY", 100), _sample("BUY", 100), _sample("SELL", 100)])
+    assert result["decision"] == "BUY"
+    assert result["confidence"] >= config.MIN_CONFIDENCE
+    print("✅ 2/3 çoğunluk %100 güvenle MIN_CONFIDENCE kapısından geçti")
+
+
+def test_tie_held_below_agreement_threshold():
+    result = aggregate_samples([_sample("BUY", 40), _sample("SELL", 85)])
+    assert result["consistency"]["majority"] == "SELL"
+    assert result["decision"] == "BEKLEMEDE KAL"
+    assert result["stop_loss"] == "BEKLEMEDE"
+    # Eşik düşürülürse eşitlikte yüksek güvenli grup seçilir
+    assert aggregate_samples([_sample("BUY", 40), _sample("SELL", 85)], min_agreement=0.5)["decision"] == "SELL"
+    print("✅ Eşitlik oy oranı eşiğinin altında kaldı, karar bekletildi")
+
+
+
+class FakeOllamaClient:
+    """Eşzamanlı istek sayısını ölçen sahte GPU istemcisi"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return StubBehavior(seed=1).respond(prompt)
+
+
+def test_samples_respect_backend_limit():
+    import config
+    from filters.stage3_llm import LLMDecisionEngine
+
+    engine = LLMDecisionEngine.__new__(LLMDecisionEngine)
+    engine.llm = FakeOllamaClient()
+    engine.decision_cache = None
+    engine._load_learned_patterns = lambda: None
+    engine._decision_prompt = lambda context, patterns: ("VARLIK: EURUSD=X\nTAVSİYE EDİLEN YÖN: BUY\nGÜNCEL FİYAT: 1.08500\n", None)
+
+    saved = config.LLM_BACKEND_CONCURRENCY
+    config.LLM_BACKEND_CONCURRENCY = {"ollama": 1, "gemini": 4}
+    try:
+        result = engine.make_decision_consistent({"symbol": "EURUSD=X"}, samples=3)
+    finally:
+        config.LLM_BACKEND_CONCURRENCY = saved
+    assert sum(result["consistency"]["votes"].values()) == 3
+    assert engine.llm.peak == 1, engine.llm.peak
+    print("✅ Öz-tutarlılık örnekleri Ollama sınırını (1) aşmadı")
+
+
+if __name__ == "__main__":
+    test_unanimous_keeps_confidence()
+    test_majority_keeps_mean_confidence()
+    test_split_majority_at_full_confidence_passes_gate()
+    test_tie_held_below_agreement_threshold()
+    test_samples_respect_backend_limit()
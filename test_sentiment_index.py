@@ -0,0 +1,61 @@
+"""
+Test Script - Sönümlenen Duygu Endeksi
+"""
+
+import time
+from datetime import datetime, timedelta
+from utils.sentiment_index import DecayingSentimentIndex
+
+
+def _news(hours_ago, score, impact="HIGH", symbols="EURUSD"):
+    return {
+        "title": f"Haber {hours_ago}s",
+        "source": "Test",
+        "published_at": (datetime.now() - timedelta(hours=hours_ago)).isoformat(),
+        "sentiment_score": score,
+        "impact_level": impact,
+        "symbols": symbols
+    }
+
+
+def test_recent_news_dominates():
+    """Yeni haber, 23 saatlik haberden çok daha ağır basmalı"""
+    index = DecayingSentimentIndex(half_life_hours=6, impact_weights={"HIGH": 1.0, "MEDIUM": 0.5, "LOW": 0.0},
+                                   snapshot_path="data/test_sentiment_index.json")
+    index.add(_news(23, -80))
+    index.add(_news(0.1, 60))
+
+    result = index.get("EURUSD=X")
+    assert result["average_sentiment"] > 40, result
+    print(f"✅ Sönümlenen ortalama: {result['average_sentiment']}")
+
+
+def test_out_of_order_insert_matches_in_order():
+    """Haberlerin ekleme sırası sonucu değiştirmemeli"""
+    weights = {"HIGH": 1.0, "MEDIUM": 0.5, "LOW": 0.0}
+    a = DecayingSentimentIndex(half_life_hours=6, impact_weights=weights, snapshot_path="data/test_a.json")
+    b = DecayingSentimentIndex(half_life_hours=6, impact_weights=weights, snapshot_path="data/test_b.json")
+    items = [_news(10, 50), _news(2, -30, "MEDIUM"), _news(5, 20)]
+
+    for n in items:
+        a.add(n)
+    for n in sorted(items, key=lambda n: n["published_at"]):
+        b.add(n)
+
+    now = time.time()
+    assert abs(a.get("EURUSD", now)["average_sentiment"] - b.get("EURUSD", now)["average_sentiment"]) < 0.2
+    print("✅ Sıra bağımsızlığı doğrulandı")
+
+
+def test_low_impact_ignored():
+    index = DecayingSentimentIndex(half_life_hours=6, impact_weights={"HIGH": 1.0, "MEDIUM": 0.5, "LOW": 0.0},
+                                   snapshot_path="data/test_sentiment_index.json")
+    index.add(_news(1, 90, "LOW", "GBPUSD"))
+    assert index.get("GBPUSD")["weight"] == 0
+    print("✅ Düşük etkili haber yoksayıldı")
+
+
+if __name__ == "__main__":
+    test_recent_news_dominates()
+    test_out_of_order_insert_matches_in_order()
+    test_low_impact_ignored()
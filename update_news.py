@@ -5,6 +5,7 @@ Her saat başı çalıştırılabilir veya cron job olarak ayarlanabilir
 
 import time
 from datetime import datetime
+import config
 from utils.news_fetcher import NewsAPIFetcher, AlphaVantageFetcher
 from utils.logger import setup_logger
 from database.news_db import NewsDatabase
@@ -36,10 +37,10 @@ def update_news():
     except Exception as e:
         logger.error(f"Alpha Vantage failed: {str(e)}")
     
-    # 3. Eski haberleri temizle (30 günden eski)
+    # 3. Eski haberleri temizle (saklama süresinden eski aylık bölümler)
     try:
         db = NewsDatabase()
-        db.clear_old_news(days_old=30)
+        db.clear_old_news(days_old=getattr(config, 'NEWS_RETENTION_DAYS', 30))
     except Exception as e:
         logger.error(f"Cleanup failed: {str(e)}")
     
@@ -50,30 +51,28 @@ def update_news():
     return total_added
 
 
-def run_continuous(interval_minutes=60):
+def run_continuous(interval_minutes=None):
     """
-    Belirli aralıklarla sürekli haber güncelle
+    Haberleri artımlı alım servisiyle sürekli güncelle.
+    Her kaynak kendi aralığıyla (config.NEWS_SOURCE_INTERVALS) ve sadece son
+    alınan haberden sonrasını çekecek şekilde yoklanır.
     
     Args:
-        interval_minutes: Güncelleme aralığı (dakika)
+        interval_minutes: Servis tick aralığı (dakika); None ise config'den alınır
     """
-    logger.info(f"🔄 Starting continuous news updates (every {interval_minutes} minutes)")
-    logger.info("Press Ctrl+C to stop")
-    
-    try:
-        while True:
-            update_news()
-            
-            logger.info(f"⏳ Next update in {interval_minutes} minutes...")
-            time.sleep(interval_minutes * 60)
+    from utils.news_ingestion import NewsIngestionService
     
-    except KeyboardInterrupt:
-        logger.info("🛑 News updater stopped by user")
+    logger.info("Press Ctrl+C to stop")
+    tick_seconds = interval_minutes * 60 if interval_minutes else None
+    NewsIngestionService().run_forever(tick_seconds=tick_seconds)
 
 
 if __name__ == "__main__":
-    # Manuel güncelleme
-    update_news()
+    import sys
     
-    # Veya sürekli çalıştır (her saat)
-    # run_continuous(interval_minutes=60)
+    if "--daemon" in sys.argv:
+        # Ayrı süreç olarak sürekli çalıştır (main.py bu şekilde başlatır)
+        run_continuous()
+    else:
+        # Manuel güncelleme
+        update_news()
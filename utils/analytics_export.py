@@ -0,0 +1,366 @@
+"""
+Analitik Dışa Aktarım (Parquet)
+trade_history, karar arşivi ve haberleri aylık bölümlenmiş Parquet dosyalarına
+artımlı olarak ekler. Çevrimdışı analizler (rejime göre kazanma oranı, aşama
+gecikmeleri vb.) canlı SQLite veritabanlarını ve analiz arşivi günlüğünü
+taramak yerine bu dosyalar üzerinde vektörel olarak çalışır.
+
+Dizin düzeni (hive bölümleme):
+    data/analytics/trades/month=YYYYMM/part-<zaman>.parquet
+    data/analytics/decisions/month=YYYYMM/part-<zaman>.parquet
+    data/analytics/news/month=YYYYMM/part-<zaman>.parquet
+
+pyarrow isteğe bağlıdır; yalnızca bu modül kullanıldığında gerekir.
+
+Kullanım:
+    python -m utils.analytics_export            # artımlı dışa aktarım
+    python -m utils.analytics_export --report   # dışa aktarım + özet rapor
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+import config
+from database.news_db import NEWS_COLUMNS, PARTITION_GLOB, month_key
+from utils.logger import setup_logger
+from utils.result_log import open_result_log, ANALYSIS_ARCHIVE
+
+logger = setup_logger("AnalyticsExport")
+
+# Rejim = pattern analizindeki trend üçlüsü
+REGIME_COLUMNS = ("trend_h1", "trend_h4", "trend_d1")
+STAGE_LATENCY_COLUMNS = ("stage1_ms", "stage2_ms", "stage3_ms")
+
+DECISION_FIELDS = (
+    ("timestamp", "string"), ("symbol", "string"), ("decision", "string"),
+    ("confidence", "float64"), ("analysis_type", "string"), ("entry_price", "float64"),
+    ("stop_loss", "float64"), ("take_profit", "float64"), ("rr_ratio", "float64"),
+    ("stage1_ms", "float64"), ("stage2_ms", "float64"), ("stage3_ms", "float64")
+)
+
+
+def _require_pyarrow():
+    """pyarrow modüllerini döndürür; kurulu değilse açıklayıcı ImportError"""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Analitik dışa aktarım için pyarrow gerekli: pip install pyarrow") from e
+    return pa, pc, ds, pq
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AnalyticsExporter:
+    """Canlı veritabanlarından Parquet bölümlerine artımlı dışa aktarıcı"""
+
+    def __init__(self, export_dir=None, learning_db_path=None, news_db_path=None, results_dir=None):
+        """
+        Argümanlar:
+            export_dir: Parquet bölümlerinin yazılacağı dizin (varsayılanı config'den alır)
+            learning_db_path: trade_history'yi içeren learning.db
+            news_db_path: Haber veritabanı
+            results_dir: Karar arşivi günlüğünün kök dizini (varsayılanı config'den alır)
+        """
+        self.export_dir = export_dir or getattr(config, 'ANALYTICS_EXPORT_DIR', './data/analytics')
+        self.learning_db_path = learning_db_path or "./database/learning.db"
+        self.news_db_path = news_db_path or config.NEWS_DB_PATH
+        self.results_dir = results_dir
+        self.state_path = os.path.join(self.export_dir, "_export_state.json")
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------ durum
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        """Yüksek su işaretlerini atomik olarak yazar (bölüm dosyaları yazıldıktan sonra)"""
+        os.makedirs(self.export_dir, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _write_partitions(self, dataset, rows, schema, month_of):
+        """Satırları aylara göre gruplayıp her ay için yeni bir part dosyası ekler"""
+        pa, _, _, pq = _require_pyarrow()
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(month_of(row), []).append(row)
+
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        for month, month_rows in by_month.items():
+            directory = os.path.join(self.export_dir, dataset, f"month={month}")
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = os.path.join(directory, f".part-{stamp}.parquet.tmp")
+            pq.write_table(pa.Table.from_pylist(month_rows, schema=schema), tmp_path)
+            os.replace(tmp_path, os.path.join(directory, f"part-{stamp}.parquet"))
+        return len(rows)
+
+    # ------------------------------------------------------------------ veri setleri
+
+    def export_trades(self):
+        """
+        Sonuçlanmış işlemleri (close_time yüksek su işaretinden yeni) ekler.
+        PENDING işlemler kapanınca dışa aktarılır; sonradan düzeltilen bir işlem
+        yeniden eklenir ve sorgu tarafında id başına son satır kullanılır.
+        """
+        pa, _, _, _ = _require_pyarrow()
+        since = self.state.get("trades_close_time", "")
+        with sqlite3.connect(self.learning_db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            columns = conn.execute("PRAGMA table_info(trade_history)").fetchall()
+            rows = [dict(r) for r in conn.execute("""
+                SELECT * FROM trade_history
+                WHERE outcome IS NOT NULL AND outcome != 'PENDING' AND close_time > ?
+                ORDER BY close_time
+            """, (since,))]
+        if not rows:
+            return 0
+
+        # SQLite bildirilen türlerinden Arrow şeması; sayılar analiz için float64
+        fields, converters = [], {}
+        for column in columns:
+            name, declared = column["name"], (column["type"] or "").upper()
+            if name == "id":
+                fields.append(pa.field(name, pa.int64()))
+            elif declared == "BOOLEAN":
+                fields.append(pa.field(name, pa.bool_()))
+                converters[name] = lambda v: None if v is None else bool(v)
+            elif declared in ("INTEGER", "REAL"):
+                fields.append(pa.field(name, pa.float64()))
+                converters[name] = _to_float
+            else:
+                fields.append(pa.field(name, pa.string()))
+                converters[name] = lambda v: None if v is None else str(v)
+        for row in rows:
+            for name, convert in converters.items():
+                row[name] = convert(row.get(name))
+
+        count = self._write_partitions("trades", rows, pa.schema(fields), lambda r: month_key(r["close_time"]))
+        self.state["trades_close_time"] = rows[-1]["close_time"]
+        self._save_state()
+        return count
+
+    def _read_archive(self):
+        """Karar arşivindeki kayıtlar (en yeni başta)"""
+        return open_result_log(ANALYSIS_ARCHIVE, self.results_dir).entries()
+
+    def export_decisions(self):
+        """Karar arşivinden zaman damgası yüksek su işaretinden yeni kayıtları ekler"""
+        pa, _, _, _ = _require_pyarrow()
+        since = self.state.get("decisions_timestamp", "")
+        rows = []
+        for entry in self._read_archive():
+            timestamp = entry.get("timestamp") or ""
+            if timestamp <= since:
+                continue
+            data = entry.get("data") or {}
+            timings = data.get("stage_timings") or {}
+            row = {"timestamp": timestamp, "symbol": entry.get("symbol")}
+            for name, kind in DECISION_FIELDS[2:]:
+                value = timings.get(name) if name in STAGE_LATENCY_COLUMNS else data.get(name)
+                row[name] = _to_float(value) if kind == "float64" else (None if value is None else str(value))
+            rows.append(row)
+        if not rows:
+            return 0
+
+        rows.sort(key=lambda r: r["timestamp"])
+        schema = pa.schema([pa.field(name, getattr(pa, kind)()) for name, kind in DECISION_FIELDS])
+        count = self._write_partitions("decisions", rows, schema, lambda r: month_key(r["timestamp"]))
+        self.state["decisions_timestamp"] = rows[-1]["timestamp"]
+        self._save_state()
+        return count
+
+    def export_news(self):
+        """
+        Haberleri bölüm (ay) başına id yüksek su işaretinden itibaren ekler.
+        Her ayın id bloğu ayrıdır ve geç gelen haberler yayın tarihine göre eski
+        bir aya yazılabilir; tek bir genel id işareti bunları atlardı.
+        """
+        pa, _, _, _ = _require_pyarrow()
+        # Eski durum dosyası: genel işaret her bölüm için başlangıç değeri olur
+        legacy_since = self.state.get("news_id", 0)
+        last_ids = self.state.get("news_ids", {})
+        rows, new_last_ids = [], dict(last_ids)
+        with sqlite3.connect(self.news_db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            tables = [r[0] for r in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name", (PARTITION_GLOB,)
+            )]
+            for table in tables:
+                table_rows = [dict(r) for r in conn.execute(
+                    f"SELECT {', '.join(NEWS_COLUMNS)} FROM {table} WHERE id > ? ORDER BY id",
+                    (last_ids.get(table, legacy_since),)
+                )]
+                if table_rows:
+                    rows.extend(table_rows)
+                    new_last_ids[table] = table_rows[-1]["id"]
+        if not rows:
+            return 0
+
+        for row in rows:
+            row["sentiment_score"] = _to_float(row["sentiment_score"])
+            for name in NEWS_COLUMNS:
+                if name not in ("id", "sentiment_score") and row[name] is not None:
+                    row[name] = str(row[name])
+        schema = pa.schema([
+            pa.field(name, pa.int64() if name == "id" else pa.float64() if name == "sentiment_score" else pa.string())
+            for name in NEWS_COLUMNS
+        ])
+        count = self._write_partitions("news", rows, schema, lambda r: month_key(r["published_at"]))
+        self.state["news_ids"] = new_last_ids
+        self.state.pop("news_id", None)
+        self._save_state()
+        return count
+
+    def export_all(self):
+        """
+        Tüm veri setlerini artımlı olarak dışa aktarır
+
+        Döner:
+            {veri seti: eklenen satır sayısı}
+        """
+        summary = {}
+        for dataset, export in (("trades", self.export_trades), ("decisions", self.export_decisions), ("news", self.export_news)):
+            try:
+                summary[dataset] = export()
+            except ImportError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ {dataset} dışa aktarılamadı: {str(e)}")
+                summary[dataset] = None
+        logger.info(f"📤 Analitik dışa aktarım: {summary}")
+        return summary
+
+
+class AnalyticsStore:
+    """Dışa aktarılmış Parquet bölümleri üzerinde vektörel sorgu yardımcısı"""
+
+    def __init__(self, export_dir=None):
+        self.export_dir = export_dir or getattr(config, 'ANALYTICS_EXPORT_DIR', './data/analytics')
+
+    def load(self, dataset, columns=None, filter=None):
+        """
+        Bir veri setini Arrow tablosu olarak yükler (ay bölümü 'month' sütunu olarak gelir)
+
+        Argümanlar:
+            dataset: "trades", "decisions" veya "news"
+            columns: Okunacak sütunlar (None: hepsi)
+            filter: pyarrow.dataset ifadesi, ör. ds.field("month") == "202601"
+        """
+        pa, pc, ds, _ = _require_pyarrow()
+        path = os.path.join(self.export_dir, dataset)
+        if not os.path.isdir(path):
+            return pa.table({})
+        # Düzeltilip yeniden aktarılan işlemler: id başına en son satır (id her zaman okunur)
+        drop_id = dataset == "trades" and columns is not None and "id" not in columns
+        if drop_id:
+            columns = list(columns) + ["id"]
+        table = ds.dataset(path, format="parquet", partitioning="hive",
+                           exclude_invalid_files=True).to_table(columns=columns, filter=filter)
+
+        if dataset == "trades" and table.num_rows:
+            table = table.append_column("_row", pa.array(range(table.num_rows), pa.int64()))
+            last = table.group_by("id").aggregate([("_row", "max")]).column("_row_max")
+            # Satır numaraları artan sırada alınır (orijinal sıra korunur)
+            table = table.take(pc.take(last, pc.sort_indices(last))).drop_columns(["_row"])
+        if drop_id:
+            table = table.drop_columns(["id"])
+        return table
+
+    def win_rate_by_regime(self, by=REGIME_COLUMNS, min_samples=1):
+        """
+        Sonuçlanmış (WIN/LOSS) işlemlerde rejime göre kazanma oranı
+
+        Döner:
+            Kazanma oranına göre azalan [{<rejim sütunları>, "total", "wins", "win_rate", "avg_pips"}, ...]
+        """
+        pa, pc, _, _ = _require_pyarrow()
+        table = self.load("trades", columns=list(by) + ["outcome", "profit_pips"])
+        if not table.num_rows:
+            return []
+        table = table.filter(pc.is_in(table["outcome"], pa.array(["WIN", "LOSS"])))
+        table = table.append_column("is_win", pc.cast(pc.equal(table["outcome"], "WIN"), pa.int64()))
+        grouped = table.group_by(list(by)).aggregate([
+            ("is_win", "sum"), ("is_win", "count"), ("profit_pips", "mean")
+        ])
+
+        results = []
+        for row in grouped.to_pylist():
+            total = row["is_win_count"]
+            if total < min_samples:
+                continue
+            item = {key: row[key] for key in by}
+            item.update({
+                "total": total,
+                "wins": row["is_win_sum"],
+                "win_rate": round(row["is_win_sum"] / total * 100, 1),
+                "avg_pips": round(row["profit_pips_mean"] or 0, 1)
+            })
+            results.append(item)
+        return sorted(results, key=lambda r: (-r["win_rate"], -r["total"]))
+
+    def latency_by_stage(self):
+        """
+        Aşama başına gecikme dağılımı (ms). 3. aşama, adayın hazırlanmasından
+        kararın işlenmesine kadar geçen süredir (dağıtıcı kuyruğu dahil).
+
+        Döner:
+            {aşama: {"count", "mean_ms", "p50_ms", "p90_ms", "p99_ms"}}
+        """
+        _, pc, _, _ = _require_pyarrow()
+        table = self.load("decisions", columns=list(STAGE_LATENCY_COLUMNS))
+        stats = {}
+        for column in STAGE_LATENCY_COLUMNS:
+            if column not in table.column_names:
+                continue
+            values = pc.drop_null(table[column])
+            if not len(values):
+                continue
+            p50, p90, p99 = pc.quantile(values, q=[0.5, 0.9, 0.99]).to_pylist()
+            stats[column.replace("_ms", "")] = {
+                "count": len(values),
+                "mean_ms": round(pc.mean(values).as_py(), 1),
+                "p50_ms": round(p50, 1),
+                "p90_ms": round(p90, 1),
+                "p99_ms": round(p99, 1)
+            }
+        return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Artımlı Parquet analitik dışa aktarımı")
+    parser.add_argument("--export-dir", default=None)
+    parser.add_argument("--report", action="store_true", help="Dışa aktarımdan sonra özet rapor yazdır")
+    args = parser.parse_args()
+
+    try:
+        print(AnalyticsExporter(export_dir=args.export_dir).export_all())
+    except ImportError as e:
+        raise SystemExit(f"❌ {str(e)}")
+
+    if args.report:
+        store = AnalyticsStore(export_dir=args.export_dir)
+        print("\n📊 Rejime göre kazanma oranı:")
+        for row in store.win_rate_by_regime(min_samples=3):
+            print(f"  {row['trend_h1']}/{row['trend_h4']}/{row['trend_d1']}: %{row['win_rate']} "
+                  f"({row['wins']}/{row['total']}, ort. {row['avg_pips']} pip)")
+        print("\n⏱️ Aşama gecikmeleri:")
+        for stage, values in store.latency_by_stage().items():
+            print(f"  {stage}: {values}")
@@ -8,17 +8,17 @@ from rich.panel import Panel
 from rich.layout import Layout
 from rich.text import Text
 from rich.live import Live
+from utils.result_log import open_result_log, WEB_RESULTS, ANALYSIS_ARCHIVE
 
 console = Console()
 
 class UIFormatter:
     """Terminal çıktısı ve web sonuçları için biçimlendirme sağlar"""
     
-    def __init__(self, results_path="data/web_results.json"):
-        self.results_path = results_path
-        self.all_results = []
-        # Dizinin var olduğundan emin ol
-        os.makedirs(os.path.dirname(self.results_path), exist_ok=True)
+    def __init__(self, results_dir=None):
+        # Web sonuçları (son 200) ve analiz arşivi (son 5000) sadece eklenen günlüklerde
+        self.results = open_result_log(WEB_RESULTS, results_dir)
+        self.archive = open_result_log(ANALYSIS_ARCHIVE, results_dir)
         
         self.symbol_map = {
             "EURUSD=X": "EUR/USD (Euro Dolar)",
@@ -96,9 +96,9 @@ class UIFormatter:
         self.save_result_for_web(symbol, signal_data)
 
     def save_result_for_web(self, symbol, signal_data, archive=False):
-        """Sonuçları web dashboard'u için JSON dosyasına kaydeder.
+        """Sonuçları web dashboard'u için sonuç günlüğüne ekler.
 
-        Eğer `archive=True` ise aynı sonucu `data/analysis_archive.json` dosyasına
+        Eğer `archive=True` ise aynı sonucu analiz arşivi günlüğüne de
         tarih/saat bilgisi ile ekleriz. Bu, ileriye dönük test ve doğrulama için kullanılır.
         """
         # Augment signal_data with presentation-friendly fields
@@ -137,16 +137,6 @@ class UIFormatter:
             "data": signal_data
         }
         
-        # Mevcut sonuçları yükle
-        try:
-            if os.path.exists(self.results_path):
-                with open(self.results_path, "r", encoding="utf-8") as f:
-                    self.all_results = json.load(f)
-            else:
-                self.all_results = []
-        except:
-            self.all_results = []
-
         # Deduplication (Mükerrer Kaydı Önle):
         # Eğer bu sembol için son karar aynıysa ve bu bir "BEKLE" (Wait) kararıysa, kaydetme.
         # Bu, dashboard'un aynı mesajlarla dolmasını engeller.
@@ -154,8 +144,8 @@ class UIFormatter:
             current_decision = str(signal_data.get('decision', '')).upper()
             is_wait_state = "BEKLE" in current_decision
             
-            # Sonuçlar listesinde bu sembolü bul
-            last_entry = next((r for r in self.all_results if r.get('symbol') == symbol), None)
+            # Sembolün son kaydı (sembol indeksinden, dosya okunmadan)
+            last_entry = self.results.latest(symbol)
             if last_entry and is_wait_state:
                 last_decision = str(last_entry.get('data', {}).get('decision', '')).upper()
                 if last_decision == current_decision:
@@ -165,31 +155,13 @@ class UIFormatter:
         except Exception:
             pass
             
-        # Yeni sonucu ekle (son 200 kaydı tut)
-        self.all_results.insert(0, result)
-        self.all_results = self.all_results[:200]
-        
-        with open(self.results_path, "w", encoding="utf-8") as f:
-            json.dump(self.all_results, f, ensure_ascii=False, indent=2)
+        # Yeni sonucu ekle (görünüm son 200 kaydı tutar)
+        self.results.append(result)
 
-        # Eğer arşivlenmesi istenmişse, özel bir arşiv dosyasına ekle
+        # Eğer arşivlenmesi istenmişse, arşiv günlüğüne de ekle (son 5000 kayıt)
         if archive:
             try:
-                archive_path = os.path.join(os.path.dirname(self.results_path), 'analysis_archive.json')
-                os.makedirs(os.path.dirname(archive_path), exist_ok=True)
-                if os.path.exists(archive_path):
-                    with open(archive_path, 'r', encoding='utf-8') as af:
-                        archive_list = json.load(af)
-                else:
-                    archive_list = []
-
-                # Yeni girdiyi başa ekle (en son ilk görünür)
-                archive_list.insert(0, result)
-                # Arşiv boyutunu sınırlayalım
-                archive_list = archive_list[:5000]
-
-                with open(archive_path, 'w', encoding='utf-8') as af:
-                    json.dump(archive_list, af, ensure_ascii=False, indent=2)
+                self.archive.append(result)
             except Exception:
                 pass
 
@@ -6,12 +6,78 @@ Bot kendi performansını izler ve zamanla daha iyi kararlar verir
 import sqlite3
 import config
 from datetime import datetime, timedelta
+import hashlib
 import json
 import os
+import threading
+import time
 from utils.logger import setup_logger
+from utils.pending_book import PendingTradeBook
 
 logger = setup_logger("LearningSystem")
 
+# Artımlı pattern sayaçları: (tablo, anahtar sütunları). Sonuçlanan (WIN/LOSS) her
+# işlem update_trade_outcome içinde aynı transaction'da ilgili satırı günceller;
+# analyze_patterns tüm geçmişi taramak yerine bu küçük tabloları okur.
+PATTERN_STATS_TABLES = {
+    "trend": ("pattern_stats_trend", ("trend_h1", "trend_h4", "trend_d1")),
+    "confidence": ("pattern_stats_confidence", ("conf_range",)),
+    "sentiment": ("pattern_stats_sentiment", ("sentiment_category", "direction"))
+}
+
+
+def _confidence_range(confidence):
+    """analyze_patterns'daki güven aralığı kovası"""
+    if confidence is not None and confidence >= 95:
+        return '95+'
+    if confidence is not None and confidence >= 90:
+        return '90-94'
+    return '<90'
+
+
+def _sentiment_category(sentiment):
+    """analyze_patterns'daki haber duygu kategorisi"""
+    if sentiment > 50:
+        return 'Strong Bullish'
+    if sentiment > 0:
+        return 'Weak Bullish'
+    if sentiment > -50:
+        return 'Weak Bearish'
+    return 'Strong Bearish'
+
+
+# learning.db şema göçleri: (sürüm, açıklama, TradePerformanceTracker metodu).
+# Uygulanan son sürüm PRAGMA user_version'da tutulur; yeni şema değişikliği
+# listenin sonuna yeni bir sürüm olarak eklenir, eskiler değiştirilmez.
+MIGRATIONS = (
+    (1, "pattern sayaç tabloları", "_migrate_pattern_stats"),
+    (2, "learning_insights tekil anahtar ve anlık görüntüler", "_migrate_insights"),
+    (3, "trade_history ve entry_cooldowns indeksleri", "_migrate_trade_indexes"),
+)
+
+# Pattern anahtarına girmeyen ölçüm alanları (anahtar = pattern'in kimliği)
+INSIGHT_METRIC_FIELDS = ("win_rate", "sample_size", "avg_win")
+
+
+def _insight_key(pattern):
+    """learning_insights satırının (pattern_type ile birlikte) tekil anahtarı"""
+    identity = {k: v for k, v in pattern.items() if k not in INSIGHT_METRIC_FIELDS}
+    return json.dumps(identity, sort_keys=True, ensure_ascii=False)
+
+
+def _pattern_keys(trade):
+    """
+    Sonuçlanmış bir işlemin her sayaç tablosundaki anahtarını döndürür.
+    NULL değerler birincil anahtarda ayrı sayıldığı için '' olarak saklanır.
+    """
+    keys = {
+        "trend": tuple(trade["trend_" + tf] or '' for tf in ("h1", "h4", "d1")),
+        "confidence": (_confidence_range(trade["llm_confidence"]),)
+    }
+    if trade["news_sentiment"] is not None:
+        keys["sentiment"] = (_sentiment_category(trade["news_sentiment"]), trade["direction"] or '')
+    return keys
+
 
 class TradePerformanceTracker:
     """
@@ -22,6 +88,18 @@ class TradePerformanceTracker:
     def __init__(self, db_path="./database/learning.db"):
         self.db_path = db_path
         self.ensure_db_exists()
+        
+        # Öğrenilmiş desenlerin bellekteki anlık görüntüsü: days_back -> (yüklenme zamanı, liste)
+        # Her LLM kararında veritabanı açılmaz; analyze_patterns/_save_insights veya TTL yeniler
+        self._patterns_cache = {}
+        self._patterns_lock = threading.Lock()
+        
+        # Bekleyen işlemlerin SL/TP seviye indeksli bellekteki defteri; ekleme ve kapatmada
+        # senkron tutulur, başka süreçlerin (dashboard) değişiklikleri için periyodik yeniden yüklenir
+        self.pending_book = PendingTradeBook(
+            self.get_pending_trades,
+            resync_seconds=getattr(config, 'PENDING_BOOK_RESYNC_SECONDS', 300)
+        )
     
     def ensure_db_exists(self):
         """Veritabanı ve tabloları oluştur"""
@@ -77,12 +155,7 @@ class TradePerformanceTracker:
                 )
             """)
             
-            conn.commit()
-        
-        logger.info("✅ Learning database initialized")
-
-        # Cooldowns table: prevent re-entry near closed price for a period
-        with sqlite3.connect(self.db_path) as conn:
+            # Cooldowns table: prevent re-entry near closed price for a period
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS entry_cooldowns (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -93,7 +166,71 @@ class TradePerformanceTracker:
                     tolerance REAL
                 )
             """)
+            
             conn.commit()
+            self._apply_migrations(conn)
+        
+        logger.info("✅ Learning database initialized")
+    
+    def _apply_migrations(self, conn):
+        """
+        Bekleyen şema göçlerini sırayla uygular. Uygulanan son sürüm
+        PRAGMA user_version'da tutulur; her göç kendi transaction'ında çalışır
+        ve başarısız olursa geri alınır.
+        """
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, description, method in MIGRATIONS:
+            if version <= current:
+                continue
+            started = time.monotonic()
+            try:
+                conn.execute("BEGIN")
+                getattr(self, method)(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"❌ learning.db göçü v{version} ({description}) başarısız: {str(e)}")
+                raise
+            logger.info(f"🧱 learning.db şeması v{version}: {description} ({time.monotonic() - started:.1f}s)")
+    
+    def _migrate_pattern_stats(self, conn):
+        """Göç 1: pattern sayaç tablolarını oluşturur ve mevcut geçmişten doldurur"""
+        for table, key_columns in PATTERN_STATS_TABLES.values():
+            columns = ", ".join(f"{c} TEXT NOT NULL" for c in key_columns)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {columns},
+                    total INTEGER NOT NULL DEFAULT 0,
+                    wins INTEGER NOT NULL DEFAULT 0,
+                    win_pips_sum REAL NOT NULL DEFAULT 0,
+                    pips_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY ({", ".join(key_columns)})
+                )
+            """)
+        self._rebuild_pattern_stats(conn)
+    
+    def _migrate_trade_indexes(self, conn):
+        """
+        Göç 3: sıcak sorgular için indeksler
+        - Açık işlemler (get_pending_trades, mükerrer kontrolü, /api/open_positions)
+          yalnızca PENDING satırları içeren kısmi indeksten okunur
+        - /api/stats sayımları (outcome, symbol) indeksini kapsayıcı olarak tarar
+        - Yeniden giriş bekleme kontrolü (symbol, blocked_until) ile aranır
+        """
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_trades_pending
+            ON trade_history (symbol, direction, timestamp)
+            WHERE outcome = 'PENDING'
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_trades_outcome_symbol
+            ON trade_history (outcome, symbol)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cooldowns_symbol_until
+            ON entry_cooldowns (symbol, blocked_until)
+        """)
     
     def log_trade_decision(self, symbol, direction, context, llm_decision, dry_run=True, position_size=None, duplicate_tolerance=None):
         """
@@ -120,19 +257,18 @@ class TradePerformanceTracker:
             conn.row_factory = sqlite3.Row
             if entry_price is not None:
                 try:
-                    cur = conn.execute("SELECT * FROM trade_history WHERE outcome = 'PENDING' AND symbol = ? AND direction = ? ORDER BY timestamp DESC", (symbol, direction))
-                    rows = cur.fetchall()
-                    for r in rows:
-                        existing_entry = r['entry_price']
-                        if existing_entry is None:
-                            continue
-                        try:
-                            if abs(float(existing_entry) - float(entry_price)) <= float(tol):
-                                # Duplicate found, return existing id
-                                logger.info(f"⚠️ Duplicate pending trade detected for {symbol} {direction} near price {entry_price}. Skipping new log.")
-                                return r['id']
-                        except Exception:
-                            continue
+                    # Kısmi PENDING indeksi (symbol, direction, timestamp) filtreyi ve sıralamayı karşılar
+                    r = conn.execute("""
+                        SELECT id FROM trade_history
+                        WHERE outcome = 'PENDING' AND symbol = ? AND direction = ?
+                          AND entry_price IS NOT NULL AND ABS(entry_price - ?) <= ?
+                        ORDER BY timestamp DESC
+                        LIMIT 1
+                    """, (symbol, direction, float(entry_price), float(tol))).fetchone()
+                    if r is not None:
+                        # Duplicate found, return existing id
+                        logger.info(f"⚠️ Duplicate pending trade detected for {symbol} {direction} near price {entry_price}. Skipping new log.")
+                        return r['id']
                 except Exception:
                     pass
 
@@ -165,7 +301,9 @@ class TradePerformanceTracker:
 
             trade_id = cursor.lastrowid
             conn.commit()
+            row = conn.execute("SELECT * FROM trade_history WHERE id = ?", (trade_id,)).fetchone()
         
+        self.pending_book.add(dict(row))
         logger.info(f"📝 Trade logged: ID {trade_id} - {symbol} {direction}")
         return trade_id
     
@@ -179,21 +317,37 @@ class TradePerformanceTracker:
             profit_pips: Kar/Zarar (pip)
             profit_amount: Kar/Zarar (para)
             close_price: Kapanış fiyatı
+
+        Returns:
+            İşlem bu çağrıyla güncellendiyse True; işlem artık PENDING değilse
+            veya silinmişse (ör. dashboard geçmişi temizledi) False
         """
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+            conn.row_factory = sqlite3.Row
+            previous = conn.execute("SELECT * FROM trade_history WHERE id = ?", (trade_id,)).fetchone()
+            # Koşullu UPDATE: yalnızca hâlâ PENDING olan işlem sonuçlandırılır
+            cursor = conn.execute("""
                 UPDATE trade_history
                 SET outcome = ?,
                     profit_pips = ?,
                     profit_amount = ?,
                     close_price = ?,
                     close_time = ?
-                WHERE id = ?
+                WHERE id = ? AND outcome = 'PENDING'
             """, (outcome, profit_pips, profit_amount, close_price, datetime.now(), trade_id))
+            updated = cursor.rowcount == 1
+            if updated:
+                self._update_pattern_stats(conn, previous, outcome, profit_pips)
             
             conn.commit()
         
+        if outcome != 'PENDING' or not updated:
+            self.pending_book.remove(trade_id)
+        if not updated:
+            logger.info(f"⏭️ Trade ID {trade_id} artık bekleyen değil (kapanmış/silinmiş); güncellenmedi")
+            return False
         logger.info(f"✅ Trade updated: ID {trade_id} - {outcome} ({profit_pips} pips)")
+        return True
 
     def get_pending_trades(self):
         """Henüz sonuçlanmamış işlemleri getir"""
@@ -207,8 +361,10 @@ class TradePerformanceTracker:
         # Determine outcome relative to direction
         with sqlite3.connect(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
-            row = conn.execute("SELECT * FROM trade_history WHERE id = ?", (trade_id,)).fetchone()
+            row = conn.execute("SELECT * FROM trade_history WHERE id = ? AND outcome = 'PENDING'", (trade_id,)).fetchone()
             if not row:
+                # Başka bir süreç kapatmış veya silmiş: defterden düş
+                self.pending_book.remove(trade_id)
                 return False
             direction = row['direction']
             entry = row['entry_price'] or 0
@@ -225,13 +381,19 @@ class TradePerformanceTracker:
                 else:
                     outcome = 'BREAKEVEN'
 
-            conn.execute("""
+            cursor = conn.execute("""
                 UPDATE trade_history
                 SET outcome = ?, profit_pips = ?, profit_amount = ?, close_price = ?, close_time = ?
-                WHERE id = ?
+                WHERE id = ? AND outcome = 'PENDING'
             """, (outcome, profit_pips, profit if entry else None, close_price, datetime.now(), trade_id))
+            updated = cursor.rowcount == 1
+            if updated:
+                self._update_pattern_stats(conn, row, outcome, profit_pips)
             conn.commit()
 
+        self.pending_book.remove(trade_id)
+        if not updated:
+            return False
         logger.info(f"🛑 Trade ID {trade_id} force-closed by system (reason={reason}) -> outcome={outcome}")
         return True
 
@@ -282,52 +444,102 @@ class TradePerformanceTracker:
             'skipped': 0,
             'errors': 0
         }
-        pending = self.get_pending_trades()
-        for t in pending:
-            summary['checked'] += 1
+        # Fiyat sembol başına bir kez alınır; tetiklenenler defterden bisect ile bulunur
+        self.pending_book.reload()
+        for symbol in self.pending_book.symbols():
+            open_count = len(self.pending_book.trades(symbol))
+            summary['checked'] += open_count
             try:
-                symbol = t['symbol']
                 current = price_getter(symbol)
-                if current is None:
-                    summary['skipped'] += 1
-                    continue
-
-                entry = t.get('entry_price') or 0
-                sl = t.get('stop_loss')
-                tp = t.get('take_profit')
-                direction = t.get('direction')
-
-                outcome = None
-                if direction == 'BUY':
-                    if tp is not None and current >= tp:
-                        outcome = 'WIN'
-                    elif sl is not None and current <= sl:
-                        outcome = 'LOSS'
-                else:  # SELL
-                    if tp is not None and current <= tp:
-                        outcome = 'WIN'
-                    elif sl is not None and current >= sl:
-                        outcome = 'LOSS'
+            except Exception:
+                summary['errors'] += open_count
+                continue
+            if current is None:
+                summary['skipped'] += open_count
+                continue
 
-                if outcome:
+            hits = self.pending_book.triggered(symbol, current)
+            summary['skipped'] += open_count - len(hits)
+            for t, outcome in hits:
+                try:
+                    entry = t.get('entry_price') or 0
                     profit_pips = None
                     try:
-                        profit = current - entry if direction == 'BUY' else entry - current
+                        profit = current - entry if t.get('direction') == 'BUY' else entry - current
                         profit_pips = abs(profit) * (100 if 'JPY' in symbol else 10000)
                     except Exception:
                         profit_pips = None
 
-                    self.update_trade_outcome(trade_id=t['id'], outcome=outcome, profit_pips=profit_pips, close_price=current)
-                    summary['closed'] += 1
-                else:
-                    summary['skipped'] += 1
-            except Exception:
-                summary['errors'] += 1
-                continue
+                    if self.update_trade_outcome(trade_id=t['id'], outcome=outcome, profit_pips=profit_pips, close_price=current):
+                        summary['closed'] += 1
+                    else:
+                        summary['skipped'] += 1
+                except Exception:
+                    summary['errors'] += 1
 
         logger.info(f"🔁 Reconcile on resume: checked={summary['checked']} closed={summary['closed']} skipped={summary['skipped']}")
         return summary
     
+    def _update_pattern_stats(self, conn, trade, outcome, profit_pips):
+        """
+        İşlemin sonucu değiştiğinde pattern sayaçlarını aynı transaction içinde
+        günceller. Önceki sonuç da WIN/LOSS ise (ör. elle düzeltme) önce geri alınır.
+        """
+        if trade is None:
+            return
+        
+        def _delta(result, pips, sign):
+            # Ortalama kazanç pip'i eski AVG(CASE ...) ile aynı: pip'i bilinmeyen kazançlar paydaya girmez
+            won = result == 'WIN'
+            known = not won or pips is not None
+            return (sign, sign * int(won), sign * ((pips or 0) if won else 0), sign * int(known))
+        
+        changes = []
+        if trade["outcome"] in ('WIN', 'LOSS'):
+            changes.append(_delta(trade["outcome"], trade["profit_pips"], -1))
+        if outcome in ('WIN', 'LOSS'):
+            changes.append(_delta(outcome, profit_pips, 1))
+        if not changes:
+            return
+        
+        for pattern, key in _pattern_keys(trade).items():
+            table, key_columns = PATTERN_STATS_TABLES[pattern]
+            for total, wins, pips, pips_count in changes:
+                conn.execute(f"""
+                    INSERT INTO {table} ({", ".join(key_columns)}, total, wins, win_pips_sum, pips_count)
+                    VALUES ({", ".join("?" * len(key_columns))}, ?, ?, ?, ?)
+                    ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET
+                        total = total + excluded.total,
+                        wins = wins + excluded.wins,
+                        win_pips_sum = win_pips_sum + excluded.win_pips_sum,
+                        pips_count = pips_count + excluded.pips_count
+                """, (*key, total, wins, pips, pips_count))
+    
+    def rebuild_pattern_stats(self):
+        """Pattern sayaçlarını trade_history'den baştan hesaplar (tek seferlik tam tarama)"""
+        with sqlite3.connect(self.db_path) as conn:
+            self._rebuild_pattern_stats(conn)
+            conn.commit()
+    
+    def _rebuild_pattern_stats(self, conn):
+        row_factory = conn.row_factory
+        conn.row_factory = sqlite3.Row
+        try:
+            for table, _ in PATTERN_STATS_TABLES.values():
+                conn.execute(f"DELETE FROM {table}")
+            
+            closed = conn.execute("""
+                SELECT * FROM trade_history WHERE outcome IN ('WIN', 'LOSS')
+            """).fetchall()
+            for trade in closed:
+                replay = dict(trade, outcome=None)
+                self._update_pattern_stats(conn, replay, trade["outcome"], trade["profit_pips"])
+        finally:
+            conn.row_factory = row_factory
+        
+        if closed:
+            logger.info(f"🔁 Pattern sayaçları {len(closed)} kapanmış işlemden yeniden oluşturuldu")
+    
     def analyze_patterns(self, min_samples=10):
         """
         Pattern'leri analiz et ve öğren
@@ -340,28 +552,25 @@ class TradePerformanceTracker:
         with sqlite3.connect(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             
+            # Sorgular tüm geçmişi değil, artımlı güncellenen küçük sayaç tablolarını okur
+            
             # 1. Trend bazlı analiz
             trend_analysis = conn.execute("""
-                SELECT 
-                    trend_h1, trend_h4, trend_d1,
-                    COUNT(*) as total,
-                    SUM(CASE WHEN outcome = 'WIN' THEN 1 ELSE 0 END) as wins,
-                    AVG(CASE WHEN outcome = 'WIN' THEN profit_pips ELSE 0 END) as avg_win_pips
-                FROM trade_history
-                WHERE outcome IN ('WIN', 'LOSS')
-                GROUP BY trend_h1, trend_h4, trend_d1
-                HAVING COUNT(*) >= ?
+                SELECT trend_h1, trend_h4, trend_d1, total, wins,
+                       COALESCE(win_pips_sum * 1.0 / NULLIF(pips_count, 0), 0) as avg_win_pips
+                FROM pattern_stats_trend
+                WHERE total >= ? AND total > 0
                 ORDER BY wins * 1.0 / total DESC
-            """, (min_samples,)).fetchall()
+            """, (max(min_samples, 1),)).fetchall()
             
             patterns["trend_patterns"] = []
             for row in trend_analysis:
                 win_rate = (row["wins"] / row["total"]) * 100 if row["total"] > 0 else 0
                 if win_rate >= 60:  # Sadece %60+ başarılı pattern'leri öğren
                     patterns["trend_patterns"].append({
-                        "h1": row["trend_h1"],
-                        "h4": row["trend_h4"],
-                        "d1": row["trend_d1"],
+                        "h1": row["trend_h1"] or None,
+                        "h4": row["trend_h4"] or None,
+                        "d1": row["trend_d1"] or None,
                         "win_rate": round(win_rate, 1),
                         "sample_size": row["total"],
                         "avg_win": round(row["avg_win_pips"], 1)
@@ -369,17 +578,9 @@ class TradePerformanceTracker:
             
             # 2. Confidence bazlı analiz
             confidence_analysis = conn.execute("""
-                SELECT 
-                    CASE 
-                        WHEN llm_confidence >= 95 THEN '95+'
-                        WHEN llm_confidence >= 90 THEN '90-94'
-                        ELSE '<90'
-                    END as conf_range,
-                    COUNT(*) as total,
-                    SUM(CASE WHEN outcome = 'WIN' THEN 1 ELSE 0 END) as wins
-                FROM trade_history
-                WHERE outcome IN ('WIN', 'LOSS')
-                GROUP BY conf_range
+                SELECT conf_range, total, wins
+                FROM pattern_stats_confidence
+                WHERE total > 0
             """).fetchall()
             
             patterns["confidence_analysis"] = []
@@ -393,20 +594,9 @@ class TradePerformanceTracker:
             
             # 3. Haber sentiment etkisi
             sentiment_analysis = conn.execute("""
-                SELECT 
-                    CASE 
-                        WHEN news_sentiment > 50 THEN 'Strong Bullish'
-                        WHEN news_sentiment > 0 THEN 'Weak Bullish'
-                        WHEN news_sentiment > -50 THEN 'Weak Bearish'
-                        ELSE 'Strong Bearish'
-                    END as sentiment_category,
-                    direction,
-                    COUNT(*) as total,
-                    SUM(CASE WHEN outcome = 'WIN' THEN 1 ELSE 0 END) as wins
-                FROM trade_history
-                WHERE outcome IN ('WIN', 'LOSS') AND news_sentiment IS NOT NULL
-                GROUP BY sentiment_category, direction
-                HAVING COUNT(*) >= 5
+                SELECT sentiment_category, direction, total, wins
+                FROM pattern_stats_sentiment
+                WHERE total >= 5
             """).fetchall()
             
             patterns["news_impact"] = []
@@ -414,7 +604,7 @@ class TradePerformanceTracker:
                 win_rate = (row["wins"] / row["total"]) * 100 if row["total"] > 0 else 0
                 patterns["news_impact"].append({
                     "sentiment": row["sentiment_category"],
-                    "direction": row["direction"],
+                    "direction": row["direction"] or None,
                     "win_rate": round(win_rate, 1),
                     "sample_size": row["total"]
                 })
@@ -424,25 +614,170 @@ class TradePerformanceTracker:
         
         return patterns
     
+    def _migrate_insights(self, conn):
+        """
+        Göç 2: learning_insights'ı (pattern_type, pattern_key) ile tekil hale getirir.
+        Eski sürümlerin her analizde eklediği kopyalar sıkıştırılır: her anahtarın
+        en yeni satırı kalır ve sıkıştırılmış küme ilk anlık görüntü sürümü olarak yazılır.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS learning_insight_snapshots (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                checksum TEXT,
+                insight_count INTEGER,
+                insights TEXT
+            )
+        """)
+        
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(learning_insights)")}
+        if "pattern_key" not in columns:
+            conn.execute("ALTER TABLE learning_insights ADD COLUMN pattern_key TEXT")
+        
+        legacy = conn.execute("""
+            SELECT id, pattern_type, pattern_data FROM learning_insights WHERE pattern_key IS NULL
+        """).fetchall()
+        if legacy:
+            for row_id, _, pattern_data in legacy:
+                try:
+                    key = _insight_key(json.loads(pattern_data))
+                except (TypeError, ValueError):
+                    key = str(row_id)
+                conn.execute("UPDATE learning_insights SET pattern_key = ? WHERE id = ?", (key, row_id))
+            
+            before = conn.execute("SELECT COUNT(*) FROM learning_insights").fetchone()[0]
+            conn.execute("""
+                DELETE FROM learning_insights
+                WHERE id NOT IN (SELECT MAX(id) FROM learning_insights GROUP BY pattern_type, pattern_key)
+            """)
+            after = conn.execute("SELECT COUNT(*) FROM learning_insights").fetchone()[0]
+            self._write_insight_snapshot(conn)
+            logger.info(f"🗜️ learning_insights sıkıştırıldı: {before} -> {after} satır")
+        
+        conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_insights_pattern
+            ON learning_insights (pattern_type, pattern_key)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_insights_created_win
+            ON learning_insights (created_at, win_rate)
+        """)
+    
     def _save_insights(self, patterns):
-        """Öğrenilen pattern'leri kaydet"""
+        """
+        Öğrenilen pattern'leri kaydet
+        
+        Her pattern (pattern_type, pattern_key) ile upsert edilir; created_at son
+        doğrulanma zamanıdır. Son analizde artık çıkmayan pattern'ler silinir, böylece
+        tablo güncel pattern kümesi kadar kalır. Küme değiştiyse yeni bir anlık
+        görüntü sürümü yazılır.
+        """
         with sqlite3.connect(self.db_path) as conn:
             for pattern_type, pattern_list in patterns.items():
+                keys = []
                 for pattern in pattern_list:
+                    key = _insight_key(pattern)
+                    keys.append(key)
                     conn.execute("""
-                        INSERT INTO learning_insights (pattern_type, pattern_data, win_rate, sample_size)
-                        VALUES (?, ?, ?, ?)
+                        INSERT INTO learning_insights (pattern_type, pattern_key, pattern_data, win_rate, sample_size)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (pattern_type, pattern_key) DO UPDATE SET
+                            pattern_data = excluded.pattern_data,
+                            win_rate = excluded.win_rate,
+                            sample_size = excluded.sample_size,
+                            created_at = CURRENT_TIMESTAMP
                     """, (
                         pattern_type,
+                        key,
                         json.dumps(pattern),
                         pattern.get("win_rate", 0),
                         pattern.get("sample_size", 0)
                     ))
+                
+                placeholders = ", ".join("?" * len(keys))
+                conn.execute(f"""
+                    DELETE FROM learning_insights
+                    WHERE pattern_type = ? AND pattern_key NOT IN ({placeholders})
+                """, (pattern_type, *keys))
             
+            self._write_insight_snapshot(conn)
             conn.commit()
+        
+        # Yeni içgörüler yazıldı: bellekteki desenleri yenile
+        self.refresh_learned_patterns()
+    
+    def _write_insight_snapshot(self, conn):
+        """
+        Güncel içgörü kümesi son sürümden farklıysa yeni anlık görüntü sürümü ekler
+        ve en eski sürümleri LEARNING_INSIGHT_SNAPSHOTS_KEEP sınırında budar.
+        """
+        rows = conn.execute("""
+            SELECT pattern_type, pattern_data FROM learning_insights ORDER BY pattern_type, pattern_key
+        """).fetchall()
+        insights = [{"type": pattern_type, "data": json.loads(pattern_data)} for pattern_type, pattern_data in rows]
+        payload = json.dumps(insights, sort_keys=True, ensure_ascii=False)
+        checksum = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        
+        last = conn.execute("""
+            SELECT checksum FROM learning_insight_snapshots ORDER BY version DESC LIMIT 1
+        """).fetchone()
+        if last is not None and last[0] == checksum:
+            return
+        
+        conn.execute("""
+            INSERT INTO learning_insight_snapshots (checksum, insight_count, insights) VALUES (?, ?, ?)
+        """, (checksum, len(insights), payload))
+        keep = getattr(config, 'LEARNING_INSIGHT_SNAPSHOTS_KEEP', 50)
+        conn.execute("""
+            DELETE FROM learning_insight_snapshots
+            WHERE version NOT IN (SELECT version FROM learning_insight_snapshots ORDER BY version DESC LIMIT ?)
+        """, (keep,))
+    
+    def get_insight_snapshot(self, version=None):
+        """
+        İçgörü kümesinin belirli (veya en son) sürümünü getirir
+        
+        Returns:
+            {"version", "created_at", "insights"} veya bulunamazsa None
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            if version is None:
+                row = conn.execute("""
+                    SELECT version, created_at, insights FROM learning_insight_snapshots ORDER BY version DESC LIMIT 1
+                """).fetchone()
+            else:
+                row = conn.execute("""
+                    SELECT version, created_at, insights FROM learning_insight_snapshots WHERE version = ?
+                """, (version,)).fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "created_at": row[1], "insights": json.loads(row[2])}
     
     def get_learned_patterns(self, days_back=30):
-        """Son öğrenilen pattern'leri getir"""
+        """
+        Son öğrenilen pattern'leri getir (bellekteki anlık görüntüden)
+        
+        Görüntü analyze_patterns/_save_insights çalıştığında veya
+        LEARNED_PATTERNS_TTL_SECONDS dolduğunda veritabanından yenilenir.
+        """
+        ttl = getattr(config, 'LEARNED_PATTERNS_TTL_SECONDS', 600)
+        with self._patterns_lock:
+            cached = self._patterns_cache.get(days_back)
+            if cached is not None and time.monotonic() - cached[0] < ttl:
+                return list(cached[1])
+            
+            patterns = self._query_learned_patterns(days_back)
+            self._patterns_cache[days_back] = (time.monotonic(), patterns)
+            return list(patterns)
+    
+    def refresh_learned_patterns(self):
+        """Bellekteki desen görüntülerini veritabanından yeniden yükler"""
+        with self._patterns_lock:
+            for days_back in list(self._patterns_cache):
+                self._patterns_cache[days_back] = (time.monotonic(), self._query_learned_patterns(days_back))
+    
+    def _query_learned_patterns(self, days_back):
+        """Pattern'leri veritabanından okur"""
         cutoff = datetime.now() - timedelta(days=days_back)
         
         with sqlite3.connect(self.db_path) as conn:
@@ -6,11 +6,15 @@ Supports multiple news sources
 import requests
 from datetime import datetime, timedelta
 import os
+import config
 from database.news_db import NewsDatabase
 from utils.logger import setup_logger
 
 logger = setup_logger("NewsFetcher")
 
+# NewsAPI'nin sayfa başına izin verdiği en fazla haber
+NEWSAPI_PAGE_SIZE = 100
+
 
 class NewsAPIFetcher:
     """
@@ -35,63 +39,132 @@ class NewsAPIFetcher:
         Returns:
             Eklenen haber sayısı
         """
+        items = self.collect_forex_news(hours_back=hours_back)
+        if items is None:
+            return 0
+        
+        added_count = self.db.add_news_batch(items)
+        logger.info(f"✅ NewsAPI: {added_count} haber eklendi")
+        return added_count
+    
+    def collect_forex_news(self, since=None, hours_back=24):
+        """
+        Forex haberlerini çeker ve puanlar, veritabanına yazmaz
+        
+        Args:
+            since: Bu zaman damgasından (ISO) sonraki haberler; None ise hours_back kullanılır
+            hours_back: since verilmezse kaç saat geriye bakılacak
+            
+        Returns:
+            add_news_batch'e verilebilecek haber sözlükleri listesi (hata durumunda None)
+        """
+        scan = self.scan_forex_news(since=since, hours_back=hours_back)
+        return scan["items"] if scan else None
+    
+    def scan_forex_news(self, since=None, until=None, hours_back=24, max_pages=None):
+        """
+        Haberleri yeniden eskiye sayfa sayfa tarar; `since`'e ulaşınca veya
+        sonuçlar bitince durur. Sembolle eşleşmeyen haberler de taranmış sayılır.
+        
+        Args:
+            since: Bu zaman damgasından (ISO) sonraki haberler; None ise hours_back kullanılır
+            until: Verilirse sadece bu zaman damgasından önceki haberler (yarım kalmış
+                taramanın devamı)
+            hours_back: since verilmezse kaç saat geriye bakılacak
+            max_pages: En fazla istek sayısı (varsayılanı config.NEWSAPI_MAX_PAGES)
+            
+        Returns:
+            {"items", "newest", "oldest", "complete"} sözlüğü (ilk istek başarısızsa None).
+            newest/oldest taranan en yeni/en eski haberin zamanı; complete False ise
+            since ile oldest arasındaki haberler henüz taranmadı.
+        """
         if not self.api_key:
             logger.error("❌ NewsAPI key not found. Set NEWSAPI_KEY in .env")
-            return 0
+            return None
         
         # Arama kelimeleri
         query = "forex OR currency OR EUR OR USD OR GBP OR gold OR trading"
         
         # Tarih aralığı
-        from_date = (datetime.now() - timedelta(hours=hours_back)).isoformat()
+        from_date = since or (datetime.now() - timedelta(hours=hours_back)).isoformat()
+        max_pages = max_pages or getattr(config, 'NEWSAPI_MAX_PAGES', 1)
         
         params = {
             "q": query,
             "from": from_date,
             "language": "en",
             "sortBy": "publishedAt",
+            "pageSize": NEWSAPI_PAGE_SIZE,
             "apiKey": self.api_key
         }
+        if until:
+            params["to"] = until
         
-        try:
-            response = requests.get(self.base_url, params=params, timeout=10)
+        scan = {"items": [], "newest": None, "oldest": None, "complete": False}
+        
+        for page in range(1, max_pages + 1):
+            try:
+                response = requests.get(self.base_url, params=dict(params, page=page), timeout=10)
+                
+                if response.status_code != 200:
+                    logger.error(f"❌ NewsAPI error: {response.status_code}")
+                    # Sonraki sayfa alınamadı (ör. plan sonuç sınırı): taranan kısım geçerli
+                    return scan if page > 1 else None
+                
+                data = response.json()
             
-            if response.status_code != 200:
-                logger.error(f"❌ NewsAPI error: {response.status_code}")
-                return 0
+            except Exception as e:
+                logger.error(f"❌ NewsAPI fetch failed: {str(e)}")
+                return scan if page > 1 else None
             
-            data = response.json()
             articles = data.get("articles", [])
             
-            added_count = 0
-            
-            for article in articles[:50]:  # İlk 50 haber
-                # Sentiment analizi yap (basit keyword-based)
-                sentiment = self._analyze_sentiment(article["title"] + " " + article.get("description", ""))
+            for article in articles:
+                published_at = article.get("publishedAt", "")
+                # "from" ve "to" parametreleri kapsayıcıdır; sınırdaki haberleri tekrar alma
+                if since and published_at <= since:
+                    scan["complete"] = True
+                    break
+                if until and published_at >= until:
+                    continue
                 
-                # İlgili sembolleri bul
-                related_symbols = self._find_related_symbols(article["title"], article.get("description", ""))
+                scan["newest"] = scan["newest"] or published_at
+                scan["oldest"] = published_at
                 
-                if related_symbols:
-                    # Veritabanına ekle
-                    self.db.add_news(
-                        title=article["title"],
-                        content=article.get("description", ""),
-                        source=article["source"]["name"],
-                        published_at=article["publishedAt"],
-                        sentiment_score=sentiment,
-                        impact_level=self._determine_impact(article),
-                        symbols=",".join(related_symbols),
-                        url=article.get("url")
-                    )
-                    added_count += 1
+                item = self._to_item(article)
+                if item:
+                    scan["items"].append(item)
             
-            logger.info(f"✅ NewsAPI: {added_count} haber eklendi")
-            return added_count
+            if scan["complete"] or len(articles) < NEWSAPI_PAGE_SIZE \
+                    or page * NEWSAPI_PAGE_SIZE >= data.get("totalResults", 0):
+                scan["complete"] = True
+                break
         
-        except Exception as e:
-            logger.error(f"❌ NewsAPI fetch failed: {str(e)}")
-            return 0
+        return scan
+    
+    def _to_item(self, article):
+        """Haberi puanlayıp add_news_batch sözlüğüne çevirir; ilgili sembol yoksa None"""
+        description = article.get("description") or ""
+        
+        # Sentiment analizi yap (basit keyword-based)
+        sentiment = self._analyze_sentiment(article["title"] + " " + description)
+        
+        # İlgili sembolleri bul
+        related_symbols = self._find_related_symbols(article["title"], description)
+        
+        if not related_symbols:
+            return None
+        
+        return {
+            "title": article["title"],
+            "content": description,
+            "source": article["source"]["name"],
+            "published_at": article["publishedAt"],
+            "sentiment_score": sentiment,
+            "impact_level": self._determine_impact(article),
+            "symbols": ",".join(related_symbols),
+            "url": article.get("url")
+        }
     
     def _analyze_sentiment(self, text):
         """Basit keyword-based sentiment analizi"""
@@ -166,9 +239,30 @@ class AlphaVantageFetcher:
         Ekonomik göstergeleri çek
         Örn: GDP, CPI, Unemployment
         """
+        items = self.collect_economic_indicators()
+        if items is None:
+            return 0
+        
+        added_count = self.db.add_news_batch(items)
+        logger.info(f"✅ Alpha Vantage: {added_count} gösterge eklendi")
+        return added_count
+    
+    def collect_economic_indicators(self, since=None):
+        """
+        Ekonomik göstergeleri çeker, veritabanına yazmaz
+        
+        Args:
+            since: Gösterge adı -> son alınan tarih sözlüğü; bu tarihten yeni
+                   olmayan veriler atlanır
+            
+        Returns:
+            add_news_batch'e verilebilecek haber sözlükleri listesi (hata durumunda None)
+        """
         if not self.api_key:
             logger.error("❌ Alpha Vantage key not found. Set ALPHAVANTAGE_KEY in .env")
-            return 0
+            return None
+        
+        since = since or {}
         
         indicators = [
             ("REAL_GDP", "GDP"),
@@ -177,7 +271,7 @@ class AlphaVantageFetcher:
             ("NONFARM_PAYROLL", "Jobs Report")
         ]
         
-        added_count = 0
+        items = []
         
         for indicator_name, display_name in indicators:
             try:
@@ -194,27 +288,31 @@ class AlphaVantageFetcher:
                     # Son veriyi al
                     if "data" in data and len(data["data"]) > 0:
                         latest = data["data"][0]
+                        published_at = latest.get("date", datetime.now().isoformat())
+                        
+                        # Bu gösterge için yeni veri yoksa atla
+                        if since.get(indicator_name) and published_at <= since[indicator_name]:
+                            continue
                         
                         # Sentiment belirle (örnek)
                         sentiment = self._interpret_economic_data(indicator_name, latest.get("value"))
                         
-                        self.db.add_news(
-                            title=f"US {display_name}: {latest.get('value')}",
-                            content=f"Latest {display_name} data: {latest.get('value')}",
-                            source="Alpha Vantage",
-                            published_at=latest.get("date", datetime.now().isoformat()),
-                            sentiment_score=sentiment,
-                            impact_level="HIGH",
-                            symbols="EURUSD,GBPUSD,USDJPY",
-                            category="Economic Data"
-                        )
-                        added_count += 1
+                        items.append({
+                            "title": f"US {display_name}: {latest.get('value')}",
+                            "content": f"Latest {display_name} data: {latest.get('value')}",
+                            "source": "Alpha Vantage",
+                            "published_at": published_at,
+                            "sentiment_score": sentiment,
+                            "impact_level": "HIGH",
+                            "symbols": "EURUSD,GBPUSD,USDJPY",
+                            "category": "Economic Data",
+                            "indicator": indicator_name
+                        })
             
             except Exception as e:
                 logger.error(f"❌ Failed to fetch {indicator_name}: {str(e)}")
         
-        logger.info(f"✅ Alpha Vantage: {added_count} gösterge eklendi")
-        return added_count
+        return items
     
     def _interpret_economic_data(self, indicator, value):
         """Ekonomik veriyi yorumla"""
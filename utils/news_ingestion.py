@@ -0,0 +1,193 @@
+"""
+Artımlı Haber Alım Servisi
+Ana işlem döngüsünden ayrı bir süreç olarak çalışır: her kaynak için yüksek su
+işaretini (en son alınan haberin zamanı) tutar, sadece yeni haberleri çeker ve
+toplu (batch) yazma yolunu kullanır. Yüksek etkili yeni haber geldiğinde ana
+döngüye sinyal dosyası üzerinden haber verir.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+import config
+from database.news_db import NewsDatabase
+from utils.logger import setup_logger
+
+logger = setup_logger("NewsIngestion")
+
+
+class NewsSignal:
+    """
+    Haber servisi ile ana döngü arasındaki dosya tabanlı sinyal.
+    Her yayında `seq` bir artar; okuyucu son gördüğü seq ile karşılaştırır.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or getattr(config, 'NEWS_SIGNAL_PATH', './data/news_signal.json')
+
+    def read(self):
+        """Son sinyali döndürür (yoksa seq=0)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {"seq": 0}
+
+    def publish(self, symbols, count):
+        """Yüksek etkili yeni haberleri duyurur (atomik yazma)"""
+        state = self.read()
+        state = {
+            "seq": int(state.get("seq", 0)) + 1,
+            "published_at": datetime.now().isoformat(),
+            "symbols": sorted(symbols),
+            "count": count
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return state
+
+    def wait(self, timeout, last_seq, poll_seconds=2):
+        """
+        Yeni bir sinyal gelene veya süre dolana kadar bekler
+
+        Argümanlar:
+            timeout: En fazla beklenecek süre (saniye)
+            last_seq: Okuyucunun en son gördüğü seq
+            poll_seconds: Kontrol aralığı
+
+        Döner:
+            Yeni sinyal sözlüğü veya süre dolduysa None
+        """
+        deadline = time.time() + timeout
+        while True:
+            state = self.read()
+            if int(state.get("seq", 0)) > last_seq:
+                return state
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            time.sleep(min(poll_seconds, remaining))
+
+
+class NewsIngestionService:
+    """Kaynakları kendi aralıklarıyla yoklayan, sadece yeni haberleri yazan servis"""
+
+    def __init__(self, db=None, signal=None):
+        self.db = db or NewsDatabase()
+        self.signal = signal or NewsSignal()
+        self.intervals = getattr(config, 'NEWS_SOURCE_INTERVALS', {"newsapi": 900, "alphavantage": 21600})
+        self.last_run = {}
+        self.last_cleanup = 0
+
+        # Fetcher'lar requests'e bağlı; servis başlarken bir kez kurulur
+        from utils.news_fetcher import NewsAPIFetcher, AlphaVantageFetcher
+        self.newsapi = NewsAPIFetcher()
+        self.alphavantage = AlphaVantageFetcher()
+
+    def _due(self, source, now):
+        return now - self.last_run.get(source, 0) >= self.intervals.get(source, 900)
+
+    def _ingest_newsapi(self):
+        """
+        NewsAPI: yüksek su işaretinden sonraki haberleri al. Haberler yeniden
+        eskiye gelir; tarama işarete ulaşamadan biterse (sayfa sınırı) işaret
+        ilerletilmez. Taranan en eski haber "newsapi:backfill" imlecine yazılır ve
+        sonraki yoklamalar aradaki boşluğu bu imleçten geriye doğru tarar; boşluk
+        kapanınca işaret ilk taramada görülen en yeni habere ("newsapi:frontier") taşınır.
+        """
+        since = self.db.get_high_water("newsapi")
+        cursor = self.db.get_high_water("newsapi:backfill")
+        scan = self.newsapi.scan_forex_news(since=since, until=cursor)
+        if not scan:
+            return []
+
+        items = scan["items"]
+        self.db.add_news_batch(items)
+
+        if scan["complete"]:
+            newest = self.db.get_high_water("newsapi:frontier") if cursor else scan["newest"]
+            if newest:
+                self.db.set_high_water("newsapi", newest)
+            if cursor:
+                self.db.set_high_water("newsapi:backfill", None)
+                self.db.set_high_water("newsapi:frontier", None)
+        elif scan["oldest"]:
+            if not cursor:
+                self.db.set_high_water("newsapi:frontier", scan["newest"])
+            self.db.set_high_water("newsapi:backfill", scan["oldest"])
+            logger.info(f"📰 newsapi: tarama {scan['oldest']} tarihinde kesildi, kalan kısım sonraki yoklamada")
+        return items
+
+    def _ingest_alphavantage(self):
+        """Alpha Vantage: her gösterge için ayrı yüksek su işareti"""
+        indicators = ["REAL_GDP", "CPI", "UNEMPLOYMENT", "NONFARM_PAYROLL"]
+        since = {name: self.db.get_high_water(f"alphavantage:{name}") for name in indicators}
+        items = self.alphavantage.collect_economic_indicators(since=since)
+        if not items:
+            return []
+
+        self.db.add_news_batch(items)
+        for item in items:
+            self.db.set_high_water(f"alphavantage:{item['indicator']}", item["published_at"])
+        return items
+
+    def run_once(self, force=False):
+        """
+        Vakti gelen kaynakları bir kez yoklar
+
+        Argümanlar:
+            force: True ise aralıklar yok sayılır ve tüm kaynaklar yoklanır
+
+        Döner:
+            Eklenen toplam haber sayısı
+        """
+        now = time.time()
+        fresh = []
+
+        for source, ingest in (("newsapi", self._ingest_newsapi),
+                               ("alphavantage", self._ingest_alphavantage)):
+            if not force and not self._due(source, now):
+                continue
+            self.last_run[source] = now
+            try:
+                items = ingest()
+                if items:
+                    logger.info(f"📰 {source}: {len(items)} yeni haber")
+                fresh.extend(items)
+            except Exception as e:
+                logger.error(f"{source} haber alımı başarısız: {str(e)}")
+
+        # Yüksek etkili yeni haber varsa ana döngüyü uyandır
+        high_impact = [i for i in fresh if i.get("impact_level") == "HIGH"]
+        if high_impact:
+            symbols = set()
+            for item in high_impact:
+                symbols.update(s for s in item["symbols"].split(",") if s)
+            state = self.signal.publish(symbols, len(high_impact))
+            logger.info(f"🔔 {len(high_impact)} yüksek etkili haber duyuruldu (seq={state['seq']})")
+
+        # Saklama temizliği günde bir kez
+        if now - self.last_cleanup >= 86400:
+            self.last_cleanup = now
+            try:
+                self.db.clear_old_news(days_old=getattr(config, 'NEWS_RETENTION_DAYS', 30))
+            except Exception as e:
+                logger.error(f"Cleanup failed: {str(e)}")
+
+        return len(fresh)
+
+    def run_forever(self, tick_seconds=None):
+        """Servisi Ctrl+C veya süreç sonlandırılana kadar çalıştırır"""
+        tick = tick_seconds or getattr(config, 'NEWS_INGEST_TICK_SECONDS', 60)
+        logger.info(f"🔄 Haber alım servisi başladı (tick={tick}s, aralıklar={self.intervals})")
+
+        try:
+            while True:
+                self.run_once()
+                time.sleep(tick)
+        except KeyboardInterrupt:
+            logger.info("🛑 Haber alım servisi durduruldu")
@@ -0,0 +1,191 @@
+"""
+Bekleyen İşlem Defteri (Pending Trade Book)
+learning.db'deki PENDING işlemleri bellekte tutar ve her sembol için SL/TP
+seviyelerini sıralı dizilerde indeksler. Fiyat güncellemesinde tetiklenen
+işlemler doğrusal tarama yerine bisect ile bulunur:
+
+- "Üst" seviyeler fiyat seviyeye ulaşınca/üstüne çıkınca tetiklenir (BUY TP, SELL SL)
+- "Alt" seviyeler fiyat seviyeye inince/altına düşünce tetiklenir (BUY SL, SELL TP)
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from utils.logger import setup_logger
+
+logger = setup_logger("PendingBook")
+
+
+class _LevelIndex:
+    """Tek yönlü tetik seviyeleri: sıralı (seviye, trade_id) çiftleri"""
+
+    __slots__ = ("levels", "ids")
+
+    def __init__(self):
+        self.levels = []
+        self.ids = []
+
+    def add(self, level, trade_id):
+        index = bisect_right(self.levels, level)
+        self.levels.insert(index, level)
+        self.ids.insert(index, trade_id)
+
+    def remove(self, level, trade_id):
+        index = bisect_left(self.levels, level)
+        while index < len(self.levels) and self.levels[index] == level:
+            if self.ids[index] == trade_id:
+                del self.levels[index]
+                del self.ids[index]
+                return
+            index += 1
+
+    def at_or_below(self, price):
+        """Seviyesi <= fiyat olan işlemler (fiyat yukarı kesti)"""
+        return self.ids[:bisect_right(self.levels, price)]
+
+    def at_or_above(self, price):
+        """Seviyesi >= fiyat olan işlemler (fiyat aşağı kesti)"""
+        return self.ids[bisect_left(self.levels, price):]
+
+
+class PendingTradeBook:
+    """Sembol başına SL/TP seviye indeksli bekleyen işlem defteri"""
+
+    def __init__(self, loader=None, resync_seconds=None):
+        """
+        Argümanlar:
+            loader: PENDING işlem sözlüklerini döndüren fonksiyon (ör. tracker.get_pending_trades)
+            resync_seconds: Defterin veritabanından yeniden yükleneceği süre. Dashboard gibi
+                başka süreçlerin yaptığı kapatma/sıfırlamalar bu süre içinde yansır.
+                None veya 0: yalnızca ilk kullanımda yüklenir.
+        """
+        self.loader = loader
+        self.resync_seconds = resync_seconds
+        self._lock = threading.RLock()
+        self._trades = {}     # trade_id -> işlem sözlüğü
+        self._upper = {}      # sembol -> _LevelIndex (BUY TP, SELL SL)
+        self._lower = {}      # sembol -> _LevelIndex (BUY SL, SELL TP)
+        self._loaded_at = None
+
+    # ------------------------------------------------------------------ senkron
+
+    def _ensure_loaded(self):
+        if self.loader is None:
+            return
+        stale = (self._loaded_at is None or
+                 (self.resync_seconds and time.monotonic() - self._loaded_at >= self.resync_seconds))
+        if stale:
+            self.reload()
+
+    def reload(self):
+        """Defteri veritabanındaki PENDING işlemlerle baştan kurar"""
+        trades = self.loader() if self.loader is not None else []
+        with self._lock:
+            self._trades.clear()
+            self._upper.clear()
+            self._lower.clear()
+            for trade in trades:
+                self._index(trade)
+            self._loaded_at = time.monotonic()
+        logger.debug(f"📒 Bekleyen işlem defteri yüklendi: {len(trades)} işlem")
+
+    @staticmethod
+    def _levels(trade):
+        """(üst seviye, alt seviye) ve her birinin tetiklendiğinde sonucu"""
+        tp, sl = trade.get("take_profit"), trade.get("stop_loss")
+        if trade.get("direction") == "BUY":
+            return (tp, "WIN"), (sl, "LOSS")
+        return (sl, "LOSS"), (tp, "WIN")
+
+    def _index(self, trade):
+        trade_id = trade["id"]
+        symbol = trade["symbol"]
+        self._trades[trade_id] = trade
+        (upper, _), (lower, _) = self._levels(trade)
+        if upper is not None:
+            self._upper.setdefault(symbol, _LevelIndex()).add(float(upper), trade_id)
+        if lower is not None:
+            self._lower.setdefault(symbol, _LevelIndex()).add(float(lower), trade_id)
+
+    def add(self, trade):
+        """Yeni PENDING işlemi deftere ekler (log_trade_decision sonrası)"""
+        with self._lock:
+            if self._loaded_at is None and self.loader is not None:
+                # Henüz yüklenmedi: ilk kullanımda zaten veritabanından okunacak
+                return
+            self.remove(trade["id"])
+            self._index(trade)
+
+    def remove(self, trade_id):
+        """İşlemi defterden çıkarır (kapatma sonrası); yoksa sessizce geçer"""
+        with self._lock:
+            trade = self._trades.pop(trade_id, None)
+            if trade is None:
+                return False
+            symbol = trade["symbol"]
+            (upper, _), (lower, _) = self._levels(trade)
+            if upper is not None and symbol in self._upper:
+                self._upper[symbol].remove(float(upper), trade_id)
+            if lower is not None and symbol in self._lower:
+                self._lower[symbol].remove(float(lower), trade_id)
+            return True
+
+    # ------------------------------------------------------------------ sorgular
+
+    def symbols(self):
+        """Bekleyen işlemi olan semboller"""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted({t["symbol"] for t in self._trades.values()})
+
+    def trades(self, symbol=None):
+        """Bekleyen işlemler (isteğe bağlı olarak tek sembol)"""
+        self._ensure_loaded()
+        with self._lock:
+            return [t for t in self._trades.values() if symbol is None or t["symbol"] == symbol]
+
+    def triggered(self, symbol, price):
+        """
+        Fiyat güncellemesinde TP/SL'i tetiklenen işlemler. Hem TP hem SL koşulu
+        sağlanıyorsa (bozuk seviyeler) eski davranıştaki gibi TP önceliklidir.
+
+        Döner:
+            [(işlem sözlüğü, 'WIN' | 'LOSS'), ...]
+        """
+        self._ensure_loaded()
+        if price is None:
+            return []
+        price = float(price)
+        with self._lock:
+            hits = {}
+            upper, lower = self._upper.get(symbol), self._lower.get(symbol)
+            for side, ids in ((0, upper.at_or_below(price) if upper else []),
+                              (1, lower.at_or_above(price) if lower else [])):
+                for trade_id in ids:
+                    outcome = self._levels(self._trades[trade_id])[side][1]
+                    if hits.get(trade_id) != "WIN":
+                        hits[trade_id] = outcome
+            return [(self._trades[trade_id], outcome) for trade_id, outcome in hits.items()]
+
+    def on_price(self, symbol, price, handler):
+        """
+        Akış halindeki fiyat beslemesi için: tetiklenen her işlem için handler(trade, outcome, price)
+        çağrılır. Handler işlemi kapatınca (update_trade_outcome) işlem defterden düşer.
+        Handler False döndürürse (işlem başka süreçte kapatılmış/silinmiş) sayılmaz.
+
+        Döner:
+            Kapatılan işlem sayısı
+        """
+        closed = 0
+        for trade, outcome in self.triggered(symbol, price):
+            try:
+                if handler(trade, outcome, price) is not False:
+                    closed += 1
+            except Exception as e:
+                logger.error(f"⚠️ Trade ID {trade['id']} tetik işleme hatası: {str(e)}")
+        return closed
+
+    def __len__(self):
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._trades)
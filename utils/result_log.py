@@ -0,0 +1,280 @@
+"""
+Sadece Eklenen (Append-Only) Sonuç Günlüğü
+Web sonuçları (son 200) ve analiz arşivi (son 5000) eskiden her kayıtta tüm
+JSON listesini okuyup başa ekleyerek yeniden yazıyordu. Burada her kayıt,
+numaralı JSONL segmentlerinin sonuncusuna tek satır olarak eklenir:
+
+- Yazma O(1): tek satır, dosya yeniden yazılmaz
+- Bellekte son N kayıt için halka tampon (deque) ve sembol başına son kayıt indeksi
+- Segment dolunca yenisine geçilir; saklama sınırının (N) tamamen dışında
+  kalan en eski segmentler silinir (sıkıştırma)
+- Başka süreçler (dashboard, analiz dışa aktarımı) aynı sınıfla okur; son
+  segmentin yalnızca yeni eklenen baytları okunur
+
+Eski web_results.json / analysis_archive.json varsa ve günlük boşsa ilk açılışta
+bir kez içe aktarılır ve .migrated uzantısıyla yeniden adlandırılır.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("ResultLog")
+
+WEB_RESULTS = "web"
+ANALYSIS_ARCHIVE = "archive"
+
+# Günlük adı -> (saklama config anahtarı, varsayılan, eski JSON dosyası)
+LOG_SETTINGS = {
+    WEB_RESULTS: ("WEB_RESULTS_KEEP", 200, "web_results.json"),
+    ANALYSIS_ARCHIVE: ("ANALYSIS_ARCHIVE_KEEP", 5000, "analysis_archive.json"),
+}
+
+SEGMENT_PREFIX = "seg-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class ResultLog:
+    """Segmentli JSONL günlüğü üzerinde son N kayıt görünümü"""
+
+    def __init__(self, directory, keep, segment_entries=None, legacy_json_path=None):
+        """
+        Argümanlar:
+            directory: Segment dosyalarının dizini
+            keep: Görünümde tutulan en yeni kayıt sayısı (N)
+            segment_entries: Segment başına kayıt sayısı (varsayılan: N/4, en az 50)
+            legacy_json_path: İlk açılışta içe aktarılacak eski JSON listesi (en yeni başta)
+        """
+        self.directory = directory
+        self.keep = int(keep)
+        self.segment_entries = int(segment_entries or max(50, self.keep // 4))
+        self.legacy_json_path = legacy_json_path
+        self._lock = threading.RLock()
+        self._reset()
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._load()
+            self._import_legacy_json()
+
+    def _reset(self):
+        self._ring = deque(maxlen=self.keep)  # (sıra, kayıt)
+        self._latest = {}      # sembol -> (sıra, kayıt)
+        self._counts = {}      # segment no -> kayıt sayısı
+        self._seq = 0
+        self._current = None   # son segment numarası
+        self._offset = 0       # son segmentte okunan/yazılan bayt
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
+
+    def _segments(self):
+        """Diskteki segment numaraları (artan)"""
+        numbers = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return numbers
+        for name in names:
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _remember(self, record):
+        if len(self._ring) == self.keep:
+            # Halkadan düşen kayıt sembolün son kaydıysa indeksten de çıkar
+            old_seq, old = self._ring[0]
+            symbol = old.get("symbol")
+            if symbol and self._latest.get(symbol, (None,))[0] == old_seq:
+                del self._latest[symbol]
+        self._seq += 1
+        self._ring.append((self._seq, record))
+        symbol = record.get("symbol")
+        if symbol:
+            self._latest[symbol] = (self._seq, record)
+
+    def _read_segment(self, number, offset=0):
+        """
+        Segmenti offset'ten okur. Yazımı süren (satır sonu gelmemiş) son satır
+        tüketilmez; bir sonraki okumada tamamlanmış hâliyle alınır.
+
+        Döner:
+            (kayıtlar, yeni offset)
+        """
+        try:
+            with open(self._segment_path(number), "rb") as f:
+                f.seek(offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return [], offset
+        end = chunk.rfind(b"\n") + 1
+        records = []
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Bozuk satır (çökme sırasında yarım kalmış) atlanır
+        return records, offset + end
+
+    def _load(self):
+        """Görünümü diskteki segmentlerden yeniden kurar"""
+        self._reset()
+        for number in self._segments():
+            records, offset = self._read_segment(number)
+            self._counts[number] = len(records)
+            for record in records:
+                self._remember(record)
+            self._current, self._offset = number, offset
+
+    def refresh(self):
+        """Başka bir sürecin eklediği kayıtları görünüme alır (son segmentin yalnızca yeni baytları)"""
+        with self._lock:
+            segments = self._segments()
+            if segments and segments[-1] == self._current:
+                records, self._offset = self._read_segment(self._current, self._offset)
+                self._counts[self._current] += len(records)
+                for record in records:
+                    self._remember(record)
+            elif segments or self._current is not None:
+                # Segment değişti, silindi veya yeniden yazıldı: baştan kur
+                self._load()
+
+    # ========================================
+    # YAZMA
+    # ========================================
+
+    def append(self, record):
+        """Kaydı son segmentin sonuna tek satır olarak ekler"""
+        line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            self.refresh()
+            if self._current is None or self._counts.get(self._current, 0) >= self.segment_entries:
+                self._current = (self._current or 0) + 1
+                self._counts[self._current] = 0
+                self._offset = 0
+                self.compact()
+            with open(self._segment_path(self._current), "ab") as f:
+                f.write(line)
+            self._offset += len(line)
+            self._counts[self._current] += 1
+            self._remember(record)
+
+    def compact(self):
+        """Tamamı son N kaydın dışında kalan en eski segmentleri siler"""
+        with self._lock:
+            total = sum(self._counts.values())
+            for number in sorted(self._counts)[:-1]:
+                if total - self._counts[number] < self.keep:
+                    break
+                total -= self._counts.pop(number)
+                try:
+                    os.remove(self._segment_path(number))
+                except FileNotFoundError:
+                    pass
+
+    def rewrite(self, records):
+        """
+        Görünümü verilen kayıtlarla değiştirir (toplu düzenleme, örn. zamanlama).
+        Yeni segment atomik yazılır, ardından eski segmentler silinir.
+
+        Argümanlar:
+            records: Kayıtlar (en yeni başta, entries() ile aynı sıra)
+        """
+        with self._lock:
+            self.refresh()
+            old = self._segments()
+            number = (old[-1] if old else 0) + 1
+            path = self._segment_path(number)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in reversed(list(records)[:self.keep]):
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            os.replace(tmp, path)
+            for n in old:
+                try:
+                    os.remove(self._segment_path(n))
+                except FileNotFoundError:
+                    pass
+            self._load()
+
+    def clear(self):
+        """Tüm segmentleri siler"""
+        with self._lock:
+            for number in self._segments():
+                try:
+                    os.remove(self._segment_path(number))
+                except FileNotFoundError:
+                    pass
+            self._reset()
+
+    def _import_legacy_json(self):
+        """Eski JSON listesini (varsa ve günlük boşsa) bir kez içe aktarır"""
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+        if self._ring:
+            return
+        try:
+            with open(self.legacy_json_path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ {self.legacy_json_path} okunamadı, içe aktarılmadı: {str(e)}")
+            return
+        items = [r for r in items if isinstance(r, dict)][:self.keep]
+        if items:
+            self.rewrite(items)
+        os.replace(self.legacy_json_path, self.legacy_json_path + ".migrated")
+        logger.info(f"📦 {len(items)} kayıt {self.legacy_json_path} dosyasından içe aktarıldı")
+
+    # ========================================
+    # OKUMA
+    # ========================================
+
+    def entries(self, limit=None):
+        """Son N kayıt (en yeni başta); web_results.json / analysis_archive.json ile aynı görünüm"""
+        with self._lock:
+            self.refresh()
+            items = [record for _, record in reversed(self._ring)]
+        return items if limit is None else items[:limit]
+
+    def latest(self, symbol):
+        """Sembolün görünümdeki en son kaydı veya None"""
+        with self._lock:
+            self.refresh()
+            entry = self._latest.get(symbol)
+        return entry[1] if entry else None
+
+    def latest_by_symbol(self):
+        """Her sembolün en son kaydı (en yeni başta)"""
+        with self._lock:
+            self.refresh()
+            items = sorted(self._latest.values(), key=lambda e: e[0], reverse=True)
+        return [record for _, record in items]
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._ring)
+
+
+def open_result_log(name, base_dir=None):
+    """
+    Yapılandırmadaki dizin ve saklama sınırıyla günlüğü açar
+
+    Argümanlar:
+        name: WEB_RESULTS veya ANALYSIS_ARCHIVE
+        base_dir: Günlüklerin kök dizini (varsayılanı config'den alır)
+    """
+    keep_key, keep_default, legacy_name = LOG_SETTINGS[name]
+    base_dir = base_dir or getattr(config, 'RESULT_LOG_DIR', './data/results')
+    return ResultLog(
+        os.path.join(base_dir, name),
+        keep=getattr(config, keep_key, keep_default),
+        legacy_json_path=os.path.join(os.path.dirname(os.path.normpath(base_dir)), legacy_name)
+    )
@@ -0,0 +1,247 @@
+"""
+Sönümlenen Duygu Endeksi
+Her sembol için haber duygusunun üstel olarak sönümlenen ağırlıklı ortalamasını
+bellekte tutar. Her yeni haber O(1) ile işlenir, sorgu sabit zamanlıdır.
+Durum periyodik olarak diske yazılır, böylece yeniden başlatmada endeks sıcak kalır.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+import config
+from utils.logger import setup_logger
+
+logger = setup_logger("SentimentIndex")
+
+# Sembol başına saklanan en yeni haber sayısı (LLM bağlamı ve dashboard için)
+RECENT_ITEMS = 5
+
+
+def normalize_symbol(symbol):
+    """'EURUSD=X', 'EUR/USD' gibi yazımları haber sembolü biçimine ('EURUSD') çevirir"""
+    return str(symbol).upper().replace("=X", "").replace("/", "").replace("-", "").strip()
+
+
+def parse_timestamp(value):
+    """Haber zaman damgasını epoch saniyesine çevirir (ayrıştırılamazsa None)"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        text = str(value).strip().replace("Z", "+00:00")
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+class _SymbolState:
+    """Tek sembolün sönümlenen toplamları"""
+
+    __slots__ = ("weighted_sum", "weight", "count", "high_impact", "updated_at", "recent")
+
+    def __init__(self):
+        self.weighted_sum = 0.0
+        self.weight = 0.0
+        self.count = 0.0
+        self.high_impact = 0.0
+        self.updated_at = None
+        self.recent = deque(maxlen=RECENT_ITEMS)
+
+    def decay_to(self, ts, half_life):
+        """Toplamları `ts` anına kadar sönümler"""
+        if self.updated_at is None:
+            self.updated_at = ts
+            return
+        if ts <= self.updated_at:
+            return
+        factor = 0.5 ** ((ts - self.updated_at) / half_life)
+        self.weighted_sum *= factor
+        self.weight *= factor
+        self.count *= factor
+        self.high_impact *= factor
+        self.updated_at = ts
+
+    def to_dict(self):
+        return {
+            "weighted_sum": self.weighted_sum,
+            "weight": self.weight,
+            "count": self.count,
+            "high_impact": self.high_impact,
+            "updated_at": self.updated_at,
+            "recent": list(self.recent)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.weighted_sum = data.get("weighted_sum", 0.0)
+        state.weight = data.get("weight", 0.0)
+        state.count = data.get("count", 0.0)
+        state.high_impact = data.get("high_impact", 0.0)
+        state.updated_at = data.get("updated_at")
+        state.recent.extend(data.get("recent", []))
+        return state
+
+
+class DecayingSentimentIndex:
+    """
+    Sembol bazlı üstel sönümlenen duygu endeksi.
+    Bir haberin ağırlığı = etki ağırlığı * 0.5 ^ (yaş / yarı ömür)
+    """
+
+    def __init__(self, half_life_hours=None, impact_weights=None, snapshot_path=None):
+        """
+        Argümanlar:
+            half_life_hours: Ağırlığın yarıya indiği süre (varsayılanı config'den alır)
+            impact_weights: Etki seviyesi -> ağırlık sözlüğü (varsayılanı config'den alır)
+            snapshot_path: Anlık görüntü dosyası (varsayılanı config'den alır)
+        """
+        self.half_life_hours = half_life_hours or getattr(config, 'SENTIMENT_HALF_LIFE_HOURS', 6)
+        self.half_life = self.half_life_hours * 3600.0
+        self.impact_weights = impact_weights or getattr(
+            config, 'SENTIMENT_IMPACT_WEIGHTS', {"HIGH": 1.0, "MEDIUM": 0.5, "LOW": 0.0}
+        )
+        self.snapshot_path = snapshot_path or getattr(config, 'SENTIMENT_SNAPSHOT_PATH', './data/sentiment_index.json')
+        self.symbols = {}
+        # Bölüm tablosu -> endekse işlenmiş en büyük haber id'si
+        self.last_ids = {}
+        self.last_snapshot = 0
+
+    def add(self, news):
+        """
+        Bir haberi ilgili tüm sembollerin endeksine O(1) ile ekler
+
+        Argümanlar:
+            news: published_at, sentiment_score, impact_level, symbols anahtarlarını içeren sözlük
+        """
+        weight = float(self.impact_weights.get(news.get("impact_level"), 0.0))
+        ts = parse_timestamp(news.get("published_at"))
+        if weight <= 0 or ts is None:
+            return
+
+        score = float(news.get("sentiment_score") or 0)
+        is_high = news.get("impact_level") == "HIGH"
+        item = {
+            "title": news.get("title"),
+            "source": news.get("source"),
+            "sentiment": news.get("sentiment_score"),
+            "impact": news.get("impact_level"),
+            "published_at": news.get("published_at")
+        }
+
+        for raw in str(news.get("symbols") or "").split(","):
+            key = normalize_symbol(raw)
+            if not key:
+                continue
+            state = self.symbols.get(key)
+            if state is None:
+                state = self.symbols[key] = _SymbolState()
+
+            state.decay_to(ts, self.half_life)
+            # Sıra dışı (daha eski) haber geldiyse, endeks zamanına göre sönümlenmiş ekle
+            factor = 0.5 ** ((state.updated_at - ts) / self.half_life) if ts < state.updated_at else 1.0
+            state.weighted_sum += weight * factor * score
+            state.weight += weight * factor
+            state.count += factor
+            if is_high:
+                state.high_impact += factor
+            if ts >= state.updated_at or not state.recent:
+                state.recent.appendleft(item)
+
+    def get(self, symbol, now=None):
+        """
+        Sembolün güncel (şu ana sönümlenmiş) duygu özetini sabit zamanda döndürür
+
+        Döner:
+            average_sentiment, news_count (etkin), high_impact_count (etkin),
+            weight ve recent_news anahtarlarını içeren sözlük
+        """
+        state = self.symbols.get(normalize_symbol(symbol))
+        if state is None or state.updated_at is None:
+            return {"average_sentiment": 0, "news_count": 0, "high_impact_count": 0,
+                    "weight": 0.0, "recent_news": []}
+
+        now = now or time.time()
+        factor = 0.5 ** (max(0.0, now - state.updated_at) / self.half_life)
+        weight = state.weight * factor
+        average = state.weighted_sum / state.weight if state.weight > 0 else 0
+
+        return {
+            "average_sentiment": round(average, 1),
+            "news_count": round(state.count * factor, 1),
+            "high_impact_count": round(state.high_impact * factor, 1),
+            "weight": weight,
+            "recent_news": list(state.recent)
+        }
+
+    def refresh(self, db, hours_lookback=None):
+        """
+        Veritabanına son yenilemeden beri eklenen haberleri endekse işler.
+        Her bölümde sadece son işlenen id'den büyük satırlar okunur (birincil anahtar aralığı),
+        bu sayede ayrı süreçteki haber servisinin yazdıkları da yakalanır.
+
+        Döner:
+            İşlenen haber sayısı
+        """
+        if hours_lookback is None:
+            hours_lookback = getattr(config, 'NEWS_LOOKBACK_HOURS', 24)
+
+        added = 0
+        for table, rows in db.get_news_after_ids(self.last_ids, hours_lookback):
+            for row in rows:
+                self.add(row)
+                self.last_ids[table] = max(self.last_ids.get(table, 0), row["id"])
+                added += 1
+
+        if added and time.time() - self.last_snapshot >= getattr(config, 'SENTIMENT_SNAPSHOT_SECONDS', 300):
+            self.save_snapshot()
+        return added
+
+    def save_snapshot(self):
+        """Endeks durumunu diske atomik olarak yazar"""
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            data = {
+                "saved_at": time.time(),
+                "half_life_hours": self.half_life_hours,
+                "impact_weights": self.impact_weights,
+                "last_ids": self.last_ids,
+                "symbols": {k: v.to_dict() for k, v in self.symbols.items()}
+            }
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            self.last_snapshot = time.time()
+        except Exception as e:
+            logger.warning(f"⚠️ Duygu endeksi kaydedilemedi: {str(e)}")
+
+    def load_snapshot(self):
+        """
+        Diskteki anlık görüntüyü yükler. Yarı ömür veya ağırlıklar değiştiyse
+        görüntü geçersiz sayılır ve endeks veritabanından yeniden kurulur.
+
+        Döner:
+            Yüklendiyse True
+        """
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️ Duygu endeksi okunamadı: {str(e)}")
+            return False
+
+        if data.get("half_life_hours") != self.half_life_hours or data.get("impact_weights") != self.impact_weights:
+            logger.info("ℹ️ Duygu endeksi ayarları değişmiş, endeks yeniden kurulacak")
+            return False
+
+        self.last_ids = {k: int(v) for k, v in data.get("last_ids", {}).items()}
+        self.symbols = {k: _SymbolState.from_dict(v) for k, v in data.get("symbols", {}).items()}
+        self.last_snapshot = data.get("saved_at", 0)
+        logger.info(f"✅ Duygu endeksi yüklendi ({len(self.symbols)} sembol)")
+        return True